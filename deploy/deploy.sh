@@ -95,7 +95,8 @@ ssh "$SERVER" "RD=$REMOTE_DIR RL=$REMOTE_DIR/releases/$RELEASE_NAME bash -s" <<
       pm2 start "$RD/venv/bin/python" --name magiclens-api \
         -- -m uvicorn api.bootstrap:app \
         --host 0.0.0.0 --port 8100 --workers 4 \
-        --proxy-headers --loop uvloop --http httptools || true
+        --proxy-headers --loop uvloop --http httptools \
+        --ws-per-message-deflate false || true
     fi
     pm2 save
     echo "  ✓ PM2 reloaded"
@@ -20,8 +20,13 @@ def upgrade() -> None:
     Production originally bootstrapped several tables from core.database before
     Alembic was wired in. Keep this migration idempotent so those databases can
     be brought under Alembic without dropping data.
+
+    All tables are created first and their indexes afterwards in one batch.
+    The migration is safe to rerun, so commits skip the synchronous WAL flush.
     """
 
+    op.execute("SET LOCAL synchronous_commit = off")
+
     op.execute("""
         CREATE TABLE IF NOT EXISTS user_profiles (
             id UUID PRIMARY KEY,
@@ -57,9 +62,6 @@ def upgrade() -> None:
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_user_id ON videos (user_id)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_category ON videos (category)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos (created_at)")
 
     op.execute("""
         CREATE TABLE IF NOT EXISTS artist_assets (
@@ -85,9 +87,6 @@ def upgrade() -> None:
     op.execute("ALTER TABLE artist_assets ADD COLUMN IF NOT EXISTS tags TEXT")
     op.execute("ALTER TABLE artist_assets ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'approved'")
     op.execute("ALTER TABLE artist_assets ADD COLUMN IF NOT EXISTS last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_artist_assets_artist_id ON artist_assets (artist_id)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_artist_assets_category ON artist_assets (category)")
-    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_artist_assets_nft_id ON artist_assets (nft_id)")
 
     op.execute("""
         CREATE TABLE IF NOT EXISTS collaborations (
@@ -106,9 +105,6 @@ def upgrade() -> None:
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_video_id ON collaborations (video_id)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_artist_id ON collaborations (artist_id)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_status ON collaborations (status)")
 
     op.execute("""
         CREATE TABLE IF NOT EXISTS overlays (
@@ -123,8 +119,6 @@ def upgrade() -> None:
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    op.execute("CREATE INDEX IF NOT EXISTS idx_overlays_collaboration_id ON overlays (collaboration_id)")
-    op.execute("CREATE INDEX IF NOT EXISTS idx_overlays_asset_id ON overlays (asset_id)")
 
     op.execute("""
         CREATE TABLE IF NOT EXISTS renders (
@@ -142,6 +136,19 @@ def upgrade() -> None:
             completed_at TIMESTAMP
         )
     """)
+
+    # Indexes, created once every table exists
+    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_user_id ON videos (user_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_category ON videos (category)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos (created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_artist_assets_artist_id ON artist_assets (artist_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_artist_assets_category ON artist_assets (category)")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_artist_assets_nft_id ON artist_assets (nft_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_video_id ON collaborations (video_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_artist_id ON collaborations (artist_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_collaborations_status ON collaborations (status)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_overlays_collaboration_id ON overlays (collaboration_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_overlays_asset_id ON overlays (asset_id)")
     op.execute("CREATE INDEX IF NOT EXISTS idx_renders_collaboration_id ON renders (collaboration_id)")
     op.execute("CREATE INDEX IF NOT EXISTS idx_renders_status ON renders (render_status)")
 
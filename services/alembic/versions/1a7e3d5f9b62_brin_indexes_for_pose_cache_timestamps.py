@@ -0,0 +1,57 @@
+"""brin_indexes_for_pose_cache_timestamps
+
+Revision ID: 1a7e3d5f9b62
+Revises: f0c62d8e5b19
+Create Date: 2025-01-07 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1a7e3d5f9b62"
+down_revision: Union[str, None] = "f0c62d8e5b19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, column) for timestamp indexes only used for range sweeps
+BRIN_INDEXES = [
+    ("idx_video_pose_analysis_created_at", "video_pose_analysis", "created_at"),
+    ("idx_video_pose_analysis_last_accessed", "video_pose_analysis", "last_accessed"),
+    ("idx_pose_sequence_matches_last_accessed", "pose_sequence_matches", "last_accessed"),
+    ("idx_smart_overlay_cache_last_accessed", "smart_overlay_cache", "last_accessed"),
+]
+
+
+def upgrade() -> None:
+    """Rebuild the pose cache timestamp indexes as BRIN.
+
+    These columns are only filtered by range (TTL cleanup in PoseCacheManager),
+    never used for ordered top-N reads, so a BRIN summary is enough and a tiny
+    fraction of the btree size. idx_videos_created_at stays a btree because
+    the video feed pages with ORDER BY created_at DESC LIMIT, which BRIN
+    cannot serve.
+    """
+
+    with op.get_context().autocommit_block():
+        for name, table, column in BRIN_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using="brin",
+                postgresql_with={"pages_per_range": 32},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Restore btree timestamp indexes."""
+
+    with op.get_context().autocommit_block():
+        for name, table, column in BRIN_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(name, table, [column], postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""drop_redundant_pose_analysis_video_index
+
+Revision ID: 3f1c9a7b2e04
+Revises: 2d483713e6c1
+Create Date: 2025-01-06 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a7b2e04"
+down_revision: Union[str, None] = "2d483713e6c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Drop the single-column video_id index on video_pose_analysis.
+
+    The unique constraint uq_video_pose_analysis_video_version is backed by a
+    btree on (video_id, analysis_version), whose leading column already serves
+    ``WHERE video_id = ...`` lookups. The extra index only adds write cost.
+    """
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_video_pose_analysis_video_id",
+            table_name="video_pose_analysis",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the single-column video_id index."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_video_pose_analysis_video_id",
+            "video_pose_analysis",
+            ["video_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
@@ -0,0 +1,76 @@
+"""cluster_overlays_by_collaboration
+
+Revision ID: 4b8d1f7e3c26
+Revises: 9e2f6b4c8a51
+Create Date: 2025-01-07 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8d1f7e3c26"
+down_revision: Union[str, None] = "9e2f6b4c8a51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index overlays by (collaboration_id, layer_order) and cluster on it.
+
+    Overlays are always read per collaboration ordered by layer_order (editor
+    and render queue), so clustering puts each collaboration's overlays on
+    adjacent heap pages. The old collaboration_id index is a prefix of the new
+    one and is dropped.
+
+    Postgres does not keep the table clustered as rows change. Re-run
+    ``CLUSTER overlays`` in a maintenance window, or use
+    ``pg_repack --table=overlays --order-by="collaboration_id, layer_order"``
+    to recluster without holding an exclusive lock.
+    """
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "idx_overlays_collab_layer",
+            table_name="overlays",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "idx_overlays_collab_layer",
+            "overlays",
+            ["collaboration_id", "layer_order"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "idx_overlays_collaboration_id",
+            table_name="overlays",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    # Takes an exclusive lock, but overlays is small and this runs once
+    op.execute("CLUSTER overlays USING idx_overlays_collab_layer")
+
+
+def downgrade() -> None:
+    """Restore the single-column collaboration_id index."""
+
+    op.execute("ALTER TABLE overlays SET WITHOUT CLUSTER")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_overlays_collaboration_id",
+            "overlays",
+            ["collaboration_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_overlays_collab_layer",
+            table_name="overlays",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,69 @@
+"""stale_flag_for_pose_cache_eviction
+
+Revision ID: 5c0b8f2a4d13
+Revises: 1a7e3d5f9b62
+Create Date: 2025-01-07 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c0b8f2a4d13"
+down_revision: Union[str, None] = "1a7e3d5f9b62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CACHE_TABLES = ["video_pose_analysis", "pose_sequence_matches", "smart_overlay_cache"]
+
+
+def upgrade() -> None:
+    """Add an is_stale flag and a partial index over flagged rows.
+
+    A partial index can't be predicated on NOW(), so the cleanup worker marks
+    rows past their TTL as stale and deletes them on its next pass unless they
+    were accessed in between (which clears the flag). The partial index only
+    holds the flagged minority; the BRIN last_accessed index still serves the
+    marking sweep.
+    """
+
+    for table in CACHE_TABLES:
+        op.add_column(
+            table,
+            sa.Column("is_stale", sa.Boolean(), server_default=sa.false(), nullable=False),
+        )
+
+    with op.get_context().autocommit_block():
+        for table in CACHE_TABLES:
+            # Clear an invalid leftover from an interrupted run before rebuilding
+            op.drop_index(
+                f"idx_{table}_stale",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+            op.create_index(
+                f"idx_{table}_stale",
+                table,
+                ["last_accessed"],
+                postgresql_where=sa.text("is_stale"),
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Remove the is_stale flag and its partial indexes."""
+
+    with op.get_context().autocommit_block():
+        for table in CACHE_TABLES:
+            op.drop_index(
+                f"idx_{table}_stale",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table in CACHE_TABLES:
+        op.drop_column(table, "is_stale")
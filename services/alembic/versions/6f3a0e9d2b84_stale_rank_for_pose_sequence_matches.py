@@ -0,0 +1,85 @@
+"""stale_rank_for_pose_sequence_matches
+
+Revision ID: 6f3a0e9d2b84
+Revises: 4b8d1f7e3c26
+Create Date: 2025-01-08 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6f3a0e9d2b84"
+down_revision: Union[str, None] = "4b8d1f7e3c26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add a stored stale_rank to pose_sequence_matches and index it with BRIN.
+
+    stale_rank is the last access time in epoch seconds, minus an hour per
+    recorded access, so it combines recency and popularity in one value. It is
+    never greater than epoch(last_accessed), so a stale_rank bound also narrows
+    the TTL sweep, and the last_accessed index on this table can go.
+    """
+
+    op.add_column(
+        "pose_sequence_matches",
+        sa.Column(
+            "stale_rank",
+            sa.BigInteger(),
+            sa.Computed(
+                "(EXTRACT(EPOCH FROM last_accessed)::bigint - access_count * 3600)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "idx_pose_matches_stale_rank",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "idx_pose_matches_stale_rank",
+            "pose_sequence_matches",
+            ["stale_rank"],
+            postgresql_using="brin",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "idx_pose_sequence_matches_last_accessed",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the last_accessed index and drop stale_rank."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_pose_sequence_matches_last_accessed",
+            "pose_sequence_matches",
+            ["last_accessed"],
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_pose_matches_stale_rank",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("pose_sequence_matches", "stale_rank")
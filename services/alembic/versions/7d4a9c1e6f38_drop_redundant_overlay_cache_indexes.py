@@ -0,0 +1,55 @@
+"""drop_redundant_overlay_cache_indexes
+
+Revision ID: 7d4a9c1e6f38
+Revises: 5c0b8f2a4d13
+Create Date: 2025-01-07 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d4a9c1e6f38"
+down_revision: Union[str, None] = "5c0b8f2a4d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Drop smart_overlay_cache indexes already covered by the unique constraint.
+
+    uq_overlay_cache_video_type_dims_version leads with (video_id, overlay_type),
+    which serves every lookup in PoseCacheManager. Nothing filters on
+    overlay_type without video_id, so the standalone type index is unused too.
+    """
+
+    with op.get_context().autocommit_block():
+        for name in ("idx_smart_overlay_cache_video_id", "idx_smart_overlay_cache_type"):
+            op.drop_index(
+                name,
+                table_name="smart_overlay_cache",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Restore the single-column overlay cache indexes."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_smart_overlay_cache_type",
+            "smart_overlay_cache",
+            ["overlay_type"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "idx_smart_overlay_cache_video_id",
+            "smart_overlay_cache",
+            ["video_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
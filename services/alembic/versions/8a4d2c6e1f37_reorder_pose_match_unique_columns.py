@@ -0,0 +1,82 @@
+"""reorder_pose_match_unique_columns
+
+Revision ID: 8a4d2c6e1f37
+Revises: 3f1c9a7b2e04
+Create Date: 2025-01-06 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4d2c6e1f37"
+down_revision: Union[str, None] = "3f1c9a7b2e04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Lead the pose match unique index with algorithm_version.
+
+    Every cache lookup filters on algorithm_version, and maintenance queries
+    filter on it alone, so it makes the better leading column. With the new
+    layout the standalone sequence_a_hash index is redundant.
+    """
+
+    _swap_unique_index(["algorithm_version", "sequence_a_hash", "sequence_b_hash"])
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_pose_sequence_matches_hash_a",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the original hash-first unique index."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_pose_sequence_matches_hash_a",
+            "pose_sequence_matches",
+            ["sequence_a_hash"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    _swap_unique_index(["sequence_a_hash", "sequence_b_hash", "algorithm_version"])
+
+
+def _swap_unique_index(columns: Sequence[str]) -> None:
+    """Rebuild uq_pose_matches_hashes_version on columns without blocking writes.
+
+    The new unique index is built concurrently, then swapped in for the
+    constraint in a short transaction with ADD CONSTRAINT ... USING INDEX.
+    """
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "uq_pose_matches_hashes_version_new",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "uq_pose_matches_hashes_version_new",
+            "pose_sequence_matches",
+            columns,
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+    op.drop_constraint("uq_pose_matches_hashes_version", "pose_sequence_matches", type_="unique")
+    op.execute(
+        """
+        ALTER TABLE pose_sequence_matches
+        ADD CONSTRAINT uq_pose_matches_hashes_version
+        UNIQUE USING INDEX uq_pose_matches_hashes_version_new
+        """
+    )
@@ -0,0 +1,56 @@
+"""gin_indexes_for_metadata_and_tags
+
+Revision ID: 9e2f6b4c8a51
+Revises: 7d4a9c1e6f38
+Create Date: 2025-01-07 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2f6b4c8a51"
+down_revision: Union[str, None] = "7d4a9c1e6f38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, column, operator class)
+GIN_INDEXES = [
+    ("idx_videos_metadata_gin", "videos", "metadata", None),
+    ("idx_artist_assets_metadata_gin", "artist_assets", "metadata", "jsonb_path_ops"),
+    ("idx_artist_assets_tags_trgm", "artist_assets", "tags", "gin_trgm_ops"),
+]
+
+
+def upgrade() -> None:
+    """Add GIN indexes for JSONB metadata containment and tag substring search.
+
+    artist_assets.tags is a comma-separated string matched with LIKE '%tag%'
+    by the overlay recommendations, so it gets a pg_trgm index rather than a
+    plain btree, which can't serve leading-wildcard patterns.
+    """
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        for name, table, column, opclass in GIN_INDEXES:
+            # Clear an invalid leftover from an interrupted run before rebuilding
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: opclass} if opclass else {},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Drop the GIN indexes; pg_trgm is left installed."""
+
+    with op.get_context().autocommit_block():
+        for name, table, _column, _opclass in GIN_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
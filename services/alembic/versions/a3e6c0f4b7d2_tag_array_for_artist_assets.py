@@ -0,0 +1,85 @@
+"""tag_array_for_artist_assets
+
+Revision ID: a3e6c0f4b7d2
+Revises: 6f3a0e9d2b84
+Create Date: 2025-01-09 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a3e6c0f4b7d2"
+down_revision: Union[str, None] = "6f3a0e9d2b84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Lowercased tags with the whitespace around commas removed
+TAGS_ARR_EXPRESSION = r"string_to_array(lower(regexp_replace(btrim(tags), '\s*,\s*', ',', 'g')), ',')"
+
+
+def upgrade() -> None:
+    """Add a stored tags_arr to artist_assets and index it with GIN.
+
+    The overlay recommendations match whole tags with tags_arr && ARRAY[...],
+    which the GIN index serves directly. Nothing matches tags with LIKE any
+    more, so the trigram index on tags is dropped.
+    """
+
+    op.add_column(
+        "artist_assets",
+        sa.Column(
+            "tags_arr",
+            postgresql.ARRAY(sa.Text()),
+            sa.Computed(TAGS_ARR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "idx_artist_assets_tags_arr_gin",
+            table_name="artist_assets",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "idx_artist_assets_tags_arr_gin",
+            "artist_assets",
+            ["tags_arr"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "idx_artist_assets_tags_trgm",
+            table_name="artist_assets",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the trigram index on tags and drop tags_arr."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_artist_assets_tags_trgm",
+            "artist_assets",
+            ["tags"],
+            postgresql_using="gin",
+            postgresql_ops={"tags": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_artist_assets_tags_arr_gin",
+            table_name="artist_assets",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("artist_assets", "tags_arr")
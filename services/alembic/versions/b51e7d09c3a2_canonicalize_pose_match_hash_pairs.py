@@ -0,0 +1,74 @@
+"""canonicalize_pose_match_hash_pairs
+
+Revision ID: b51e7d09c3a2
+Revises: 8a4d2c6e1f37
+Create Date: 2025-01-06 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b51e7d09c3a2"
+down_revision: Union[str, None] = "8a4d2c6e1f37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store pose match hash pairs in canonical (a <= b) order.
+
+    Each pair used to be stored in insertion order, so lookups had to probe
+    both (A, B) and (B, A). With a canonical order a single probe on the
+    unique index is enough and the sequence_b_hash index is no longer used.
+    """
+
+    # Drop mirrored duplicates, keeping the row that is already canonical
+    op.execute(
+        """
+        DELETE FROM pose_sequence_matches m
+        USING pose_sequence_matches c
+        WHERE m.sequence_a_hash > m.sequence_b_hash
+        AND c.sequence_a_hash = m.sequence_b_hash
+        AND c.sequence_b_hash = m.sequence_a_hash
+        AND c.algorithm_version = m.algorithm_version
+        """
+    )
+
+    # Swap the remaining out-of-order pairs
+    op.execute(
+        """
+        UPDATE pose_sequence_matches
+        SET sequence_a_hash = sequence_b_hash, sequence_b_hash = sequence_a_hash
+        WHERE sequence_a_hash > sequence_b_hash
+        """
+    )
+
+    op.create_check_constraint(
+        "pose_matches_canonical_order",
+        "pose_sequence_matches",
+        "sequence_a_hash <= sequence_b_hash",
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_pose_sequence_matches_hash_b",
+            table_name="pose_sequence_matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Allow pose match hash pairs in any order again."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_pose_sequence_matches_hash_b",
+            "pose_sequence_matches",
+            ["sequence_b_hash"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.drop_constraint("pose_matches_canonical_order", "pose_sequence_matches", type_="check")
@@ -0,0 +1,47 @@
+"""store_pose_match_hashes_as_bytea
+
+Revision ID: c7a3f5e2d918
+Revises: b51e7d09c3a2
+Create Date: 2025-01-06 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a3f5e2d918"
+down_revision: Union[str, None] = "b51e7d09c3a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store pose match hashes as raw 32-byte SHA-256 digests.
+
+    Hex strings take twice the space in both the heap and the unique index.
+    Lowercase hex sorts the same way as the underlying bytes, so the
+    canonical-order CHECK constraint still holds after conversion.
+    """
+
+    # Convert both columns in one statement so the CHECK is revalidated once
+    op.execute(
+        """
+        ALTER TABLE pose_sequence_matches
+            ALTER COLUMN sequence_a_hash TYPE BYTEA USING decode(sequence_a_hash, 'hex'),
+            ALTER COLUMN sequence_b_hash TYPE BYTEA USING decode(sequence_b_hash, 'hex')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Store pose match hashes as hex strings again."""
+
+    op.execute(
+        """
+        ALTER TABLE pose_sequence_matches
+            ALTER COLUMN sequence_a_hash TYPE VARCHAR(64) USING encode(sequence_a_hash, 'hex'),
+            ALTER COLUMN sequence_b_hash TYPE VARCHAR(64) USING encode(sequence_b_hash, 'hex')
+        """
+    )
@@ -0,0 +1,65 @@
+"""store_pose_analysis_as_compressed_bytea
+
+Revision ID: d2b8e4a61c75
+Revises: c7a3f5e2d918
+Create Date: 2025-01-06 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d2b8e4a61c75"
+down_revision: Union[str, None] = "c7a3f5e2d918"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store video_pose_analysis payloads as BYTEA with an encoding tag.
+
+    New rows are written by PoseCacheManager as zlib-compressed int16 arrays
+    (pose_encoding "i16z1"). Existing JSONB rows are kept as their UTF-8 JSON
+    text and tagged "json" so they stay readable until they are recomputed.
+    """
+
+    op.add_column(
+        "video_pose_analysis",
+        sa.Column("pose_encoding", sa.String(length=10), server_default="json", nullable=False),
+    )
+    op.execute(
+        """
+        ALTER TABLE video_pose_analysis
+            ALTER COLUMN pose_sequences TYPE BYTEA
+                USING convert_to(pose_sequences::text, 'UTF8'),
+            ALTER COLUMN normalized_poses TYPE BYTEA
+                USING convert_to(normalized_poses::text, 'UTF8'),
+            ALTER COLUMN movement_analysis TYPE BYTEA
+                USING convert_to(movement_analysis::text, 'UTF8')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Restore JSONB pose columns.
+
+    Compressed rows cannot be expressed in SQL, so they are dropped; the
+    cache repopulates them on the next analysis.
+    """
+
+    op.execute("DELETE FROM video_pose_analysis WHERE pose_encoding <> 'json'")
+    op.execute(
+        """
+        ALTER TABLE video_pose_analysis
+            ALTER COLUMN pose_sequences TYPE JSONB
+                USING convert_from(pose_sequences, 'UTF8')::jsonb,
+            ALTER COLUMN normalized_poses TYPE JSONB
+                USING convert_from(normalized_poses, 'UTF8')::jsonb,
+            ALTER COLUMN movement_analysis TYPE JSONB
+                USING convert_from(movement_analysis, 'UTF8')::jsonb
+        """
+    )
+    op.drop_column("video_pose_analysis", "pose_encoding")
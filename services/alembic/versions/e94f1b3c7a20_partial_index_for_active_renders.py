@@ -0,0 +1,68 @@
+"""partial_index_for_active_renders
+
+Revision ID: e94f1b3c7a20
+Revises: d2b8e4a61c75
+Create Date: 2025-01-06 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e94f1b3c7a20"
+down_revision: Union[str, None] = "d2b8e4a61c75"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace the full render_status index with a partial one on active renders.
+
+    Completed renders dominate the table but are never looked up by status,
+    so only queued/processing/failed rows are indexed. created_at is the
+    second key so queue scans can return rows in creation order.
+    """
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "idx_renders_active",
+            table_name="renders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "idx_renders_active",
+            "renders",
+            ["render_status", "created_at"],
+            postgresql_where=sa.text("render_status IN ('queued', 'processing', 'failed')"),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "idx_renders_status",
+            table_name="renders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the full render_status index."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_renders_status",
+            "renders",
+            ["render_status"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_renders_active",
+            table_name="renders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,68 @@
+"""covering_index_on_collaborations_video
+
+Revision ID: f0c62d8e5b19
+Revises: e94f1b3c7a20
+Create Date: 2025-01-06 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f0c62d8e5b19"
+down_revision: Union[str, None] = "e94f1b3c7a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace the plain video_id index on collaborations with a covering one.
+
+    INCLUDE (artist_id, status) lets "collaborations for this video" lookups
+    that check artist and status run as index-only scans. Index-only scans
+    depend on the visibility map, so collaborations should stay within
+    regular autovacuum reach (the defaults are fine at current write rates).
+    """
+
+    with op.get_context().autocommit_block():
+        # Clear an invalid leftover from an interrupted run before rebuilding
+        op.drop_index(
+            "idx_collab_video_covering",
+            table_name="collaborations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "idx_collab_video_covering",
+            "collaborations",
+            ["video_id"],
+            postgresql_include=["artist_id", "status"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "idx_collaborations_video_id",
+            table_name="collaborations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the plain video_id index."""
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_collaborations_video_id",
+            "collaborations",
+            ["video_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "idx_collab_video_covering",
+            table_name="collaborations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
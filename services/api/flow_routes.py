@@ -1,37 +1,48 @@
 """API routes for Flow blockchain integration."""
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Response
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Any, Tuple
+import orjson
 from core.flow_service import flow_service
-from core.access import authenticated
+from core.auth import current_user
 from core.user import User
+from api.responses import ORJSONResponse
 
-router = APIRouter(prefix="/flow", tags=["flow"])
+router = APIRouter(prefix="/flow", tags=["flow"], default_response_class=ORJSONResponse)
 
+# Serialized bodies for the static endpoints, keyed on flow_service.contracts_version
+_health_cache: Optional[Tuple[int, bytes]] = None
+_contracts_cache: Optional[Tuple[int, bytes]] = None
 
-class NFTOwnershipRequest(BaseModel):
+
+class FlowRequest(BaseModel):
+    """Base for /flow request bodies: plain scalar fields, unknown keys rejected."""
+    model_config = ConfigDict(extra="forbid")
+
+
+class NFTOwnershipRequest(FlowRequest):
     """Request to verify NFT ownership."""
     wallet_address: str
     nft_id: int
 
 
-class NFTUsageRequest(BaseModel):
+class NFTUsageRequest(FlowRequest):
     """Request to increment NFT usage."""
     nft_id: int
 
 
-class WorkflowExecutionRequest(BaseModel):
+class WorkflowExecutionRequest(FlowRequest):
     """Request to execute a workflow."""
     workflow_id: int
 
 
-class RoyaltyDistributionRequest(BaseModel):
+class RoyaltyDistributionRequest(FlowRequest):
     """Request to distribute royalties."""
     nft_id: int
     amount: float
 
 
-class ContractAddressUpdate(BaseModel):
+class ContractAddressUpdate(FlowRequest):
     """Update contract address after deployment."""
     contract_name: str
     address: str
@@ -40,11 +51,15 @@ class ContractAddressUpdate(BaseModel):
 @router.get("/health")
 async def health_check():
     """Health check endpoint for Flow service."""
-    return {
-        "status": "healthy",
-        "network": flow_service.network,
-        "contracts": flow_service.contract_addresses
-    }
+    global _health_cache
+    version = flow_service.contracts_version
+    if _health_cache is None or _health_cache[0] != version:
+        _health_cache = (version, orjson.dumps({
+            "status": "healthy",
+            "network": flow_service.network,
+            "contracts": flow_service.contract_addresses
+        }))
+    return Response(content=_health_cache[1], media_type="application/json")
 
 
 @router.post("/verify-nft-ownership")
@@ -95,8 +110,7 @@ async def get_nft_metadata(nft_id: int):
 
 
 @router.post("/nft/increment-usage")
-@authenticated
-async def increment_nft_usage(request: NFTUsageRequest, user: User):
+async def increment_nft_usage(request: NFTUsageRequest, user: User = Depends(current_user)):
     """
     Increment usage count for an NFT.
     
@@ -134,14 +148,14 @@ async def get_user_workflows(wallet_address: str):
     """
     try:
         workflows = await flow_service.get_user_workflows(wallet_address)
-        return {"wallet_address": wallet_address, "workflows": workflows}
+        # Return the response directly so the workflow list skips jsonable_encoder
+        return ORJSONResponse(content={"wallet_address": wallet_address, "workflows": workflows})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/workflow/execute")
-@authenticated
-async def execute_workflow(request: WorkflowExecutionRequest, user: User):
+async def execute_workflow(request: WorkflowExecutionRequest, user: User = Depends(current_user)):
     """
     Execute a workflow.
     
@@ -189,8 +203,7 @@ async def get_collaboration_project(project_id: int):
 
 
 @router.post("/royalties/distribute")
-@authenticated
-async def distribute_royalties(request: RoyaltyDistributionRequest, user: User):
+async def distribute_royalties(request: RoyaltyDistributionRequest, user: User = Depends(current_user)):
     """
     Distribute royalties to NFT creator.
     
@@ -221,8 +234,7 @@ async def distribute_royalties(request: RoyaltyDistributionRequest, user: User):
 
 
 @router.post("/nft/sync/{nft_id}")
-@authenticated
-async def sync_nft_to_database(nft_id: int, user: User):
+async def sync_nft_to_database(nft_id: int, user: User = Depends(current_user)):
     """
     Sync NFT data from blockchain to local database.
     
@@ -284,7 +296,11 @@ async def get_contract_addresses():
     Returns:
         Contract addresses
     """
-    return {
-        "network": flow_service.network,
-        "contracts": flow_service.contract_addresses
-    }
\ No newline at end of file
+    global _contracts_cache
+    version = flow_service.contracts_version
+    if _contracts_cache is None or _contracts_cache[0] != version:
+        _contracts_cache = (version, orjson.dumps({
+            "network": flow_service.network,
+            "contracts": flow_service.contract_addresses
+        }))
+    return Response(content=_contracts_cache[1], media_type="application/json")
\ No newline at end of file
@@ -185,4 +185,9 @@ class BodyAiAnalysisServiceGetSmartOverlayRecommendations(BaseModel):
   limit: int
 
 GetSmartOverlayRecommendationsOutputSchema = List[Dict]
+class BodyAiAnalysisServiceGetRecommendationsForVideos(BaseModel):
+  video_ids: List[UUID] = Field(max_length=12)
+  limit: int
+
+GetRecommendationsForVideosOutputSchema = Dict[str, List[Dict]]
     
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""JSON response classes backed by orjson."""
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson.
+
+    Defined here rather than using fastapi.responses.ORJSONResponse, which newer
+    FastAPI releases deprecate. orjson handles UUIDs, datetimes and numpy values
+    natively, so handlers can return service dicts without jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
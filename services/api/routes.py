@@ -79,25 +79,9 @@ class FlowLoginResponse(BaseModel):
 
 def get_current_user(request: Request):
     """Get current user from JWT token in Authorization header."""
-    from core.auth import get_current_user_from_token
+    from core.auth import get_user_from_authorization
 
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    try:
-        # Expected format: "Bearer <token>"
-        token_type, token = auth_header.split()
-        if token_type.lower() != "bearer":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-    except ValueError:
-        raise HTTPException(status_code=401, detail="Invalid authorization header format")
-
-    user = get_current_user_from_token(token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    return user
+    return get_user_from_authorization(request.headers.get("Authorization"))
 
 
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
@@ -178,6 +162,8 @@ from .models import (
     AnalyzeVideoForOverlaysOutputSchema,
     BodyAiAnalysisServiceGetSmartOverlayRecommendations,
     GetSmartOverlayRecommendationsOutputSchema,
+    BodyAiAnalysisServiceGetRecommendationsForVideos,
+    GetRecommendationsForVideosOutputSchema,
 )
 from core import (
     user_service,
@@ -190,6 +176,7 @@ from core import (
 )
 from core.media import MediaFile
 from api.flow_routes import router as flow_router
+from api.responses import ORJSONResponse
 
 
 ###############################################################################
@@ -267,6 +254,21 @@ async def startup_render_worker():
     start_auto_promote_scheduler(interval_seconds=60)
 
 
+# Keep one pooled Flow Access Node client for the lifetime of the app
+@app.on_event("startup")
+async def startup_flow_client():
+    from core.flow_service import flow_service
+
+    await flow_service.startup()
+
+
+@app.on_event("shutdown")
+async def shutdown_flow_client():
+    from core.flow_service import flow_service
+
+    await flow_service.shutdown()
+
+
 @app.post("/api/auth/flow/login", response_model=FlowLoginResponse)
 async def flow_login(request: FlowLoginRequest):
     """Login with Flow wallet and get JWT token."""
@@ -296,7 +298,18 @@ async def flow_login(request: FlowLoginRequest):
 app.include_router(flow_router)
 
 # WebSocket routes for real-time collaboration
-from api.websocket_routes import websocket_endpoint, get_collaboration_presence
+from api.websocket_routes import websocket_endpoint, get_collaboration_presence, ws_manager
+
+
+# Relay collaboration broadcasts between workers over Redis
+@app.on_event("startup")
+async def startup_websocket_fanout():
+    await ws_manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_websocket_fanout():
+    await ws_manager.stop()
 
 
 @app.websocket("/api/ws/{collaboration_id}")
@@ -305,10 +318,12 @@ async def websocket_collaboration(websocket: WebSocket, collaboration_id: str, t
     await websocket_endpoint(websocket, collaboration_id, token)
 
 
-@app.get("/api/collaborations/{collaboration_id}/presence")
+@app.get("/api/collaborations/{collaboration_id}/presence", response_class=ORJSONResponse)
 async def collaboration_presence(collaboration_id: str):
     """Get current presence information for a collaboration."""
-    return await get_collaboration_presence(collaboration_id)
+    # Polled by every open client, so encode the presence dict directly
+    # rather than walking it through jsonable_encoder first
+    return ORJSONResponse(content=await get_collaboration_presence(collaboration_id))
 
 
 ###############################################################################
@@ -1322,6 +1337,7 @@ async def ai_analysis_service_analyze_video_for_overlays(
     "/api/ai_analysis_service/get_smart_overlay_recommendations",
     response_model=GetSmartOverlayRecommendationsOutputSchema,
     operation_id="ai_analysis_service_get_smart_overlay_recommendations",
+    response_class=ORJSONResponse,
 )
 async def ai_analysis_service_get_smart_overlay_recommendations(
     body: BodyAiAnalysisServiceGetSmartOverlayRecommendations = Body(...),
@@ -1330,13 +1346,37 @@ async def ai_analysis_service_get_smart_overlay_recommendations(
     """
     Get AI-recommended overlays for a specific video.
     """
+    # Recommendation lists carry asset rows with UUIDs and datetimes, which
+    # orjson encodes natively, so skip the jsonable_encoder walk
     response = await run_sync_in_thread(
         ai_analysis_service.get_smart_overlay_recommendations,
         user=current_user,
         video_id=body.video_id,
         limit=body.limit,
     )
-    return response
+    return ORJSONResponse(content=response)
+
+
+@app.post(
+    "/api/ai_analysis_service/get_recommendations_for_videos",
+    response_model=GetRecommendationsForVideosOutputSchema,
+    operation_id="ai_analysis_service_get_recommendations_for_videos",
+    response_class=ORJSONResponse,
+)
+async def ai_analysis_service_get_recommendations_for_videos(
+    body: BodyAiAnalysisServiceGetRecommendationsForVideos = Body(...),
+    current_user: User = Depends(get_current_user),
+) -> GetRecommendationsForVideosOutputSchema:
+    """
+    Get AI-recommended overlays for several videos, keyed by video id.
+    """
+    response = await run_sync_in_thread(
+        ai_analysis_service.get_recommendations_for_videos,
+        user=current_user,
+        video_ids=body.video_ids,
+        limit=body.limit,
+    )
+    return ORJSONResponse(content=response)
 
 
 # Computer Vision Pose Analysis Endpoints
@@ -1417,8 +1457,7 @@ async def analyze_video_poses(
     Body should contain:
     - video_id: UUID of the video to analyze
     """
-    from core.computer_vision import PoseAnalyzer
-    from core.ai_analysis_service import VideoAnalyzer
+    from core.ai_analysis_service import get_video_analyzer
 
     try:
         video_id = body.get("video_id")
@@ -1439,11 +1478,9 @@ async def analyze_video_poses(
         video = Video(**videos_data[0])
 
         # Analyze video with pose awareness
-        analyzer = VideoAnalyzer()
-        analysis = analyzer.analyze_video_content(video.file_path, video.duration)
-
-        # Add pose-specific enhancements
-        pose_analyzer = PoseAnalyzer()
+        analysis = get_video_analyzer().analyze_video_content(
+            video.file_path, video.duration, video.id
+        )
 
         return {
             "success": True,
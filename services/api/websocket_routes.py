@@ -1,23 +1,30 @@
 """WebSocket routes for real-time collaboration features."""
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException, Depends, status
-from typing import Dict, Optional
-import json
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from weakref import WeakKeyDictionary, WeakSet
+import asyncio
+import orjson
 from loguru import logger
 
 from core.websocket_service import connection_manager, handle_websocket_message
+from core.room_fanout import RoomFanout
+from core.metrics import track_websocket_drop
 from core.auth import verify_access_token
 from core.user import User
 
 
 async def get_current_user_ws(websocket: WebSocket, token: str) -> Optional[User]:
     """Get current user from JWT token for WebSocket connection."""
-    from core.auth import get_current_user_from_token
+    from core.auth import get_cached_user, get_current_user_from_token
     
     if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return None
     
-    user = get_current_user_from_token(token)
+    user = get_cached_user(token)
+    if not user:
+        # Signature verification is CPU work, so keep it off the event loop
+        user = await asyncio.to_thread(get_current_user_from_token, token)
     if not user:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return None
@@ -25,21 +32,90 @@ async def get_current_user_ws(websocket: WebSocket, token: str) -> Optional[User
     return user
 
 
+def _frame(message: Dict) -> Dict:
+    """Build the ASGI send event for an outbound JSON text frame.
+    
+    The event is never mutated, so one instance is shared by every recipient
+    of a broadcast.
+    """
+    return {"type": "websocket.send", "text": orjson.dumps(message).decode()}
+
+
+# Heartbeat replies are the most frequent direct message, so every
+# connection shares one prebuilt frame
+_PONG_FRAME = _frame({'type': 'pong'})
+# Noisy clients can send malformed frames in a tight loop
+_INVALID_JSON_FRAME = _frame({'type': 'error', 'message': 'Invalid JSON'})
+
+
+# Outbound frames buffered per connection before the client counts as too slow
+SEND_QUEUE_SIZE = 32
+# Longest a single frame may take to send before the client is dropped
+SEND_TIMEOUT_SECONDS = 5.0
+# How often coalesced cursor and overlay updates are broadcast (~30 Hz)
+COALESCE_INTERVAL_SECONDS = 1 / 30
+# Broadcasts superseded by the next one within a frame; when a client's queue
+# is full these are skipped instead of disconnecting it
+LOSSY_MESSAGE_TYPES = frozenset({'cursor_batch', 'cursor_updated'})
+
+
 class WebSocketManager:
-    """Manages active WebSocket connections."""
+    """Manages active WebSocket connections.
+
+    Each connection owns a bounded send queue drained by its own relay task,
+    so broadcasting is a non-blocking enqueue per recipient and a slow client
+    only delays itself. A client whose queue fills up, or whose socket stalls
+    on a single send, is disconnected.
+
+    Connections are stored per room, so a broadcast only touches the state of
+    the collaboration it targets. Broadcasts are also published through
+    RoomFanout so sockets held by other workers receive them.
+    """
+    
+    def __init__(self) -> None:
+        # websocket -> user_id mapping; weak so a socket whose disconnect was
+        # missed doesn't stay pinned here
+        self.active_connections: "WeakKeyDictionary[WebSocket, str]" = WeakKeyDictionary()
+        # user_id -> collaboration holding the user's latest socket
+        self.user_room: Dict[str, str] = {}
+        # collaboration_id -> parallel lists of its members' user ids, sockets,
+        # send queues and relay tasks
+        self.rooms: Dict[str, Dict[str, list]] = {}
+        # (collaboration_id, user_id) -> position in that room's lists
+        self.user_index: Dict[Tuple[str, str], int] = {}
+        # sockets being closed for falling behind
+        self.slow_clients: "WeakSet[WebSocket]" = WeakSet()
+        self._close_tasks: Set[asyncio.Task] = set()
+        # Broadcasts coalesced updates while any room is open
+        self._flush_task: Optional[asyncio.Task] = None
+        # Loop the sockets are served on, for broadcasts from worker threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Relays broadcasts to and from the other API workers
+        self.fanout = RoomFanout(self._deliver_text)
     
-    def __init__(self):
-        # websocket -> user_id mapping
-        self.active_connections: Dict[WebSocket, str] = {}
-        # user_id -> websocket mapping
-        self.user_websockets: Dict[str, WebSocket] = {}
+    async def start(self):
+        """Capture the serving loop and start cross-worker fan-out."""
+        self._loop = asyncio.get_running_loop()
+        await self.fanout.start()
+    
+    async def stop(self):
+        """Stop cross-worker fan-out."""
+        await self.fanout.stop()
     
     async def connect(self, websocket: WebSocket, user_id: str, collaboration_id: str, user_info: Dict):
         """Accept WebSocket connection and register user."""
         await websocket.accept()
+        self._loop = asyncio.get_running_loop()
         
         self.active_connections[websocket] = user_id
-        self.user_websockets[user_id] = websocket
+        self.user_room[user_id] = collaboration_id
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        relay_task = asyncio.create_task(self._relay(user_id, websocket, queue))
+        self._join_room(collaboration_id, user_id, websocket, queue, relay_task)
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
         
         # Join collaboration room in connection manager
         connection_manager.join_collaboration(collaboration_id, user_id, user_info)
@@ -48,71 +124,268 @@ class WebSocketManager:
     
     async def disconnect(self, websocket: WebSocket, collaboration_id: str):
         """Remove WebSocket connection and notify others."""
-        user_id = self.active_connections.get(websocket)
+        user_id = self.active_connections.pop(websocket, None)
+        self.slow_clients.discard(websocket)
         
         if user_id:
-            # Leave collaboration room
-            connection_manager.leave_collaboration(collaboration_id, user_id)
-            
-            # Clean up mappings
-            if websocket in self.active_connections:
-                del self.active_connections[websocket]
-            if user_id in self.user_websockets:
-                del self.user_websockets[user_id]
+            # A reconnect may already have replaced this socket's slot
+            if self._leave_room(collaboration_id, user_id, websocket):
+                if self.user_room.get(user_id) == collaboration_id:
+                    del self.user_room[user_id]
+                
+                # Leave collaboration room
+                connection_manager.leave_collaboration(collaboration_id, user_id)
             
             logger.info(f"User {user_id} disconnected from collaboration {collaboration_id}")
     
-    async def send_personal_message(self, message: Dict, websocket: WebSocket):
-        """Send message to specific WebSocket connection."""
+    def _join_room(self, collaboration_id: str, user_id: str, websocket: WebSocket,
+                   queue: asyncio.Queue, relay_task: asyncio.Task):
+        """Add a connection to its room, replacing the user's previous socket."""
+        room = self.rooms.get(collaboration_id)
+        if room is None:
+            room = self.rooms[collaboration_id] = {"user_ids": [], "wss": [], "queues": [], "relays": []}
+        
+        key = (collaboration_id, user_id)
+        index = self.user_index.get(key)
+        if index is None:
+            self.user_index[key] = len(room["user_ids"])
+            room["user_ids"].append(user_id)
+            room["wss"].append(websocket)
+            room["queues"].append(queue)
+            room["relays"].append(relay_task)
+        else:
+            room["relays"][index].cancel()
+            room["wss"][index] = websocket
+            room["queues"][index] = queue
+            room["relays"][index] = relay_task
+    
+    def _leave_room(self, collaboration_id: str, user_id: str, websocket: WebSocket) -> bool:
+        """Swap-remove a connection from its room's lists and stop its relay."""
+        key = (collaboration_id, user_id)
+        index = self.user_index.get(key)
+        if index is None:
+            return False
+        room = self.rooms[collaboration_id]
+        if room["wss"][index] is not websocket:
+            return False
+        
+        room["relays"][index].cancel()
+        del self.user_index[key]
+        last = len(room["user_ids"]) - 1
+        if index != last:
+            for column in room.values():
+                column[index] = column[last]
+            self.user_index[(collaboration_id, room["user_ids"][index])] = index
+        for column in room.values():
+            column.pop()
+        
+        if not room["user_ids"]:
+            del self.rooms[collaboration_id]
+        return True
+    
+    async def _flush_loop(self):
+        """Broadcast coalesced cursor and overlay updates until every room is empty."""
+        while self.rooms:
+            await asyncio.sleep(COALESCE_INTERVAL_SECONDS)
+            try:
+                connection_manager.flush_pending_updates()
+            except Exception as e:
+                logger.error(f"Error flushing coalesced updates: {e}")
+        # Settle anything queued just before the last member left
+        connection_manager.flush_pending_updates()
+    
+    async def _relay(self, user_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued frames to one connection until it is cancelled or fails."""
+        send = websocket.send
         try:
-            await websocket.send_json(message)
+            while True:
+                frame = await queue.get()
+                await asyncio.wait_for(send(frame), timeout=SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._drop_slow_client(user_id, websocket)
         except Exception as e:
-            logger.error(f"Error sending message: {e}")
+            logger.error(f"Error sending message to user {user_id}: {e}")
     
-    async def broadcast_to_collaboration(self, collaboration_id: str, message: Dict, exclude_user: Optional[str] = None):
-        """Broadcast message to all users in collaboration."""
-        # Get all users in the collaboration
-        users = connection_manager.get_collaboration_users(collaboration_id)
+    def _enqueue(self, user_id: str, frame: Dict):
+        """Queue a serialized frame for a user's latest socket."""
+        collaboration_id = self.user_room.get(user_id)
+        if collaboration_id is None:
+            return
+        index = self.user_index.get((collaboration_id, user_id))
+        if index is None:
+            return
+        room = self.rooms[collaboration_id]
         
-        for user in users:
-            user_id = user['user_id']
-            
+        try:
+            room["queues"][index].put_nowait(frame)
+        except asyncio.QueueFull:
+            track_websocket_drop("direct")
+            self._drop_slow_client(user_id, room["wss"][index])
+    
+    def _drop_slow_client(self, user_id: str, websocket: WebSocket):
+        """Close the socket of a client that has fallen behind.
+        
+        The endpoint's receive loop then sees the disconnect and cleans up.
+        """
+        if websocket in self.slow_clients:
+            return
+        self.slow_clients.add(websocket)
+        logger.warning(f"User {user_id} is not keeping up with messages, disconnecting")
+        
+        task = asyncio.create_task(self._close(websocket))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception as e:
+            logger.debug(f"Error closing slow WebSocket: {e}")
+    
+    async def send_personal_message(self, message: Dict, websocket: WebSocket):
+        """Send message to specific WebSocket connection."""
+        user_id = self.active_connections.get(websocket)
+        if user_id:
+            self._enqueue(user_id, _frame(message))
+    
+    def broadcast_to_collaboration(self, collaboration_id: str, message: Dict, exclude_user: Optional[str] = None):
+        """Broadcast message to all users in collaboration, on every worker."""
+        if collaboration_id not in self.rooms and not self.fanout.enabled:
+            return
+        
+        # Serialize once for every recipient
+        frame = _frame(message)
+        message_type = message.get("type", "")
+        self._deliver(collaboration_id, frame, exclude_user, message_type)
+        self.fanout.publish(collaboration_id, frame["text"], exclude_user, message_type)
+    
+    def _deliver_text(self, collaboration_id: str, text: str, exclude_user: Optional[str] = None,
+                      message_type: str = ""):
+        """Deliver an encoded broadcast received from another worker."""
+        self._deliver(collaboration_id, {"type": "websocket.send", "text": text}, exclude_user, message_type)
+    
+    def _deliver(self, collaboration_id: str, frame: Dict, exclude_user: Optional[str] = None,
+                 message_type: str = ""):
+        """Enqueue a frame for this worker's sockets in a room.
+        
+        A client with a full queue misses lossy frames, since the next cursor
+        batch replaces them anyway; anything else would leave it out of sync,
+        so the client is disconnected to reconnect and resync instead.
+        """
+        room = self.rooms.get(collaboration_id)
+        if not room:
+            return
+        
+        lossy = message_type in LOSSY_MESSAGE_TYPES
+        for user_id, websocket, queue in zip(room["user_ids"], room["wss"], room["queues"], strict=True):
             # Skip excluded user
-            if exclude_user and user_id == exclude_user:
+            if user_id == exclude_user:
                 continue
             
-            # Send to user's websocket if connected
-            if user_id in self.user_websockets:
-                websocket = self.user_websockets[user_id]
-                await self.send_personal_message(message, websocket)
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                track_websocket_drop(message_type or "unknown")
+                if not lossy:
+                    self._drop_slow_client(user_id, websocket)
+    
+    def broadcast_threadsafe(self, collaboration_id: str, message: Dict, exclude_user: Optional[str] = None):
+        """Broadcast from the event loop or from a worker thread.
+        
+        Service code run through run_sync_in_thread hands the broadcast to the
+        loop, since the send queues are not thread-safe.
+        """
+        loop = self._loop
+        if loop is None:
+            # Nobody has connected yet, so there is no one to send to
+            return
+        
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        
+        if on_loop:
+            self.broadcast_to_collaboration(collaboration_id, message, exclude_user)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self.broadcast_to_collaboration, collaboration_id, message, exclude_user)
     
     async def send_to_user(self, user_id: str, message: Dict):
         """Send message to specific user."""
-        if user_id in self.user_websockets:
-            websocket = self.user_websockets[user_id]
-            await self.send_personal_message(message, websocket)
+        self._enqueue(user_id, _frame(message))
+    
+    def send_frame(self, user_id: str, frame: Dict):
+        """Send a prebuilt frame from _frame() to a specific user."""
+        self._enqueue(user_id, frame)
 
 
 # Global WebSocket manager instance
 ws_manager = WebSocketManager()
 
 
-# Override the connection manager's broadcast method to use actual WebSockets
-def _broadcast_with_websockets(collaboration_id: str, message: Dict, exclude_user: Optional[str] = None):
-    """Enhanced broadcast that uses actual WebSocket connections."""
-    import asyncio
+# Deliver the connection manager's broadcasts over the actual WebSockets.
+# Broadcasting only enqueues, so it runs inline instead of in a new task.
+connection_manager.broadcaster = ws_manager.broadcast_threadsafe
+
+
+async def _handle_ping(collaboration_id: str, user_id: str, message_data: Dict):
+    """Respond to heartbeat."""
+    ws_manager.send_frame(user_id, _PONG_FRAME)
+
+
+async def _handle_overlay_update(collaboration_id: str, user_id: str, message_data: Dict):
+    """Hold an overlay update for the next overlay_batch."""
+    connection_manager.queue_overlay_update(
+        collaboration_id,
+        user_id,
+        message_data.get('overlay_data', {})
+    )
+
+
+async def _handle_cursor_update(collaboration_id: str, user_id: str, message_data: Dict):
+    """Hold a cursor position for the next cursor_batch."""
+    connection_manager.queue_cursor_position(
+        collaboration_id,
+        user_id,
+        message_data.get('cursor_data', {})
+    )
+
+
+async def _handle_chat_message(collaboration_id: str, user_id: str, message_data: Dict):
+    """Broadcast a chat message and echo it back to the sender."""
+    message_text = message_data.get('message', '')
+    connection_manager.broadcast_chat_message(
+        collaboration_id,
+        user_id,
+        message_text
+    )
     
-    # Create task to broadcast via WebSockets
-    loop = asyncio.get_event_loop()
-    if loop.is_running():
-        asyncio.create_task(ws_manager.broadcast_to_collaboration(collaboration_id, message, exclude_user))
-    else:
-        # Fallback to sync behavior
-        logger.warning("Event loop not running, cannot broadcast WebSocket message")
+    await ws_manager.send_to_user(user_id, {
+        'type': 'chat_message_sent',
+        'message': message_text,
+        'timestamp': message_data.get('timestamp')
+    })
 
 
-# Monkey patch the connection manager to use WebSockets
-connection_manager._broadcast_to_collaboration = _broadcast_with_websockets
+async def _handle_unknown(collaboration_id: str, user_id: str, message_data: Dict):
+    """Reject a message type the endpoint doesn't know."""
+    await ws_manager.send_to_user(user_id, {
+        'type': 'error',
+        'message': f"Unknown message type: {message_data.get('type')}"
+    })
+
+
+MessageHandler = Callable[[str, str, Dict], Awaitable[None]]
+
+# Inbound message type -> handler
+MESSAGE_HANDLERS: Dict[str, MessageHandler] = {
+    'ping': _handle_ping,
+    'overlay_update': _handle_overlay_update,
+    'cursor_update': _handle_cursor_update,
+    'chat_message': _handle_chat_message,
+}
 
 
 async def websocket_endpoint(
@@ -131,6 +404,10 @@ async def websocket_endpoint(
         - cursor_update: Update cursor position
         - chat_message: Send chat message
         - ping: Keep-alive heartbeat
+    
+    Overlay and cursor updates are coalesced and broadcast every
+    COALESCE_INTERVAL_SECONDS as overlay_batch / cursor_batch messages whose
+    "updates" hold the latest overlay_updated / cursor_updated per sender.
     """
     # Authenticate user
     user = await get_current_user_ws(websocket, token)
@@ -143,12 +420,13 @@ async def websocket_endpoint(
         'wallet_address': user.wallet_address
     }
     
-    # Connect to collaboration
-    await ws_manager.connect(websocket, user_id, collaboration_id, user_info)
-    
     try:
+        # Connect to collaboration; inside the try so a failure part-way
+        # through registration is still cleaned up below
+        await ws_manager.connect(websocket, user_id, collaboration_id, user_info)
+        
         # Send initial state
-        await websocket.send_json({
+        await ws_manager.send_to_user(user_id, {
             'type': 'connected',
             'collaboration_id': collaboration_id,
             'user_id': user_id,
@@ -156,72 +434,39 @@ async def websocket_endpoint(
             'recent_activity': connection_manager.get_recent_activity(collaboration_id, limit=20)
         })
         
+        # Bind what the loop uses on every message to locals once
+        receive = websocket.receive
+        loads = orjson.loads
+        decode_error = orjson.JSONDecodeError
+        update_presence = connection_manager.update_user_presence
+        get_handler = MESSAGE_HANDLERS.get
+        send_frame = ws_manager.send_frame
+        
         # Listen for messages
         while True:
             try:
-                # Receive message
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
+                # Receive message; binary frames skip the server's UTF-8 text
+                # decode, orjson validates the encoding while parsing
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+                data = message.get("bytes") or message.get("text") or b""
+                message_data = loads(data)
                 
                 # Update presence
-                connection_manager.update_user_presence(user_id)
+                update_presence(user_id)
                 
                 # Handle different message types
-                message_type = message_data.get('type')
-                
-                if message_type == 'ping':
-                    # Respond to heartbeat
-                    await websocket.send_json({'type': 'pong'})
-                
-                elif message_type == 'overlay_update':
-                    # Broadcast overlay update
-                    overlay_data = message_data.get('overlay_data', {})
-                    connection_manager.broadcast_overlay_update(
-                        collaboration_id,
-                        user_id,
-                        overlay_data
-                    )
-                
-                elif message_type == 'cursor_update':
-                    # Broadcast cursor position
-                    cursor_data = message_data.get('cursor_data', {})
-                    connection_manager.broadcast_cursor_position(
-                        collaboration_id,
-                        user_id,
-                        cursor_data
-                    )
-                
-                elif message_type == 'chat_message':
-                    # Broadcast chat message
-                    message_text = message_data.get('message', '')
-                    connection_manager.broadcast_chat_message(
-                        collaboration_id,
-                        user_id,
-                        message_text
-                    )
-                    
-                    # Echo back to sender
-                    await websocket.send_json({
-                        'type': 'chat_message_sent',
-                        'message': message_text,
-                        'timestamp': message_data.get('timestamp')
-                    })
-                
-                else:
-                    # Unknown message type
-                    await websocket.send_json({
-                        'type': 'error',
-                        'message': f'Unknown message type: {message_type}'
-                    })
+                handler = get_handler(message_data.get('type'), _handle_unknown)
+                await handler(collaboration_id, user_id, message_data)
             
-            except json.JSONDecodeError:
-                await websocket.send_json({
-                    'type': 'error',
-                    'message': 'Invalid JSON'
-                })
+            except WebSocketDisconnect:
+                raise
+            except decode_error:
+                send_frame(user_id, _INVALID_JSON_FRAME)
             except Exception as e:
                 logger.error(f"Error processing WebSocket message: {e}")
-                await websocket.send_json({
+                await ws_manager.send_to_user(user_id, {
                     'type': 'error',
                     'message': str(e)
                 })
@@ -2,12 +2,19 @@
 from functools import wraps
 from typing import Callable
 
+# Web3 signature verification isn't implemented yet; until it is, decorated
+# functions are returned unwrapped so they cost no extra call frame
+AUTH_ENABLED = False
+
 
 def authenticated(func: Callable) -> Callable:
     """
     Decorator for authenticated endpoints.
     TODO: Implement Web3 signature verification
     """
+    if not AUTH_ENABLED:
+        return func
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         # Placeholder - will be replaced with Web3 auth verification
@@ -17,7 +24,4 @@ def authenticated(func: Callable) -> Callable:
 
 def public(func: Callable) -> Callable:
     """Decorator for public endpoints."""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return func
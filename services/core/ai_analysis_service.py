@@ -1,18 +1,24 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain, count, cycle
+from concurrent.futures import Future, ThreadPoolExecutor
 from uuid import UUID
-import json
-from datetime import datetime
+import orjson
+import re
+from datetime import datetime, timezone
 from core.user import User
 from core.access import authenticated, public
 
 # TODO: Import AI/LLM functionality when available
 from core.videos import Video
 from core.artist_assets import ArtistAsset
+from core.asset_service import get_asset_catalog_version
 import base64
 import cv2
+import httpx
 import numpy as np
-from PIL import Image
-import io
 import time
 from core.computer_vision import (
     normalize_pose_sequence,
@@ -20,7 +26,7 @@ from core.computer_vision import (
     PoseAnalyzer,
     get_pose_analyzer,
     extract_pose_from_video,
-    extract_pose_from_image,
+    extract_pose_from_rgb_image,
 )
 from core.pose_cache import (
     get_video_pose_analysis,
@@ -28,7 +34,120 @@ from core.pose_cache import (
     get_cached_sequence_match,
     cache_sequence_match,
 )
+from core import analysis_cache, pose_kernels
+import hashlib
 import os
+import shutil
+import subprocess
+import threading
+from loguru import logger
+
+# Analyses are reused across workers and restarts for a day
+ANALYSIS_CACHE_TTL_SECONDS = 24 * 3600
+# Recommendation lists are reused while a video is being edited
+RECOMMENDATIONS_CACHE_TTL_SECONDS = 300
+# Videos per batch request; each cache miss is analyzed inline, one after another
+MAX_BULK_ANALYSIS_VIDEOS = 12
+# Bytes hashed from each end of a video to key its overlay analysis
+CONTENT_HASH_SAMPLE_BYTES = 1024 * 1024
+# Per-frame pose landmarks only need to outlive retries and re-runs
+POSE_CACHE_TTL_SECONDS = 3600
+# Longest frame edge analyzed; MediaPipe works at 256px and vision models
+# rescale to ~1024px, so larger frames only cost encoding and upload time
+ANALYSIS_MAX_EDGE = 720
+# ffmpeg seeks straight to each key frame when installed; without it frames
+# are decoded forward with OpenCV
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFPROBE_PATH = shutil.which("ffprobe")
+FFMPEG_TIMEOUT_SECONDS = 30
+# Pose confidences above each threshold step up to the next motion level
+MOTION_CONFIDENCE_THRESHOLDS = (0.5, 0.8)
+MOTION_LEVELS = ("low", "medium", "high")
+
+# Outermost JSON array or object in a model reply wrapped in other text
+_JSON_REPLY_PATTERNS = (re.compile(r"\[[\s\S]*\]"), re.compile(r"\{[\s\S]*\}"))
+
+# Related tags added for a scene type, activity or mood
+TAG_EXPANSIONS = {
+    "outdoor": ("nature", "adventure", "travel"),
+    "indoor": ("cozy", "intimate", "personal"),
+    "dancing": ("music", "rhythm", "movement", "celebration"),
+    "cooking": ("food", "kitchen", "recipe", "lifestyle"),
+    "energetic": ("dynamic", "upbeat", "vibrant"),
+    "calm": ("peaceful", "serene", "relaxing"),
+    "celebration": ("party", "joy", "festive"),
+}
+
+
+# Overlay suggestion lookups by activity, mood and scene type
+_DYNAMIC_ACTIVITIES = frozenset({"dancing", "sports", "exercise"})
+_MOOD_PLACEMENT_STYLES = {
+    "calm": "static_corner",  # Subtle corner placement
+    "serene": "static_corner",
+    "energetic": "center_burst",  # Bold center placement
+    "celebration": "center_burst",
+}
+_RHYTHMIC_ACTIVITIES = frozenset({"dancing", "music"})
+_SPEAKING_ACTIVITIES = frozenset({"talking", "presentation"})
+_PARTY_ACTIVITIES = frozenset({"celebration", "party"})
+_SCALE_RANGES = {
+    "close_up": (0.3, 0.7),  # Smaller overlays for close shots
+    "wide_shot": (0.8, 1.5),  # Larger overlays for wide shots
+}
+_ANIMATION_SPEEDS = {
+    "energetic": "fast",
+    "upbeat": "fast",
+    "calm": "slow",
+    "serene": "slow",
+    "dramatic": "medium",
+    "playful": "fast",
+}
+
+
+@lru_cache(maxsize=512)
+def _content_tags(scene_type: str, activity: str, mood: str) -> Tuple[str, ...]:
+    """Tags for a scene, activity and mood, most specific first.
+
+    The vocabulary is small and fixed, so each combination is expanded once.
+    """
+    tags = [scene_type, activity, mood]
+
+    # Expansions are expanded too, e.g. dancing -> celebration -> party
+    for tag in tags:
+        tags.extend(TAG_EXPANSIONS.get(tag, ()))
+
+    return tuple(dict.fromkeys(tags))  # Remove duplicates, keeping order
+
+
+# (epoch second, its ISO 8601 form) for the last analyzed_at issued
+_last_timestamp: Tuple[int, str] = (0, "")
+
+
+def _analysis_timestamp() -> str:
+    """Current UTC time to the second, formatted once per second."""
+    global _last_timestamp
+    now = int(time.time())
+    second, formatted = _last_timestamp
+    if now != second:
+        formatted = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        _last_timestamp = (now, formatted)
+    return formatted
+
+
+# Vision provider client, shared so frames and videos reuse its connections
+_http_client: Optional[httpx.Client] = None
+
+
+def _get_http_client() -> httpx.Client:
+    """Get the pooled HTTP/2 client used for vision provider calls."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16),
+            timeout=20,
+        )
+    return _http_client
 
 
 class VideoAnalyzer:
@@ -36,194 +155,493 @@ class VideoAnalyzer:
 
     def __init__(self):
         # self.openai = OpenAI()  # TODO: Initialize when available
-        self.analysis_cache = {}  # In production, use Redis
         self.pose_analyzer = get_pose_analyzer()  # Singleton MediaPipe instance
 
     def analyze_video_content(
-        self, video_path: str, video_duration: float, video_id: UUID = None
+        self, video_path: str, video_duration: float, video_id: UUID = None, force: bool = False
     ) -> Dict:
-        """Analyze video content using AI vision models with database caching."""
+        """Analyze video content using AI vision models with database caching.
+
+        force skips the cached analyses and refreshes the shared cache.
+        """
         
         # Handle None duration early
         if video_duration is None:
             video_duration = 30.0  # Default 30 seconds
 
-        # Check database cache first if video_id provided
-        if video_id:
-            try:
-                cached_analysis = get_video_pose_analysis(video_id)
-                if cached_analysis:
-                    print(f"✅ Using cached video analysis for {video_id}")
-                    return self._convert_cached_analysis_to_format(cached_analysis, video_duration)
-            except Exception as e:
-                print(f"Cache lookup failed, proceeding with fresh analysis: {e}")
-
-        # Check memory cache
-        cache_key = f"analysis_{hash(video_path)}_{video_duration}"
-        if cache_key in self.analysis_cache:
-            return self.analysis_cache[cache_key]
+        # Look up the database cache in the background while frames decode;
+        # a stored analysis still takes precedence over everything else
+        db_lookup = None
+        if video_id and not force:
+            lookups = ThreadPoolExecutor(max_workers=1)
+            db_lookup = lookups.submit(self._lookup_cached_analysis, video_id)
+            lookups.shutdown(wait=False)
+
+        # Check the shared analysis cache
+        cache_key = self._analysis_cache_key(video_path, video_duration)
+        cached = None if force else analysis_cache.get_json(cache_key)
+        if cached is not None:
+            return self._stored_analysis(db_lookup, video_duration) or cached
 
         try:
             # Check if video file exists
             if not os.path.exists(video_path):
-                print(f"Video file not found: {video_path}")
-                return self._fallback_analysis(video_duration)
-            
-            # Extract key frames for analysis
-            frames = self._extract_key_frames(video_path, num_frames=3)
-
-            # Analyze each frame with AI and pose detection
-            frame_analyses = []
-            pose_sequences = []
+                logger.debug("Video file not found: {}", video_path)
+                return self._stored_analysis(db_lookup, video_duration) or self._fallback_analysis(video_duration)
 
-            for i, frame in enumerate(frames):
-                timestamp = (i / (len(frames) - 1)) * video_duration
-
-                # Extract pose data from frame
-                pose_landmarks = self._extract_pose_landmarks_from_frame(frame)
-                if pose_landmarks:
-                    pose_sequences.append(pose_landmarks)
-
-                # Enhanced frame analysis with pose data
-                analysis = self._analyze_single_frame(frame, timestamp, pose_landmarks)
-                frame_analyses.append(analysis)
+            # Extract key frames and their pose data, unless the lookup finds
+            # a stored analysis before pose extraction starts
+            frames, frame_poses = self._extract_key_frames_with_poses(
+                video_path, num_frames=3, db_lookup=db_lookup
+            )
+            stored_analysis = self._stored_analysis(db_lookup, video_duration)
+            if stored_analysis:
+                return stored_analysis
+
+            # Normalize every detected pose once, for both the per-frame
+            # heuristics and the video summary
+            normalized_frame_poses = self._normalize_frame_poses(frame_poses)
+
+            # Analyze all frames with AI and pose detection
+            timestamps = [(i / (len(frames) - 1)) * video_duration for i in range(len(frames))]
+            frame_analyses = self._analyze_frames_batched(
+                frames, timestamps, frame_poses, normalized_frame_poses
+            )
+            pose_sequences = [pose_landmarks for pose_landmarks in frame_poses if pose_landmarks]
 
             # Synthesize overall video analysis with pose sequences
             video_analysis = self._synthesize_video_analysis(
-                frame_analyses, video_duration, pose_sequences
+                frame_analyses,
+                video_duration,
+                pose_sequences,
+                normalized_poses=[pose for pose in normalized_frame_poses if pose],
             )
 
             # Cache the result
-            self.analysis_cache[cache_key] = video_analysis
+            analysis_cache.set_json(cache_key, video_analysis, ANALYSIS_CACHE_TTL_SECONDS)
 
             return video_analysis
 
         except Exception as e:
-            print(f"Video analysis failed: {e}")
+            logger.warning("Video analysis failed: {}", e)
             # Fallback to basic analysis if AI fails
             return self._fallback_analysis(video_duration)
 
+    def _lookup_cached_analysis(self, video_id: UUID):
+        """Get the stored pose analysis for a video, or None if there is none."""
+        try:
+            cached_analysis = get_video_pose_analysis(video_id)
+        except Exception as e:
+            logger.debug("Cache lookup failed, proceeding with fresh analysis: {}", e)
+            return None
+
+        if cached_analysis:
+            logger.debug("Using cached video analysis for {}", video_id)
+        return cached_analysis
+
+    def _stored_analysis(self, db_lookup: Optional[Future], video_duration: float) -> Optional[Dict]:
+        """Wait for the database lookup and format its analysis, if it found one."""
+        if db_lookup is None:
+            return None
+
+        cached_analysis = db_lookup.result()
+        if not cached_analysis:
+            return None
+
+        try:
+            return self._convert_cached_analysis_to_format(cached_analysis, video_duration)
+        except Exception as e:
+            logger.debug("Cache lookup failed, proceeding with fresh analysis: {}", e)
+            return None
+
+    @staticmethod
+    def _analysis_cache_key(video_path: str, video_duration: float) -> str:
+        """Cache key that is the same in every process, unlike hash().
+
+        The file's size and mtime are part of the key, so a video replaced
+        under the same path is analyzed again. The duration is separated
+        from the path, so ("/a", 10.0) and ("/a1", 0.0) don't share a key,
+        and taken as a float, so a 30 from the database and a 30.0 default do.
+        """
+        try:
+            stat = os.stat(video_path)
+            version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            version = ""
+        digest = hashlib.blake2b(
+            f"{video_path}\0{float(video_duration)!r}\0{version}".encode(), digest_size=16
+        ).hexdigest()
+        return f"va:{digest}"
+
     def _extract_key_frames(self, video_path: str, num_frames: int = 3) -> List[np.ndarray]:
         """Extract evenly spaced frames from video for analysis."""
 
         frames = []
         try:
-            # Use OpenCV to extract actual frames
-            cap = cv2.VideoCapture(video_path)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            frames.extend(self._iter_key_frames(video_path, num_frames))
+        except Exception as e:
+            logger.debug("Error extracting frames: {}", e)
+            # Fallback: create placeholder frames only if real extraction fails
+            frames.extend(self._placeholder_frames(num_frames))
 
-            if total_frames == 0:
-                cap.release()
-                return []
+        return frames
+
+    def _extract_key_frames_with_poses(
+        self, video_path: str, num_frames: int = 3, db_lookup: Optional[Future] = None
+    ) -> Tuple[List[np.ndarray], List[List[float]]]:
+        """Extract key frames and their pose landmarks.
 
-            # Calculate frame indices to extract evenly spaced frames
-            frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+        The next frame is decoded and converted to RGB on a worker thread
+        while MediaPipe runs on the current one; all of these release the
+        GIL, so the two overlap. Frames cross between the threads by
+        reference. Pose extraction itself stays on this thread, since the
+        shared MediaPipe graph tracks state between frames and is not
+        thread-safe.
 
-            for frame_idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                if ret:
+        If db_lookup is given, it is awaited once the first frame is decoded
+        and nothing is returned when it found a stored analysis, so a cache
+        hit costs no pose extraction.
+        """
+
+        frames = []
+        frame_poses = []
+        frame_iter = self._iter_key_frames(video_path, num_frames)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as decoder:
+                pending = decoder.submit(self._decode_next, frame_iter)
+                while True:
+                    decoded = pending.result()
+                    if decoded is None:
+                        break
+                    if not frames and db_lookup is not None and db_lookup.result():
+                        return [], []
+                    pending = decoder.submit(self._decode_next, frame_iter)
+
+                    frame, rgb_frame = decoded
                     frames.append(frame)
+                    frame_poses.append(self._extract_pose_landmarks_from_frame(rgb_frame))
+        except Exception as e:
+            logger.debug("Error extracting frames: {}", e)
+            if db_lookup is not None and db_lookup.result():
+                return [], []
+            # Fallback: create placeholder frames only if real extraction fails
+            frames.extend(self._placeholder_frames(num_frames))
+            frame_poses.extend(
+                self._extract_pose_landmarks_from_frame(self._to_rgb(frame))
+                for frame in frames[len(frame_poses):]
+            )
+        finally:
+            frame_iter.close()
+
+        return frames, frame_poses
+
+    def _decode_next(
+        self, frame_iter: Iterator[np.ndarray]
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Decode the next key frame along with its RGB version, or None at the end."""
+        frame = next(frame_iter, None)
+        return None if frame is None else (frame, self._to_rgb(frame))
 
+    def _placeholder_frames(self, num_frames: int) -> List[np.ndarray]:
+        """Random frames used when the video cannot be decoded."""
+        return [(np.random.rand(480, 640, 3) * 255).astype(np.uint8) for _ in range(num_frames)]
+
+    def _iter_key_frames(self, video_path: str, num_frames: int = 3) -> Iterator[np.ndarray]:
+        """Decode evenly spaced frames from video, yielding each as it is read.
+
+        Frames are downscaled to ANALYSIS_MAX_EDGE here, on the decoding
+        thread, so pose detection, hashing and JPEG encoding all work on the
+        smaller frame and overlay zones are in its pixel coordinates.
+        """
+
+        probe = self._probe_video(video_path) if FFMPEG_PATH and FFPROBE_PATH else None
+        if probe is not None:
+            yield from self._iter_key_frames_ffmpeg(video_path, num_frames, *probe)
+            return
+
+        # Use OpenCV to extract actual frames
+        cap = cv2.VideoCapture(video_path)
+        try:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+            if total_frames == 0:
+                return
+
+            # Calculate frame indices to extract evenly spaced frames; short
+            # videos can repeat an index
+            frame_indices = Counter(np.linspace(0, total_frames - 1, num_frames, dtype=int).tolist())
+
+            # Decode forward once instead of seeking, since every seek
+            # re-decodes from the previous keyframe. Frames we don't keep are
+            # only grabbed, skipping the conversion to BGR.
+            for frame_idx in range(max(frame_indices) + 1):
+                copies = frame_indices.get(frame_idx)
+                if copies:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frame = self._downscale(frame)
+                    for _ in range(copies):
+                        yield frame
+                elif not cap.grab():
+                    break
+
+        finally:
             cap.release()
 
+    @staticmethod
+    def _probe_video(video_path: str) -> Optional[Tuple[int, int, int, float]]:
+        """(width, height, frame count, fps) of a video's displayed frames, or None
+        when ffprobe can't read it."""
+        try:
+            result = subprocess.run(
+                [FFPROBE_PATH, "-v", "error", "-select_streams", "v:0",
+                 "-show_streams", "-show_format", "-of", "json", video_path],
+                capture_output=True,
+                timeout=FFMPEG_TIMEOUT_SECONDS,
+                check=True,
+            )
+            probe = orjson.loads(result.stdout)
+            stream = probe["streams"][0]
+            width, height = int(stream["width"]), int(stream["height"])
+            numerator, denominator = stream["avg_frame_rate"].split("/")
+            fps = int(numerator) / int(denominator)
+            total_frames = int(
+                stream.get("nb_frames") or round(float(probe["format"]["duration"]) * fps)
+            )
         except Exception as e:
-            print(f"Error extracting frames: {e}")
-            # Fallback: create placeholder frames only if real extraction fails
-            for i in range(num_frames):
-                frame = np.random.rand(480, 640, 3) * 255
-                frames.append(frame.astype(np.uint8))
+            logger.debug("Could not probe {} with ffprobe: {}", video_path, e)
+            return None
 
-        return frames
+        # ffmpeg rotates portrait phone videos upright, swapping the edges
+        rotation = stream.get("tags", {}).get("rotate") or next(
+            (data["rotation"] for data in stream.get("side_data_list", ()) if "rotation" in data), 0
+        )
+        if int(float(rotation)) % 180:
+            width, height = height, width
+        return width, height, total_frames, fps
+
+    def _iter_key_frames_ffmpeg(
+        self, video_path: str, num_frames: int, width: int, height: int, total_frames: int, fps: float
+    ) -> Iterator[np.ndarray]:
+        """Decode evenly spaced frames with a single ffmpeg process.
+
+        The video is opened once per distinct frame, each input seeking to
+        the keyframe before its frame instead of decoding from the start.
+        One frame is kept from each and they are piped out in order, so
+        frames are yielded as soon as each is decoded.
+        """
+
+        if total_frames == 0:
+            return
+
+        frame_indices = Counter(np.linspace(0, total_frames - 1, num_frames, dtype=int).tolist())
+        command = [FFMPEG_PATH, "-v", "error"]
+        for frame_idx in sorted(frame_indices):
+            # Half a frame early, so rounding never lands past the frame
+            command += ["-ss", f"{max(frame_idx - 0.5, 0) / fps:.6f}", "-i", video_path]
+        filters = [f"[{i}:v]trim=end_frame=1,setpts=PTS-STARTPTS[f{i}]" for i in range(len(frame_indices))]
+        inputs = "".join(f"[f{i}]" for i in range(len(frame_indices)))
+        filters.append(f"{inputs}concat=n={len(frame_indices)}:v=1:a=0[out]")
+        command += [
+            "-filter_complex", ";".join(filters), "-map", "[out]",
+            "-fps_mode", "passthrough", "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+        ]
+
+        frame_size = width * height * 3
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        timeout = threading.Timer(FFMPEG_TIMEOUT_SECONDS, process.kill)
+        timeout.start()
+        try:
+            for frame_idx in sorted(frame_indices):
+                buffer = process.stdout.read(frame_size)
+                if len(buffer) != frame_size:
+                    break
+                frame = self._downscale(np.frombuffer(buffer, np.uint8).reshape(height, width, 3))
+                for _ in range(frame_indices[frame_idx]):
+                    yield frame
+        finally:
+            timeout.cancel()
+            process.kill()
+            process.wait()
+            process.stdout.close()
 
     def _analyze_single_frame(
         self, frame: np.ndarray, timestamp: float, pose_landmarks: List[float] = None
     ) -> Dict:
         """Analyze a single video frame using AI vision with pose enhancement."""
+        return self._analyze_frames_batched([frame], [timestamp], [pose_landmarks])[0]
+
+    def _analyze_frames_batched(
+        self,
+        frames: List[np.ndarray],
+        timestamps: List[float],
+        frame_poses: List[List[float]] = None,
+        normalized_poses: List[Optional[List[float]]] = None,
+    ) -> List[Dict]:
+        """Analyze frames with one AI vision request, using pose heuristics for
+        any frame the provider doesn't cover."""
+
+        if frame_poses is None:
+            frame_poses = [None] * len(frames)
+        if normalized_poses is None:
+            normalized_poses = [None] * len(frames)
+
+        provider_analyses = self._request_frame_analyses(frames, timestamps)
+
+        return [
+            provider_analysis
+            if provider_analysis is not None
+            else self._heuristic_frame_analysis(frame, timestamp, pose_landmarks, normalized_pose)
+            for frame, timestamp, pose_landmarks, normalized_pose, provider_analysis in zip(
+                frames, timestamps, frame_poses, normalized_poses, provider_analyses, strict=True
+            )
+        ]
+
+    @staticmethod
+    def _normalize_frame_poses(frame_poses: List[List[float]]) -> List[Optional[List[float]]]:
+        """Normalize each frame's pose, keeping one entry per frame.
+
+        normalize_pose_sequence drops poses it can't normalize, so frames are
+        passed one at a time to keep the result aligned; entries are None
+        where there was no pose or it couldn't be normalized.
+        """
+        return [
+            (normalize_pose_sequence([pose_landmarks]) or [None])[0] if pose_landmarks else None
+            for pose_landmarks in frame_poses
+        ]
+
+    def _request_frame_analyses(
+        self, frames: List[np.ndarray], timestamps: List[float]
+    ) -> List[Optional[Dict]]:
+        """Ask the configured vision provider to analyze frames, one entry per
+        frame; entries are None when no provider is configured or it fails."""
+
+        api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("AI_API_KEY")
+        if not api_key:
+            return [None] * len(frames)
 
         try:
-            # Convert frame to base64 for API
-            frame_pil = Image.fromarray(frame)
-            buffer = io.BytesIO()
-            frame_pil.save(buffer, format="JPEG", quality=85)
-            frame_b64 = base64.b64encode(buffer.getvalue()).decode()
-
-            # Provider-backed analysis when configured; otherwise fallback heuristics
-            import os, json
-
-            api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("AI_API_KEY")
-            model = os.getenv("AI_MODEL", "gpt-4o-mini")
-            provider_url = os.getenv(
-                "AI_PROVIDER_URL", "https://openrouter.ai/api/v1/chat/completions"
-            )
+            analyses = self._post_frame_analyses(frames, timestamps, api_key)
+            if analyses is None and len(frames) > 1:
+                # The batch reply didn't parse as one analysis per frame, so
+                # ask about each frame on its own
+                analyses = [
+                    (self._post_frame_analyses([frame], [timestamp], api_key) or [None])[0]
+                    for frame, timestamp in zip(frames, timestamps, strict=True)
+                ]
+        except Exception:
+            # Provider call failed; fall through to heuristics
+            analyses = None
+
+        return analyses or [None] * len(frames)
+
+    def _post_frame_analyses(
+        self, frames: List[np.ndarray], timestamps: List[float], api_key: str
+    ) -> Optional[List[Dict]]:
+        """Send frames to the vision provider in a single request.
+
+        Returns None when the reply isn't one JSON analysis per frame, and
+        raises when the request itself fails.
+        """
+        model = os.getenv("AI_MODEL", "gpt-4o-mini")
+        provider_url = os.getenv(
+            "AI_PROVIDER_URL", "https://openrouter.ai/api/v1/chat/completions"
+        )
 
-            if api_key:
-                import httpx, re
-
-                payload = {
-                    "model": model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You analyze a single video frame and return JSON with fields: scene_type, activity, mood, objects[], people_count, motion_level, color_palette[], overlay_zones{safe_areas[[x,y,w,h]...], avoid_areas[[x,y,w,h]...]}. Keep responses concise.",
-                        },
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": f"Analyze this frame at timestamp {round(timestamp, 2)} seconds. Return ONLY JSON.",
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}"},
-                                },
-                            ],
-                        },
-                    ],
-                    "temperature": 0.2,
-                }
-                headers = {
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
+        frame_times = ", ".join(str(round(timestamp, 2)) for timestamp in timestamps)
+        content = [
+            {
+                "type": "text",
+                "text": f"Analyze these {len(frames)} frame(s) at timestamps {frame_times} seconds, in that order. Return ONLY a JSON array.",
+            }
+        ]
+        for frame in frames:
+            # Convert frame to base64 for API; imencode reads the BGR frame
+            # as decoded, where PIL would have swapped red and blue
+            ok, jpeg = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+            if not ok:
+                raise ValueError("Could not encode frame as JPEG")
+            frame_b64 = base64.b64encode(jpeg).decode()
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{frame_b64}"},
                 }
+            )
+
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You analyze video frames and return a JSON array with one object per frame, in the order given. Each object has fields: scene_type, activity, mood, objects[], people_count, motion_level, color_palette[], overlay_zones{safe_areas[[x,y,w,h]...], avoid_areas[[x,y,w,h]...]}. Keep responses concise.",
+                },
+                {"role": "user", "content": content},
+            ],
+            "temperature": 0.2,
+        }
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        resp = _get_http_client().post(provider_url, headers=headers, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
+
+        reply = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        parsed = self._parse_json_reply(reply)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        if (
+            not isinstance(parsed, list)
+            or len(parsed) != len(frames)
+            or not all(isinstance(analysis, dict) for analysis in parsed)
+        ):
+            return None
+
+        for analysis, timestamp in zip(parsed, timestamps, strict=True):
+            analysis["timestamp"] = timestamp
+        return parsed
+
+    @staticmethod
+    def _parse_json_reply(reply: str):
+        """Parse the JSON in a model reply, tolerating text around it."""
+        try:
+            return orjson.loads(reply)
+        except Exception:
+            pass
+
+        for pattern in _JSON_REPLY_PATTERNS:
+            m = pattern.search(reply)
+            if m:
                 try:
-                    with httpx.Client(timeout=20) as client:
-                        resp = client.post(provider_url, headers=headers, json=payload)
-                        if resp.status_code == 200:
-                            data = resp.json()
-                            content = (
-                                data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                            )
-                            # Parse JSON from content
-                            try:
-                                parsed = json.loads(content)
-                                parsed["timestamp"] = timestamp
-                                return parsed
-                            except Exception:
-                                m = re.search(r"\{[\s\S]*\}", content)
-                                if m:
-                                    parsed = json.loads(m.group(0))
-                                    parsed["timestamp"] = timestamp
-                                    return parsed
+                    return orjson.loads(m.group(0))
                 except Exception:
-                    # Provider call failed; fall through to heuristics
-                    pass
+                    continue
+        return None
+
+    def _heuristic_frame_analysis(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        pose_landmarks: List[float] = None,
+        normalized_pose: List[float] = None,
+    ) -> Dict:
+        """Analyze a frame from its pose data alone."""
 
-            # Heuristic fallback if provider is not configured or fails
+        try:
             # Enhanced analysis with pose data
             pose_confidence = (
                 self._calculate_pose_confidence(pose_landmarks) if pose_landmarks else 0.0
             )
+            if pose_landmarks and normalized_pose is None:
+                normalized_pose = normalize_pose_sequence([pose_landmarks])[0]
             movement_type = (
-                self._classify_pose_movement(normalize_pose_sequence([pose_landmarks])[0])
-                if pose_landmarks
-                else "unknown"
+                self._classify_pose_movement(normalized_pose) if pose_landmarks else "unknown"
             )
             stable_regions = (
-                self._identify_stable_body_regions(normalize_pose_sequence([pose_landmarks])[0])
-                if pose_landmarks
-                else []
+                self._identify_stable_body_regions(normalized_pose) if pose_landmarks else []
             )
 
             analysis = {
@@ -250,7 +668,7 @@ class VideoAnalyzer:
             return analysis
 
         except Exception as e:
-            # Fallback analysis if AI fails
+            # Fallback analysis if the heuristics fail
             return {
                 "timestamp": timestamp,
                 "scene_type": "unknown",
@@ -269,18 +687,50 @@ class VideoAnalyzer:
                 "error": str(e),
             }
 
-    def _extract_pose_landmarks_from_frame(self, frame: np.ndarray) -> List[float]:
-        """Extract pose landmarks from a frame using MediaPipe."""
-        return extract_pose_from_image(frame)
+    @staticmethod
+    def _downscale(frame: np.ndarray) -> np.ndarray:
+        """Shrink a frame so its longest edge is at most ANALYSIS_MAX_EDGE."""
+        scale = ANALYSIS_MAX_EDGE / max(frame.shape[:2])
+        if scale >= 1:
+            return frame
+        return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def _to_rgb(frame: np.ndarray) -> np.ndarray:
+        """Convert a decoded BGR frame to the read-only RGB array MediaPipe takes.
+
+        The BGR frame is kept for JPEG encoding, which expects OpenCV's order.
+        """
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False
+        return rgb_frame
+
+    def _extract_pose_landmarks_from_frame(self, rgb_frame: np.ndarray) -> List[float]:
+        """Extract pose landmarks from an RGB frame using MediaPipe, cached by frame content."""
+        # Hash the pixel buffer in place rather than copying it with tobytes()
+        hasher = hashlib.blake2b(str(rgb_frame.shape).encode(), digest_size=16)
+        hasher.update(np.ascontiguousarray(rgb_frame))
+        cache_key = f"pose:{hasher.hexdigest()}"
+
+        cached = analysis_cache.get_bytes(cache_key)
+        if cached is not None:
+            return np.frombuffer(cached, dtype=np.float32).tolist()
+
+        pose_landmarks = extract_pose_from_rgb_image(rgb_frame)
+        # MediaPipe landmarks are float32, so this packing is lossless; an
+        # empty value records that no person was found
+        analysis_cache.set_bytes(
+            cache_key, np.asarray(pose_landmarks, dtype=np.float32).tobytes(), POSE_CACHE_TTL_SECONDS
+        )
+        return pose_landmarks
 
     def _calculate_pose_confidence(self, pose_landmarks: List[float]) -> float:
         """Calculate overall confidence of pose detection."""
         if not pose_landmarks or len(pose_landmarks) < 28:
             return 0.0
 
-        # Extract confidence values (every 4th value starting from index 3)
-        confidences = [pose_landmarks[i] for i in range(3, len(pose_landmarks), 4)]
-        return sum(confidences) / len(confidences) if confidences else 0.0
+        # Mean of the visibility values (every 4th value starting from index 3)
+        return float(pose_kernels.pose_confidence(np.asarray(pose_landmarks, dtype=np.float64)))
 
     def _classify_pose_movement(self, normalized_pose: List[float]) -> str:
         """Classify the type of movement from normalized pose."""
@@ -290,15 +740,9 @@ class VideoAnalyzer:
         # Simple movement classification based on pose data
         # In reality, this would be more sophisticated
         try:
-            # Calculate spread of limbs (rough measure of activity level)
-            limb_spread = sum(abs(val) for val in normalized_pose[6:14])  # Arms data
-
-            if limb_spread > 3.0:
-                return "high_activity"
-            elif limb_spread > 1.5:
-                return "moderate_activity"
-            else:
-                return "low_activity"
+            # Spread of the arm coordinates (rough measure of activity level)
+            movement = pose_kernels.classify_movement(np.asarray(normalized_pose, dtype=np.float64))
+            return pose_kernels.MOVEMENT_TYPES[movement]
         except:
             return "unknown"
 
@@ -309,14 +753,11 @@ class VideoAnalyzer:
 
         stable_regions = []
         try:
-            # Check torso stability (shoulders and hips)
-            torso_variation = abs(normalized_pose[2] - normalized_pose[4])  # Shoulder x difference
-            if torso_variation < 0.5:
+            # Torso (shoulder x difference) and head (nose y position) stability
+            regions = pose_kernels.stable_regions(np.asarray(normalized_pose, dtype=np.float64))
+            if regions & pose_kernels.TORSO_REGION:
                 stable_regions.append("torso")
-
-            # Check head stability
-            head_y = normalized_pose[1]  # Nose y position
-            if abs(head_y) < 0.3:  # Close to center
+            if regions & pose_kernels.HEAD_REGION:
                 stable_regions.append("head_area")
 
         except:
@@ -334,10 +775,9 @@ class VideoAnalyzer:
         try:
             # Convert normalized coordinates back to pixel coordinates
             # Assuming shoulder width normalization, estimate full body bbox
-            min_x = min(normalized_pose[i] for i in range(0, 22, 2))  # All x coordinates
-            max_x = max(normalized_pose[i] for i in range(0, 22, 2))
-            min_y = min(normalized_pose[i] for i in range(1, 22, 2))  # All y coordinates
-            max_y = max(normalized_pose[i] for i in range(1, 22, 2))
+            points = np.asarray(normalized_pose[:22], dtype=np.float64).reshape(-1, 2)
+            min_x, min_y = points.min(axis=0)  # 11 (x, y) pairs
+            max_x, max_y = points.max(axis=0)
 
             # Add padding and convert to pixel coordinates
             padding = 0.1
@@ -355,7 +795,7 @@ class VideoAnalyzer:
             return [bbox_x, bbox_y, bbox_w, bbox_h]
 
         except Exception as e:
-            print(f"Bbox estimation error: {e}")
+            logger.debug("Bbox estimation error: {}", e)
             return [width // 4, height // 4, width // 2, height // 2]
 
     def _calculate_motion_level(self, pose_analysis: Dict) -> float:
@@ -424,50 +864,41 @@ class VideoAnalyzer:
                 "avoid_areas": [[200, 150, 240, 180]],
             }
 
-        # Extract key landmark positions
-        coordinates = []
-        for i in range(0, 28, 4):
-            x, y = pose_landmarks[i] * width, pose_landmarks[i + 1] * height
-            coordinates.append((x, y))
+        # Key landmark positions: 7 landmarks of (x, y, z, visibility)
+        landmarks = np.asarray(pose_landmarks[:28], dtype=np.float64).reshape(-1, 4)
+        xs = landmarks[:, 0] * width
+        ys = landmarks[:, 1] * height
 
         # Calculate person bounding box
-        if coordinates:
-            min_x = min(coord[0] for coord in coordinates)
-            max_x = max(coord[0] for coord in coordinates)
-            min_y = min(coord[1] for coord in coordinates)
-            max_y = max(coord[1] for coord in coordinates)
-
-            # Define avoid areas around person
-            person_padding = 50
-            avoid_areas = [
-                [
-                    max(0, int(min_x - person_padding)),
-                    max(0, int(min_y - person_padding)),
-                    min(width, int(max_x - min_x + 2 * person_padding)),
-                    min(height, int(max_y - min_y + 2 * person_padding)),
-                ]
+        min_x, max_x = float(xs.min()), float(xs.max())
+        min_y, max_y = float(ys.min()), float(ys.max())
+
+        # Define avoid areas around person
+        person_padding = 50
+        avoid_areas = [
+            [
+                max(0, int(min_x - person_padding)),
+                max(0, int(min_y - person_padding)),
+                min(width, int(max_x - min_x + 2 * person_padding)),
+                min(height, int(max_y - min_y + 2 * person_padding)),
             ]
+        ]
 
-            # Define safe areas outside person region
-            safe_areas = []
-            # Top area
-            if min_y > 100:
-                safe_areas.append([0, 0, width, int(min_y - 20)])
-            # Right area
-            if width - max_x > 100:
-                safe_areas.append([int(max_x + 20), 0, width - int(max_x + 20), height])
-            # Bottom area
-            if height - max_y > 100:
-                safe_areas.append([0, int(max_y + 20), width, height - int(max_y + 20)])
-
-            return {
-                "safe_areas": safe_areas,
-                "avoid_areas": avoid_areas,
-            }
+        # Define safe areas outside person region
+        safe_areas = []
+        # Top area
+        if min_y > 100:
+            safe_areas.append([0, 0, width, int(min_y - 20)])
+        # Right area
+        if width - max_x > 100:
+            safe_areas.append([int(max_x + 20), 0, width - int(max_x + 20), height])
+        # Bottom area
+        if height - max_y > 100:
+            safe_areas.append([0, int(max_y + 20), width, height - int(max_y + 20)])
 
         return {
-            "safe_areas": [[50, 50, 200, 100], [400, 300, 150, 80]],
-            "avoid_areas": [[200, 150, 240, 180]],
+            "safe_areas": safe_areas,
+            "avoid_areas": avoid_areas,
         }
 
     def _motion_level_from_movement(self, movement_type: str) -> str:
@@ -482,38 +913,42 @@ class VideoAnalyzer:
             return "medium"
 
     def _synthesize_video_analysis(
-        self, frame_analyses: List[Dict], duration: float, pose_sequences: List[List[float]] = None
+        self,
+        frame_analyses: List[Dict],
+        duration: float,
+        pose_sequences: List[List[float]] = None,
+        normalized_poses: List[List[float]] = None,
     ) -> Dict:
         """Combine frame analyses into overall video understanding."""
 
+        frame_count = len(frame_analyses)
+
         # Extract common themes
         scene_types = [f.get("scene_type", "unknown") for f in frame_analyses]
         activities = [f.get("activity", "general") for f in frame_analyses]
         moods = [f.get("mood", "neutral") for f in frame_analyses]
         motion_levels = [f.get("motion_level", "medium") for f in frame_analyses]
 
-        # Find most common values
-        dominant_scene = max(set(scene_types), key=scene_types.count)
-        dominant_activity = max(set(activities), key=activities.count)
-        dominant_mood = max(set(moods), key=moods.count)
-        dominant_motion = max(set(motion_levels), key=motion_levels.count)
+        # Find most common values; ties go to the earliest frame
+        dominant_scene = self._most_common(scene_types, "unknown")
+        dominant_activity = self._most_common(activities, "general")
+        dominant_mood = self._most_common(moods, "neutral")
+        dominant_motion = self._most_common(motion_levels, "medium")
 
-        # Collect all objects and colors
-        all_objects = []
-        all_colors = []
-        for frame in frame_analyses:
-            all_objects.extend(frame.get("objects", []))
-            all_colors.extend(frame.get("color_palette", []))
+        # Unique objects and colors, in the order first seen
+        objects = dict.fromkeys(chain.from_iterable(f.get("objects", []) for f in frame_analyses))
+        colors = dict.fromkeys(chain.from_iterable(f.get("color_palette", []) for f in frame_analyses))
 
         # Calculate average people count
         people_counts = [f.get("people_count", 0) for f in frame_analyses]
-        avg_people = sum(people_counts) / len(people_counts) if people_counts else 0
+        avg_people = sum(people_counts) / frame_count if frame_count else 0
 
         # Determine video complexity
         complexity = self._calculate_complexity(frame_analyses, duration)
 
         # Enhanced analysis with pose data
-        normalized_poses = normalize_pose_sequence(pose_sequences) if pose_sequences else []
+        if normalized_poses is None:
+            normalized_poses = normalize_pose_sequence(pose_sequences) if pose_sequences else []
 
         return {
             "video_id": None,  # Will be set by caller
@@ -522,8 +957,8 @@ class VideoAnalyzer:
             "primary_activity": dominant_activity,
             "mood": dominant_mood,
             "motion_level": dominant_motion,
-            "objects": list(set(all_objects)),  # Unique objects
-            "color_palette": list(set(all_colors)),  # Unique colors
+            "objects": list(objects),
+            "color_palette": list(colors),
             "people_count": round(avg_people),
             "complexity_score": complexity,
             "frame_analyses": frame_analyses,
@@ -531,68 +966,52 @@ class VideoAnalyzer:
             "pose_analysis_summary": {
                 "total_pose_frames": len(normalized_poses),
                 "avg_confidence": sum(f.get("pose_confidence", 0) for f in frame_analyses)
-                / len(frame_analyses)
-                if frame_analyses
+                / frame_count
+                if frame_count
                 else 0,
                 "movement_patterns": list(
-                    set(f.get("activity", "unknown") for f in frame_analyses)
+                    dict.fromkeys(f.get("activity", "unknown") for f in frame_analyses)
                 ),
             },
-            "analyzed_at": datetime.now().isoformat(),
+            "analyzed_at": _analysis_timestamp(),
             "tags": self._generate_content_tags(dominant_scene, dominant_activity, dominant_mood),
             "overlay_recommendations": self._generate_overlay_suggestions(
                 dominant_scene, dominant_activity, dominant_mood, duration
             ),
         }
 
+    @staticmethod
+    def _most_common(values: List[str], default: str) -> str:
+        """Most frequent value, or default when there are none."""
+        return Counter(values).most_common(1)[0][0] if values else default
+
     def _calculate_complexity(self, frame_analyses: List[Dict], duration: float) -> float:
         """Calculate video complexity score (0-1) for overlay recommendation."""
 
-        factors = {"motion": 0, "objects": 0, "people": 0, "duration": 0}
-
-        # Motion complexity
-        motion_levels = [f.get("motion_level", "medium") for f in frame_analyses]
-        high_motion_count = motion_levels.count("high")
-        factors["motion"] = high_motion_count / len(motion_levels)
-
-        # Object complexity
-        avg_objects = sum(len(f.get("objects", [])) for f in frame_analyses) / len(frame_analyses)
-        factors["objects"] = min(avg_objects / 10, 1.0)  # Normalize to 0-1
-
-        # People complexity
-        avg_people = sum(f.get("people_count", 0) for f in frame_analyses) / len(frame_analyses)
-        factors["people"] = min(avg_people / 5, 1.0)  # Normalize to 0-1
-
-        # Duration complexity (longer videos are harder to overlay)
-        factors["duration"] = min(duration / 30, 1.0)  # Normalize to 0-1 for 30s max
-
-        # Weighted average
-        weights = {"motion": 0.3, "objects": 0.3, "people": 0.2, "duration": 0.2}
-        complexity = sum(factors[key] * weights[key] for key in factors)
+        frame_count = len(frame_analyses)
+
+        # Count high-motion frames, objects and people in one pass
+        high_motion_count = object_count = people_count = 0
+        for f in frame_analyses:
+            high_motion_count += f.get("motion_level", "medium") == "high"
+            object_count += len(f.get("objects", []))
+            people_count += f.get("people_count", 0)
+
+        # Weighted average of motion, object and people complexity, each
+        # normalized to 0-1, and duration (longer videos are harder to
+        # overlay; 30s and up count fully)
+        complexity = (
+            high_motion_count / frame_count * 0.3
+            + min(object_count / frame_count / 10, 1.0) * 0.3
+            + min(people_count / frame_count / 5, 1.0) * 0.2
+            + min(duration / 30, 1.0) * 0.2
+        )
 
         return round(complexity, 3)
 
     def _generate_content_tags(self, scene_type: str, activity: str, mood: str) -> List[str]:
         """Generate searchable tags for content matching."""
-
-        tags = [scene_type, activity, mood]
-
-        # Add related tags
-        tag_expansions = {
-            "outdoor": ["nature", "adventure", "travel"],
-            "indoor": ["cozy", "intimate", "personal"],
-            "dancing": ["music", "rhythm", "movement", "celebration"],
-            "cooking": ["food", "kitchen", "recipe", "lifestyle"],
-            "energetic": ["dynamic", "upbeat", "vibrant"],
-            "calm": ["peaceful", "serene", "relaxing"],
-            "celebration": ["party", "joy", "festive"],
-        }
-
-        for tag in tags:
-            if tag in tag_expansions:
-                tags.extend(tag_expansions[tag])
-
-        return list(set(tags))  # Remove duplicates
+        return list(_content_tags(scene_type, activity, mood))
 
     def _generate_overlay_suggestions(
         self, scene_type: str, activity: str, mood: str, duration: float
@@ -610,25 +1029,20 @@ class VideoAnalyzer:
     def _get_placement_style(self, activity: str, mood: str) -> str:
         """Determine optimal overlay placement style."""
 
-        if activity in ["dancing", "sports", "exercise"]:
+        if activity in _DYNAMIC_ACTIVITIES:
             return "dynamic_follow"  # Follow movement
-        elif mood in ["calm", "serene"]:
-            return "static_corner"  # Subtle corner placement
-        elif mood in ["energetic", "celebration"]:
-            return "center_burst"  # Bold center placement
-        else:
-            return "balanced_edge"  # Safe edge placement
+        return _MOOD_PLACEMENT_STYLES.get(mood, "balanced_edge")  # Safe edge placement by default
 
     def _get_timing_pattern(self, activity: str, duration: float) -> Dict:
         """Determine optimal overlay timing."""
 
-        if activity in ["dancing", "music"]:
+        if activity in _RHYTHMIC_ACTIVITIES:
             return {
                 "pattern": "rhythmic",
                 "intervals": [0.5, 1.0, 1.5],  # Beat-based timing
                 "duration_per_overlay": min(2.0, duration / 3),
             }
-        elif activity in ["talking", "presentation"]:
+        elif activity in _SPEAKING_ACTIVITIES:
             return {
                 "pattern": "emphasis",
                 "intervals": [duration * 0.2, duration * 0.7],  # Key moments
@@ -644,37 +1058,130 @@ class VideoAnalyzer:
     def _get_scale_range(self, scene_type: str) -> Tuple[float, float]:
         """Determine appropriate overlay scale range."""
 
-        if scene_type == "close_up":
-            return (0.3, 0.7)  # Smaller overlays for close shots
-        elif scene_type == "wide_shot":
-            return (0.8, 1.5)  # Larger overlays for wide shots
-        else:
-            return (0.5, 1.0)  # Default range
+        return _SCALE_RANGES.get(scene_type, (0.5, 1.0))
 
     def _get_animation_speed(self, mood: str) -> str:
         """Determine overlay animation speed based on mood."""
 
-        speed_map = {
-            "energetic": "fast",
-            "upbeat": "fast",
-            "calm": "slow",
-            "serene": "slow",
-            "dramatic": "medium",
-            "playful": "fast",
-        }
-
-        return speed_map.get(mood, "medium")
+        return _ANIMATION_SPEEDS.get(mood, "medium")
 
     def _get_layer_suggestions(self, activity: str) -> Dict:
         """Suggest optimal layer count and arrangement."""
 
-        if activity in ["celebration", "party"]:
+        if activity in _PARTY_ACTIVITIES:
             return {"max_layers": 3, "arrangement": "scattered", "priority": "background_fill"}
-        elif activity in ["talking", "presentation"]:
+        elif activity in _SPEAKING_ACTIVITIES:
             return {"max_layers": 1, "arrangement": "single_accent", "priority": "emphasis"}
         else:
             return {"max_layers": 2, "arrangement": "balanced", "priority": "enhancement"}
 
+    def _convert_cached_analysis_to_format(self, cached_analysis, video_duration: float) -> Dict:
+        """Convert cached pose analysis to expected analysis format.
+
+        Everything but the duration-dependent fields is converted once per
+        stored analysis and kept in the shared cache. Re-processing a video
+        upserts its row under the same id, so the key also carries the
+        columns each write refreshes.
+        """
+        try:
+            cache_key = (
+                f"vpa:{cached_analysis.id}:{cached_analysis.frame_count}:"
+                f"{cached_analysis.confidence_avg!r}:{cached_analysis.processing_time_ms}"
+            )
+            converted = analysis_cache.get_json(cache_key)
+            if converted is None:
+                converted = self._convert_cached_analysis(cached_analysis)
+                analysis_cache.set_json(cache_key, converted, ANALYSIS_CACHE_TTL_SECONDS)
+
+            converted["duration"] = video_duration
+            converted["overlay_recommendations"] = self._generate_overlay_suggestions(
+                "person", "movement", "neutral", video_duration
+            )
+            return converted
+        except Exception as e:
+            logger.debug("Error converting cached analysis: {}", e)
+            # Return minimal analysis if conversion fails
+            return self._fallback_analysis(video_duration)
+
+    def _convert_cached_analysis(self, cached_analysis) -> Dict:
+        """Convert the parts of a cached pose analysis that don't depend on the video duration."""
+        pose_sequences = cached_analysis.pose_sequences.get("sequences", [])
+        normalized_poses = cached_analysis.normalized_poses.get("normalized", [])
+        movement_analysis = cached_analysis.movement_analysis or {}
+
+        return {
+            "video_id": str(cached_analysis.video_id),
+            "scene_type": "person" if pose_sequences else "general",
+            "primary_activity": movement_analysis.get("movement_type", "unknown"),
+            "mood": "neutral",
+            "motion_level": self._determine_motion_level_from_confidence(
+                cached_analysis.confidence_avg
+            ),
+            "objects": ["person"] if pose_sequences else ["background"],
+            "color_palette": ["blue", "white"],
+            "people_count": 1 if pose_sequences else 0,
+            "complexity_score": min(cached_analysis.frame_count / 30.0, 1.0),
+            "frame_analyses": self._generate_frame_analyses_from_cache(pose_sequences),
+            "pose_sequences": normalized_poses,
+            "pose_analysis_summary": {
+                "total_pose_frames": cached_analysis.frame_count,
+                "avg_confidence": float(cached_analysis.confidence_avg),
+                "processing_time_ms": cached_analysis.processing_time_ms,
+                "cached_result": True,
+            },
+            "analyzed_at": cached_analysis.created_at.isoformat(),
+            "tags": self._generate_content_tags("person", "movement", "neutral"),
+            "cached": True,
+        }
+
+    def _determine_motion_level_from_confidence(self, confidence: float) -> str:
+        """Determine motion level from pose confidence."""
+        return MOTION_LEVELS[bisect_left(MOTION_CONFIDENCE_THRESHOLDS, confidence)]
+
+    def _generate_frame_analyses_from_cache(self, pose_sequences: List[List[float]]) -> List[Dict]:
+        """Generate frame analyses from cached pose sequences."""
+        frames = pose_sequences[:3]  # Limit to 3 frames for consistency
+        confidences = self._calculate_pose_confidences(frames)
+        has_person = confidences > 0.5
+        is_moving = confidences > 0.6
+        motion_levels = np.take(
+            MOTION_LEVELS, np.searchsorted(MOTION_CONFIDENCE_THRESHOLDS, confidences)
+        )
+
+        return [
+            {
+                "timestamp": i * 2.0,  # Assume 2-second intervals
+                "scene_type": "person" if person else "general",
+                "activity": "movement" if moving else "static",
+                "mood": "neutral",
+                "objects": ["person"] if person else [],
+                "people_count": 1 if person else 0,
+                "motion_level": motion_level,
+                "pose_confidence": confidence,
+                "cached_frame": True,
+            }
+            for i, (confidence, person, moving, motion_level) in enumerate(
+                zip(
+                    confidences.tolist(),
+                    has_person.tolist(),
+                    is_moving.tolist(),
+                    motion_levels.tolist(),
+                    strict=True,
+                )
+            )
+        ]
+
+    def _calculate_pose_confidences(self, pose_sequences: List[List[float]]) -> np.ndarray:
+        """Pose confidence of every frame, as _calculate_pose_confidence gives for each."""
+        lengths = {len(pose) for pose in pose_sequences}
+        if len(lengths) == 1 and lengths.pop() >= 28:
+            # All frames have the same landmarks, so take every mean at once
+            return np.asarray(pose_sequences, dtype=np.float64)[:, 3::4].mean(axis=1)
+
+        return np.array(
+            [self._calculate_pose_confidence(pose) for pose in pose_sequences], dtype=np.float64
+        )
+
     def _fallback_analysis(self, duration: float) -> Dict:
         """Provide basic analysis when AI processing fails."""
         
@@ -694,7 +1201,7 @@ class VideoAnalyzer:
             "people_count": 1,
             "complexity_score": 0.5,
             "frame_analyses": [],
-            "analyzed_at": datetime.now().isoformat(),
+            "analyzed_at": _analysis_timestamp(),
             "tags": ["general", "neutral", "standard"],
             "overlay_recommendations": {
                 "placement_style": "balanced_edge",
@@ -730,12 +1237,46 @@ def _get_local_file_path(url_path: str) -> str:
     return local_file_path
 
 
+def _video_content_key(video_id: UUID, video_path: str, video_duration: float) -> Optional[str]:
+    """Cache key for a video's overlay analysis, or None if the file can't be read.
+
+    Hashes the file size and its first and last CONTENT_HASH_SAMPLE_BYTES,
+    so a re-uploaded video gets a new key without reading the whole file.
+    The hash is reused while the file's size and mtime are unchanged, so a
+    cache hit costs a stat rather than a read.
+    """
+    try:
+        stat = os.stat(video_path)
+        return _hashed_content_key(
+            str(video_id), video_path, video_duration, stat.st_size, stat.st_mtime_ns
+        )
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _hashed_content_key(
+    video_id: str, video_path: str, video_duration: float, size: int, mtime_ns: int
+) -> str:
+    with open(video_path, "rb") as f:
+        digest = hashlib.sha256(f"{video_id}:{size}:{video_duration}".encode())
+        digest.update(f.read(CONTENT_HASH_SAMPLE_BYTES))
+        if size > CONTENT_HASH_SAMPLE_BYTES:
+            f.seek(max(CONTENT_HASH_SAMPLE_BYTES, size - CONTENT_HASH_SAMPLE_BYTES))
+            digest.update(f.read())
+    return f"ai_analysis:{digest.hexdigest()}"
+
+
 # Service functions for integration with existing system
 
 
 @authenticated
-def analyze_video_for_overlays(user: User, video_id: UUID) -> Dict:
-    """Analyze a video and return AI-powered overlay recommendations."""
+def analyze_video_for_overlays(user: User, video_id: UUID, force: bool = False) -> Dict:
+    """Analyze a video and return AI-powered overlay recommendations.
+
+    Analyses are cached by file content, so repeat requests for an unchanged
+    video skip the AI pipeline. force re-analyzes the video.
+    """
 
     # Get video details
     videos_data = Video.sql(
@@ -747,268 +1288,408 @@ def analyze_video_for_overlays(user: User, video_id: UUID) -> Dict:
         raise ValueError("Video not found or access denied")
 
     video = Video(**videos_data[0])
+    local_file_path, duration = _video_analysis_input(video)
+
+    cache_key = _video_content_key(video.id, local_file_path, duration)
+    if cache_key and not force:
+        cached = analysis_cache.get_json(cache_key)
+        if cached is not None:
+            cached["video_id"] = str(video_id)
+            return cached
+
+    return _run_overlay_analysis(video, cache_key, force)
+
+
+@authenticated
+def analyze_videos_for_overlays_bulk(user: User, video_ids: List[UUID]) -> Dict[str, Dict]:
+    """Analyze several of a user's videos, keyed by video id.
+
+    The videos are fetched in one query and their cached analyses in one
+    cache round trip; only videos without a cached analysis are analyzed,
+    so at most MAX_BULK_ANALYSIS_VIDEOS are accepted per call. Videos that
+    don't exist or belong to someone else are left out.
+    """
+
+    if len(video_ids) > MAX_BULK_ANALYSIS_VIDEOS:
+        raise ValueError(f"At most {MAX_BULK_ANALYSIS_VIDEOS} videos can be analyzed at once")
+
+    videos_data = Video.sql(
+        "SELECT * FROM videos WHERE id = ANY(%(video_ids)s) AND user_id = %(user_id)s",
+        {"video_ids": list(video_ids), "user_id": user.id},
+    )
+    videos = [Video(**video_data) for video_data in videos_data]
+    cache_keys = [_video_content_key(video.id, *_video_analysis_input(video)) for video in videos]
+    cached = analysis_cache.get_json_many([key for key in cache_keys if key])
+
+    analyses = {}
+    for video, cache_key in zip(videos, cache_keys, strict=True):
+        if cache_key in cached:
+            analysis = cached[cache_key]
+            analysis["video_id"] = str(video.id)
+        else:
+            analysis = _run_overlay_analysis(video, cache_key)
+        analyses[str(video.id)] = analysis
+
+    return analyses
+
+
+def _video_analysis_input(video: Video) -> Tuple[str, float]:
+    """Local file path and duration to analyze a video with."""
 
     # Convert URL path to local file path for AI analysis
     local_file_path = _get_local_file_path(video.file_path)
-    
+
     # Handle None duration with fallback
     duration = video.duration if video.duration is not None else 30.0
-    
+
+    return local_file_path, duration
+
+
+# Shared by every request; it only holds the PoseAnalyzer singleton
+_video_analyzer_instance = None
+
+
+def get_video_analyzer() -> VideoAnalyzer:
+    """Get the shared VideoAnalyzer instance."""
+    global _video_analyzer_instance
+    if _video_analyzer_instance is None:
+        _video_analyzer_instance = VideoAnalyzer()
+    return _video_analyzer_instance
+
+
+def _run_overlay_analysis(video: Video, cache_key: Optional[str], force: bool = False) -> Dict:
+    """Run the AI analysis for a video and cache it under its content key."""
+
+    local_file_path, duration = _video_analysis_input(video)
+
     # Perform AI analysis
-    analyzer = VideoAnalyzer()
-    analysis = analyzer.analyze_video_content(local_file_path, duration, video_id)
-    analysis["video_id"] = str(video_id)
+    analysis = get_video_analyzer().analyze_video_content(local_file_path, duration, video.id, force=force)
+    analysis["video_id"] = str(video.id)
+
+    if cache_key and not analysis.get("fallback"):
+        analysis_cache.set_json(cache_key, analysis, ANALYSIS_CACHE_TTL_SECONDS)
 
     return analysis
 
 
+# Approved assets scored against one video's tags, mood, scene and
+# activity; tags_arr is the lowercased tag list, GIN-indexed
+_RECOMMENDATIONS_QUERY_TEMPLATE = """
+    SELECT a.*, u.display_name as artist_name,
+        (
+            SELECT count(*) FROM unnest(%(video_tags)s::text[]) AS tag
+            WHERE tag = ANY(a.tags_arr)
+        ) AS tag_overlap,
+        COALESCE(%(mood)s = ANY(a.tags_arr), false) AS mood_match,
+        COALESCE(%(activity)s = ANY(a.tags_arr), false) AS activity_match,
+        COALESCE(%(scene_type)s = ANY(a.tags_arr), false) AS scene_match
+    FROM artist_assets a
+    JOIN users u ON a.uploader_id = u.id
+    WHERE a.status = 'approved' {tag_filter}
+    ORDER BY
+        CASE
+            WHEN %(mood)s = ANY(a.tags_arr) THEN 3
+            WHEN %(scene_type)s = ANY(a.tags_arr) THEN 2
+            WHEN %(activity)s = ANY(a.tags_arr) THEN 2
+            ELSE 1
+        END DESC,
+        a.created_at DESC
+    LIMIT %(limit)s
+"""
+# Separate texts rather than an OR in one, so each gets its own plan and
+# the tag filter can always use the index
+_RECOMMENDATIONS_QUERY = _RECOMMENDATIONS_QUERY_TEMPLATE.format(
+    tag_filter="AND a.tags_arr && %(top_tags)s::text[]"
+)
+_UNFILTERED_RECOMMENDATIONS_QUERY = _RECOMMENDATIONS_QUERY_TEMPLATE.format(tag_filter="")
+
+
 @authenticated
 def get_smart_overlay_recommendations(user: User, video_id: UUID, limit: int = 5) -> List[Dict]:
-    """Get AI-recommended overlays for a specific video."""
+    """Get AI-recommended overlays for a specific video.
+
+    Lists are cached per user, video and limit for a few minutes, and dropped
+    as soon as any asset is uploaded or changed.
+    """
+
+    cache_key = f"recs:{get_asset_catalog_version()}:{user.id}:{video_id}:{limit}"
+    cached = analysis_cache.get_json(cache_key)
+    if cached is not None:
+        return cached
 
     # Get video analysis
     analysis = analyze_video_for_overlays(user, video_id)
 
-    # Find matching assets based on tags and content
-    content_tags = analysis.get("tags", [])
-    mood = analysis.get("mood", "neutral")
-    scene_type = analysis.get("scene_type", "general")
-    activity = analysis.get("primary_activity", "unknown")
+    # Find matching assets based on tags and content; providers may send null
+    mood = analysis.get("mood") or "neutral"
+    scene_type = analysis.get("scene_type") or "general"
+    activity = analysis.get("primary_activity") or "unknown"
 
-    # Build smart query for asset matching
-    tag_conditions = []
-    for tag in content_tags[:3]:  # Use top 3 tags
-        tag_conditions.append(f"tags LIKE '%{tag}%'")
+    video_tags = _video_tags(analysis)
+    top_tags = video_tags[:3]  # Use top 3 tags
 
-    tag_query = " OR ".join(tag_conditions) if tag_conditions else "1=1"
-
-    # Get matching assets
+    # Assets sharing one of the top 3 tags, scored against the analysis in
+    # the same query. The query text is fixed, so its plan is prepared once
+    # per connection and reused.
     assets_data = ArtistAsset.sql(
-        f"""
-        SELECT a.*, u.display_name as artist_name
-        FROM artist_assets a
-        JOIN users u ON a.uploader_id = u.id
-        WHERE a.status = 'approved' AND ({tag_query})
-        ORDER BY
-            CASE
-                WHEN a.tags LIKE %(mood)s THEN 3
-                WHEN a.tags LIKE %(scene_type)s THEN 2
-                WHEN a.tags LIKE %(activity)s THEN 2
-                ELSE 1
-            END DESC,
-            a.created_at DESC
-        LIMIT %(limit)s
-        """,
+        _RECOMMENDATIONS_QUERY if top_tags else _UNFILTERED_RECOMMENDATIONS_QUERY,
         {
-            "mood": f"%{mood}%",
-            "scene_type": f"%{scene_type}%",
-            "activity": f"%{activity}%",
+            "video_tags": video_tags,
+            "top_tags": top_tags,
+            "mood": mood.lower(),
+            "scene_type": scene_type.lower(),
+            "activity": activity.lower(),
             "limit": limit,
         },
+        prepare=True,
+    )
+
+    recommendations = _build_recommendations(assets_data, analysis, video_tags)
+    analysis_cache.set_json(cache_key, recommendations, RECOMMENDATIONS_CACHE_TTL_SECONDS)
+    return recommendations
+
+
+@authenticated
+def get_recommendations_for_videos(
+    user: User, video_ids: List[UUID], limit: int = 5
+) -> Dict[str, List[Dict]]:
+    """Get AI-recommended overlays for several videos, keyed by video id.
+
+    Uses one query for the analyses (see analyze_videos_for_overlays_bulk)
+    and one for the assets, which runs the per-video asset match of
+    get_smart_overlay_recommendations as a lateral join over every video.
+    """
+
+    analyses = analyze_videos_for_overlays_bulk(user, video_ids)
+    if not analyses:
+        return {}
+
+    # Each video filters on its top 3 tags, or on none if its analysis has no usable tags
+    videos = []
+    tags_by_video = {}
+    for video_id, analysis in analyses.items():
+        video_tags = tags_by_video[video_id] = _video_tags(analysis)
+        videos.append(
+            {
+                "video_id": video_id,
+                "video_tags": video_tags,
+                "top_tags": video_tags[:3],
+                "mood": (analysis.get("mood") or "neutral").lower(),
+                "scene_type": (analysis.get("scene_type") or "general").lower(),
+                "activity": (analysis.get("primary_activity") or "unknown").lower(),
+            }
+        )
+
+    assets_data = ArtistAsset.sql(
+        """
+        SELECT v.video_id AS recommended_for, m.*
+        FROM jsonb_to_recordset(%(videos)s::jsonb) AS v(
+            video_id text, video_tags text[], top_tags text[],
+            mood text, scene_type text, activity text
+        )
+        CROSS JOIN LATERAL (
+            SELECT a.*, u.display_name as artist_name,
+                (
+                    SELECT count(*) FROM unnest(v.video_tags) AS tag
+                    WHERE tag = ANY(a.tags_arr)
+                ) AS tag_overlap,
+                COALESCE(v.mood = ANY(a.tags_arr), false) AS mood_match,
+                COALESCE(v.activity = ANY(a.tags_arr), false) AS activity_match,
+                COALESCE(v.scene_type = ANY(a.tags_arr), false) AS scene_match
+            FROM artist_assets a
+            JOIN users u ON a.uploader_id = u.id
+            WHERE a.status = 'approved'
+                AND (cardinality(v.top_tags) = 0 OR a.tags_arr && v.top_tags)
+            ORDER BY
+                CASE
+                    WHEN v.mood = ANY(a.tags_arr) THEN 3
+                    WHEN v.scene_type = ANY(a.tags_arr) THEN 2
+                    WHEN v.activity = ANY(a.tags_arr) THEN 2
+                    ELSE 1
+                END DESC,
+                a.created_at DESC
+            LIMIT %(limit)s
+        ) m
+        """,
+        {"videos": orjson.dumps(videos).decode(), "limit": limit},
+        prepare=True,
     )
 
-    # Generate recommendations with AI placement
+    assets_by_video = {video_id: [] for video_id in analyses}
+    for asset_data in assets_data:
+        assets_by_video[asset_data["recommended_for"]].append(asset_data)
+
+    return {
+        video_id: _build_recommendations(assets_by_video[video_id], analysis, tags_by_video[video_id])
+        for video_id, analysis in analyses.items()
+    }
+
+
+def _video_tags(analysis: Dict) -> List[str]:
+    """An analysis's distinct tags, normalized like tags_arr, in order.
+
+    Tag overlap is counted over this list, probing each asset's tags_arr
+    once per video tag; the list is short, so that beats deduplicating
+    every asset's tags. Computed once per request and bound as a query
+    parameter, never written into the SQL text.
+    """
+    tags = (tag.strip(" ").lower() for tag in analysis.get("tags", []) if isinstance(tag, str))
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+def _build_recommendations(
+    assets_data: Iterable[Dict], analysis: Dict, video_tags: List[str]
+) -> List[Dict]:
+    """Turn scored asset rows for one video into recommendations with AI placement.
+
+    Each asset is sent as the RECOMMENDED_ASSET_FIELDS of its row, without
+    building an ArtistAsset in between.
+    """
+
     recommendations = []
     overlay_suggestions = analysis.get("overlay_recommendations", {})
+    video_tag_count = len(video_tags)
 
-    for i, asset_data in enumerate(assets_data):
-        asset = ArtistAsset(**asset_data)
+    # Analysis values the reasoning needs, looked up once for all assets
+    video_mood = analysis.get("mood", "neutral")
+    video_activity = analysis.get("primary_activity", "general")
+    scene_type = analysis.get("scene_type", "standard")
 
-        # Generate smart placement for this asset
-        placement = _generate_smart_placement(asset, analysis, i, overlay_suggestions)
+    placements = _generate_smart_placements(analysis, overlay_suggestions)
 
+    # placements is endless; it only stops when the assets run out
+    for asset_data, placement in zip(assets_data, placements, strict=False):
         recommendations.append(
             {
-                "asset": asset.__dict__,
+                "asset": {field: asset_data.get(field) for field in RECOMMENDED_ASSET_FIELDS},
                 "artist_name": asset_data["artist_name"],
                 "placement": placement,
-                "confidence_score": _calculate_match_confidence(asset, analysis),
-                "reasoning": _generate_recommendation_reasoning(asset, analysis),
+                "confidence_score": _calculate_match_confidence(asset_data, video_tag_count),
+                "reasoning": _generate_recommendation_reasoning(
+                    asset_data, video_mood, video_activity, scene_type
+                ),
             }
         )
 
     return recommendations
 
 
-def _generate_smart_placement(
-    asset: ArtistAsset, analysis: Dict, index: int, suggestions: Dict
-) -> Dict:
-    """Generate smart overlay placement based on AI analysis."""
+# Asset columns sent with each recommendation: the ArtistAsset fields,
+# plus the tags that recommendation_engine re-ranks on
+RECOMMENDED_ASSET_FIELDS = (*ArtistAsset.model_fields, "tags")
+
+# Overlay (x, y) positions on the 800x450 editor canvas, cycled per asset
+_BALANCED_EDGE_POSITIONS = ((100, 100), (600, 150), (150, 300), (550, 80), (200, 200))
+_PLACEMENT_POSITIONS = {
+    "center_burst": ((400, 225),),  # Center of 800x450
+    "static_corner": ((50, 50), (650, 50), (50, 350), (650, 350)),  # TL, TR, BL, BR
+    "balanced_edge": _BALANCED_EDGE_POSITIONS,
+}
+
+
+def _generate_smart_placements(analysis: Dict, suggestions: Dict) -> Iterator[Dict]:
+    """Generate smart overlay placements based on AI analysis, one per asset in order.
+
+    Everything that depends only on the video is worked out once, before
+    the first placement.
+    """
 
     duration = analysis.get("duration", 10)
     timing_pattern = suggestions.get("timing_pattern", {})
     placement_style = suggestions.get("placement_style", "balanced_edge")
-    scale_range = suggestions.get("scale_range", (0.5, 1.0))
-
-    # Calculate position based on placement style
-    if placement_style == "center_burst":
-        position = {"x": 400, "y": 225}  # Center of 800x450
-    elif placement_style == "static_corner":
-        corners = [
-            {"x": 50, "y": 50},  # Top-left
-            {"x": 650, "y": 50},  # Top-right
-            {"x": 50, "y": 350},  # Bottom-left
-            {"x": 650, "y": 350},  # Bottom-right
-        ]
-        position = corners[index % len(corners)]
-    else:  # balanced_edge or default
-        positions = [
-            {"x": 100, "y": 100},
-            {"x": 600, "y": 150},
-            {"x": 150, "y": 300},
-            {"x": 550, "y": 80},
-            {"x": 200, "y": 200},
-        ]
-        position = positions[index % len(positions)]
+    scale_low, scale_high = suggestions.get("scale_range", (0.5, 1.0))
+    scale_span = scale_high - scale_low
+
+    # Positions based on placement style
+    positions = _PLACEMENT_POSITIONS.get(placement_style, _BALANCED_EDGE_POSITIONS)
 
-    # Calculate timing
+    # Timing windows
     intervals = timing_pattern.get("intervals", [duration * 0.3, duration * 0.7])
     overlay_duration = timing_pattern.get("duration_per_overlay", 3.0)
+    windows = [
+        (round(start_time, 1), round(min(start_time + overlay_duration, duration), 1))
+        for start_time in intervals
+    ]
+
+    for index, (x, y), (start_time, end_time) in zip(count(), cycle(positions), cycle(windows)):
+        scale = scale_low + (index * 0.1) % scale_span
+
+        yield {
+            "position": {
+                "x": x,
+                "y": y,
+                "scaleX": scale,
+                "scaleY": scale,
+                "angle": 0,
+            },
+            "timing": {
+                "startTime": start_time,
+                "endTime": end_time,
+                "fadeIn": 0.3,
+                "fadeOut": 0.3,
+            },
+            "layerOrder": index + 1,
+        }
 
-    start_time = intervals[index % len(intervals)]
-    end_time = min(start_time + overlay_duration, duration)
-
-    # Calculate scale
-    scale = scale_range[0] + (index * 0.1) % (scale_range[1] - scale_range[0])
-
-    return {
-        "position": {
-            "x": position["x"],
-            "y": position["y"],
-            "scaleX": scale,
-            "scaleY": scale,
-            "angle": 0,
-        },
-        "timing": {
-            "startTime": round(start_time, 1),
-            "endTime": round(end_time, 1),
-            "fadeIn": 0.3,
-            "fadeOut": 0.3,
-        },
-        "layerOrder": index + 1,
-    }
 
+def _calculate_match_confidence(asset_data: Dict, video_tag_count: int) -> float:
+    """Calculate how well an asset matches the video content.
 
-def _calculate_match_confidence(asset: ArtistAsset, analysis: Dict) -> float:
-    """Calculate how well an asset matches the video content."""
+    asset_data is a recommendations row, with the match columns computed
+    by the query.
+    """
 
-    confidence = 0.0
-    video_tags = set(analysis.get("tags", []))
-    asset_tags = set(asset.tags if asset.tags else [])
+    # Base confidence for approved assets, plus mood and activity matches
+    # (the match columns are booleans, so they weight as 0 or 1)
+    confidence = 0.1 + 0.3 * asset_data["mood_match"] + 0.2 * asset_data["activity_match"]
 
     # Tag overlap
-    if video_tags and asset_tags:
-        overlap = len(video_tags.intersection(asset_tags))
-        confidence += (overlap / len(video_tags)) * 0.6
-
-    # Mood matching
-    video_mood = analysis.get("mood", "").lower()
-    if video_mood and asset.tags and video_mood in asset.tags.lower():
-        confidence += 0.3
-
-    # Activity matching
-    video_activity = analysis.get("primary_activity", "").lower()
-    if video_activity and asset.tags and video_activity in asset.tags.lower():
-        confidence += 0.2
-
-    # Base confidence for approved assets
-    confidence += 0.1
-
-    return min(round(confidence, 3), 1.0)
+    if video_tag_count:
+        confidence += asset_data["tag_overlap"] * 0.6 / video_tag_count
+
+    # Full matches add up to 1.2, so clamp before rounding what's left
+    return 1.0 if confidence >= 1.0 else round(confidence, 3)
+
+
+def _generate_recommendation_reasoning(
+    asset_data: Dict, video_mood: str, video_activity: str, scene_type: str
+) -> str:
+    """Generate human-readable reasoning for a recommendations row."""
+    return _recommendation_reasoning(
+        video_mood,
+        video_activity,
+        scene_type,
+        bool(asset_data["mood_match"]),
+        bool(asset_data["activity_match"]),
+        bool(asset_data["scene_match"]),
+    )
 
 
-def _generate_recommendation_reasoning(asset: ArtistAsset, analysis: Dict) -> str:
-    """Generate human-readable reasoning for the recommendation."""
+@lru_cache(maxsize=4096)
+def _recommendation_reasoning(
+    video_mood: str,
+    video_activity: str,
+    scene_type: str,
+    mood_match: bool,
+    activity_match: bool,
+    scene_match: bool,
+) -> str:
+    """Reasoning text for one combination of analysis values and matches.
 
-    video_mood = analysis.get("mood", "neutral")
-    video_activity = analysis.get("primary_activity", "general")
-    scene_type = analysis.get("scene_type", "standard")
+    Moods, activities and scene types come from small fixed sets, so the
+    same few sentences are repeated across assets and requests.
+    """
 
     reasons = []
 
-    if asset.tags:
-        asset_tags = asset.tags.lower()
-        if video_mood in asset_tags:
-            reasons.append(f"matches {video_mood} mood")
-        if video_activity in asset_tags:
-            reasons.append(f"fits {video_activity} activity")
-        if scene_type in asset_tags:
-            reasons.append(f"works with {scene_type} setting")
+    if mood_match:
+        reasons.append(f"matches {video_mood} mood")
+    if activity_match:
+        reasons.append(f"fits {video_activity} activity")
+    if scene_match:
+        reasons.append(f"works with {scene_type} setting")
 
     if not reasons:
         reasons.append("popular choice for similar videos")
 
     return f"Great fit because it {' and '.join(reasons)}."
-
-    def _convert_cached_analysis_to_format(self, cached_analysis, video_duration: float) -> Dict:
-        """Convert cached pose analysis to expected analysis format."""
-        try:
-            pose_sequences = cached_analysis.pose_sequences.get("sequences", [])
-            normalized_poses = cached_analysis.normalized_poses.get("normalized", [])
-            movement_analysis = cached_analysis.movement_analysis or {}
-
-            return {
-                "video_id": str(cached_analysis.video_id),
-                "duration": video_duration,
-                "scene_type": "person" if pose_sequences else "general",
-                "primary_activity": movement_analysis.get("movement_type", "unknown"),
-                "mood": "neutral",
-                "motion_level": self._determine_motion_level_from_confidence(
-                    cached_analysis.confidence_avg
-                ),
-                "objects": ["person"] if pose_sequences else ["background"],
-                "color_palette": ["blue", "white"],
-                "people_count": 1 if pose_sequences else 0,
-                "complexity_score": min(cached_analysis.frame_count / 30.0, 1.0),
-                "frame_analyses": self._generate_frame_analyses_from_cache(pose_sequences),
-                "pose_sequences": normalized_poses,
-                "pose_analysis_summary": {
-                    "total_pose_frames": cached_analysis.frame_count,
-                    "avg_confidence": float(cached_analysis.confidence_avg),
-                    "processing_time_ms": cached_analysis.processing_time_ms,
-                    "cached_result": True,
-                },
-                "analyzed_at": cached_analysis.created_at.isoformat(),
-                "tags": self._generate_content_tags("person", "movement", "neutral"),
-                "overlay_recommendations": self._generate_overlay_suggestions(
-                    "person", "movement", "neutral", video_duration
-                ),
-                "cached": True,
-            }
-        except Exception as e:
-            print(f"Error converting cached analysis: {e}")
-            # Return minimal analysis if conversion fails
-            return self._fallback_analysis(video_duration)
-
-    def _determine_motion_level_from_confidence(self, confidence: float) -> str:
-        """Determine motion level from pose confidence."""
-        if confidence > 0.8:
-            return "high"
-        elif confidence > 0.5:
-            return "medium"
-        else:
-            return "low"
-
-    def _generate_frame_analyses_from_cache(self, pose_sequences: List[List[float]]) -> List[Dict]:
-        """Generate frame analyses from cached pose sequences."""
-        frame_analyses = []
-        for i, pose_data in enumerate(pose_sequences[:3]):  # Limit to 3 frames for consistency
-            confidence = self._calculate_pose_confidence(pose_data) if pose_data else 0.0
-            frame_analyses.append(
-                {
-                    "timestamp": i * 2.0,  # Assume 2-second intervals
-                    "scene_type": "person" if confidence > 0.5 else "general",
-                    "activity": "movement" if confidence > 0.6 else "static",
-                    "mood": "neutral",
-                    "objects": ["person"] if confidence > 0.5 else [],
-                    "people_count": 1 if confidence > 0.5 else 0,
-                    "motion_level": "high"
-                    if confidence > 0.8
-                    else "medium"
-                    if confidence > 0.5
-                    else "low",
-                    "pose_confidence": confidence,
-                    "cached_frame": True,
-                }
-            )
-        return frame_analyses
@@ -0,0 +1,165 @@
+"""
+Redis cache for video analysis results, shared by every API worker.
+
+Entries live in Redis so each worker reuses what the others computed and
+they survive restarts. When redis is not installed or the server can't be
+reached, entries go to a small per-process dict instead, so the cache never
+fails an analysis. After an error Redis is left alone for a while, so an
+outage doesn't add a timeout to every call.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from loguru import logger
+
+# Redis import with fallback for testing
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+# Longest to wait on Redis before using the local cache
+REDIS_TIMEOUT_SECONDS = 0.5
+# After a Redis error, use the local cache this long before trying Redis
+# again, so an outage costs one timeout rather than one per call
+REDIS_RETRY_SECONDS = 30
+# Entries kept per process while Redis is unavailable
+LOCAL_CACHE_SIZE = 256
+
+_client = None
+# key -> (monotonic expiry time, value)
+_local_cache: Dict[str, Tuple[float, bytes]] = {}
+# Counters never expire and are kept apart, so evicting cache entries
+# can't reset them
+_local_counters: Dict[str, int] = {}
+_redis_failing = False
+_redis_retry_at = 0.0
+
+
+def get_cache_client():
+    """Get the shared binary Redis client, or None when redis isn't installed."""
+    global _client
+    if _client is None and REDIS_AVAILABLE:
+        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        _client = redis.from_url(
+            redis_url,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+        )
+    return _client
+
+
+def _active_client():
+    """The Redis client, or None while backing off after an error."""
+    if time.monotonic() < _redis_retry_at:
+        return None
+    return get_cache_client()
+
+
+def _redis_error(e: Exception):
+    global _redis_failing, _redis_retry_at
+    _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+    if not _redis_failing:
+        logger.warning(f"Analysis cache falling back to local memory, Redis unavailable: {e}")
+        _redis_failing = True
+
+
+def _redis_ok():
+    global _redis_failing
+    if _redis_failing:
+        logger.info("Analysis cache reconnected to Redis")
+        _redis_failing = False
+
+
+def _get_local(key: str) -> Optional[bytes]:
+    counter = _local_counters.get(key)
+    if counter is not None:
+        return str(counter).encode()
+
+    entry = _local_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        del _local_cache[key]
+        return None
+    return value
+
+
+def _set_local(key: str, value: bytes, ttl_seconds: int):
+    # Bound the local entries by count as well, dropping the oldest
+    if key not in _local_cache and len(_local_cache) >= LOCAL_CACHE_SIZE:
+        _local_cache.pop(next(iter(_local_cache)))
+    _local_cache[key] = (time.monotonic() + ttl_seconds, value)
+
+
+def get_bytes(key: str) -> Optional[bytes]:
+    """Get a cached value from Redis, or the local cache if Redis is down."""
+    client = _active_client()
+    if client is not None:
+        try:
+            value = client.get(key)
+            _redis_ok()
+            return value
+        except Exception as e:
+            _redis_error(e)
+    return _get_local(key)
+
+
+def set_bytes(key: str, value: bytes, ttl_seconds: int):
+    """Cache a value with a TTL in Redis, or in the local cache if Redis is down."""
+    client = _active_client()
+    if client is not None:
+        try:
+            client.setex(key, ttl_seconds, value)
+            _redis_ok()
+            return
+        except Exception as e:
+            _redis_error(e)
+    _set_local(key, value, ttl_seconds)
+
+
+def incr(key: str) -> int:
+    """Increment a counter without expiry and return its new value."""
+    client = _active_client()
+    if client is not None:
+        try:
+            value = client.incr(key)
+            _redis_ok()
+            return value
+        except Exception as e:
+            _redis_error(e)
+
+    _local_counters[key] = _local_counters.get(key, 0) + 1
+    return _local_counters[key]
+
+
+def get_json(key: str) -> Optional[Any]:
+    """Get a cached JSON value."""
+    value = get_bytes(key)
+    return orjson.loads(value) if value is not None else None
+
+
+def get_json_many(keys: List[str]) -> Dict[str, Any]:
+    """Get several cached JSON values in one round trip, leaving out misses."""
+    values = None
+    client = _active_client()
+    if client is not None and keys:
+        try:
+            values = client.mget(keys)
+            _redis_ok()
+        except Exception as e:
+            _redis_error(e)
+    if values is None:
+        values = [_get_local(key) for key in keys]
+    return {key: orjson.loads(value) for key, value in zip(keys, values, strict=True) if value is not None}
+
+
+def set_json(key: str, value: Any, ttl_seconds: int):
+    """Cache a JSON-serializable value."""
+    set_bytes(key, orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY), ttl_seconds)
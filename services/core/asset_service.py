@@ -2,8 +2,36 @@ from typing import Optional, List, Dict
 from uuid import UUID
 from core.user import User
 from core.access import authenticated, public
-from core.media import MediaFile, save_to_bucket, generate_presigned_url
+from core.media import MediaFile, save_to_bucket, generate_presigned_urls
 from core.artist_assets import ArtistAsset
+from core import analysis_cache
+
+# Bumped whenever assets change, so cached overlay recommendations are dropped
+ASSET_CATALOG_VERSION_KEY = "asset_catalog_version"
+
+
+def _with_presigned_urls(assets: List[ArtistAsset]) -> List[ArtistAsset]:
+    """Replace asset file and thumbnail paths with presigned URLs, signed in one batch."""
+    paths = [asset.file_path for asset in assets]
+    paths.extend(asset.thumbnail_path for asset in assets if asset.thumbnail_path)
+    urls = iter(generate_presigned_urls(paths))
+
+    for asset in assets:
+        asset.file_path = next(urls)
+    for asset in assets:
+        if asset.thumbnail_path:
+            asset.thumbnail_path = next(urls)
+    return assets
+
+
+def get_asset_catalog_version() -> int:
+    """Current asset catalog version, shared by every API worker."""
+    return analysis_cache.get_json(ASSET_CATALOG_VERSION_KEY) or 0
+
+
+def invalidate_asset_catalog():
+    """Mark assets as changed so cached recommendations aren't reused."""
+    analysis_cache.incr(ASSET_CATALOG_VERSION_KEY)
 
 @authenticated
 def upload_asset(user: User, asset_file: MediaFile, name: str, category: str = "effects", is_public: bool = True) -> ArtistAsset:
@@ -42,6 +70,7 @@ def upload_asset(user: User, asset_file: MediaFile, name: str, category: str = "
         is_public=is_public
     )
     asset.sync()
+    invalidate_asset_catalog()
     
     return asset
 
@@ -69,18 +98,8 @@ def get_assets(category: Optional[str] = None, artist_id: Optional[UUID] = None,
     
     assets_data = ArtistAsset.sql(base_query, params)
     
-    assets = []
-    for asset_data in assets_data:
-        asset = ArtistAsset(**asset_data)
-        
-        # Generate presigned URLs for media files
-        asset.file_path = generate_presigned_url(asset.file_path)
-        if asset.thumbnail_path:
-            asset.thumbnail_path = generate_presigned_url(asset.thumbnail_path)
-        
-        assets.append(asset)
-    
-    return assets
+    # Generate presigned URLs for media files
+    return _with_presigned_urls([ArtistAsset(**asset_data) for asset_data in assets_data])
 
 @authenticated
 def get_my_assets(user: User) -> List[ArtistAsset]:
@@ -90,18 +109,8 @@ def get_my_assets(user: User) -> List[ArtistAsset]:
         {"user_id": user.id}
     )
     
-    assets = []
-    for asset_data in assets_data:
-        asset = ArtistAsset(**asset_data)
-        
-        # Generate presigned URLs for media files
-        asset.file_path = generate_presigned_url(asset.file_path)
-        if asset.thumbnail_path:
-            asset.thumbnail_path = generate_presigned_url(asset.thumbnail_path)
-        
-        assets.append(asset)
-    
-    return assets
+    # Generate presigned URLs for media files
+    return _with_presigned_urls([ArtistAsset(**asset_data) for asset_data in assets_data])
 
 @public
 def get_asset(asset_id: UUID) -> Optional[ArtistAsset]:
@@ -114,14 +123,8 @@ def get_asset(asset_id: UUID) -> Optional[ArtistAsset]:
     if not assets_data:
         return None
     
-    asset = ArtistAsset(**assets_data[0])
-    
     # Generate presigned URLs for media files
-    asset.file_path = generate_presigned_url(asset.file_path)
-    if asset.thumbnail_path:
-        asset.thumbnail_path = generate_presigned_url(asset.thumbnail_path)
-    
-    return asset
+    return _with_presigned_urls([ArtistAsset(**assets_data[0])])[0]
 
 @authenticated
 def update_asset(user: User, asset_id: UUID, name: Optional[str] = None, category: Optional[str] = None, is_public: Optional[bool] = None) -> ArtistAsset:
@@ -151,13 +154,10 @@ def update_asset(user: User, asset_id: UUID, name: Optional[str] = None, categor
     # Update the asset
     updated_asset = ArtistAsset(**asset_data)
     updated_asset.sync()
+    invalidate_asset_catalog()
     
     # Generate presigned URLs for media files
-    updated_asset.file_path = generate_presigned_url(updated_asset.file_path)
-    if updated_asset.thumbnail_path:
-        updated_asset.thumbnail_path = generate_presigned_url(updated_asset.thumbnail_path)
-    
-    return updated_asset
+    return _with_presigned_urls([updated_asset])[0]
 
 @authenticated
 def delete_asset(user: User, asset_id: UUID) -> bool:
@@ -175,6 +175,7 @@ def delete_asset(user: User, asset_id: UUID) -> bool:
         "UPDATE artist_assets SET is_public = false WHERE id = %(asset_id)s",
         {"asset_id": asset_id}
     )
+    invalidate_asset_catalog()
     
     return True
 
@@ -198,18 +199,8 @@ def search_assets(query: str, category: Optional[str] = None, limit: int = 50) -
     
     assets_data = ArtistAsset.sql(base_query, params)
     
-    assets = []
-    for asset_data in assets_data:
-        asset = ArtistAsset(**asset_data)
-        
-        # Generate presigned URLs for media files
-        asset.file_path = generate_presigned_url(asset.file_path)
-        if asset.thumbnail_path:
-            asset.thumbnail_path = generate_presigned_url(asset.thumbnail_path)
-        
-        assets.append(asset)
-    
-    return assets
+    # Generate presigned URLs for media files
+    return _with_presigned_urls([ArtistAsset(**asset_data) for asset_data in assets_data])
 
 @authenticated
 def increment_asset_usage(user: User, asset_id: UUID) -> bool:
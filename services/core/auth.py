@@ -1,8 +1,11 @@
 """Authentication system for MagicLens using Flow wallet signatures."""
 import jwt
 import os
+import time
+import hashlib
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, Tuple
+from fastapi import Header, HTTPException
 from core.user import User
 import uuid
 
@@ -12,6 +15,11 @@ JWT_SECRET = os.getenv("JWT_SECRET_KEY") or os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
 
+# Verified tokens are cached briefly so repeat requests skip JWT decoding
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_SIZE = 1024
+_token_cache: Dict[bytes, Tuple[float, User]] = {}  # blake2b(token) -> (expires_at, user)
+
 # Enforce presence of JWT secret in production
 ENV = os.getenv("ENV", "development")
 if not JWT_SECRET:
@@ -41,8 +49,23 @@ def verify_access_token(token: str) -> Optional[dict]:
     except jwt.InvalidTokenError:
         return None
 
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def get_cached_user(token: str) -> Optional[User]:
+    """Return the user for a recently verified token, without verifying it again."""
+    cached = _token_cache.get(_token_cache_key(token))
+    if cached and cached[0] > time.time():
+        return cached[1]
+    return None
+
 def get_current_user_from_token(token: str) -> Optional[User]:
     """Get current user from JWT token."""
+    user = get_cached_user(token)
+    if user:
+        return user
+
+    now = time.time()
     payload = verify_access_token(token)
     if not payload:
         return None
@@ -54,12 +77,35 @@ def get_current_user_from_token(token: str) -> Optional[User]:
     # Create a user ID based on the wallet address
     # In a real app, this would be looked up from a users table
     user_id = uuid.uuid5(uuid.NAMESPACE_DNS, wallet_address)
-    
-    return User(id=user_id, wallet_address=wallet_address)
-
-def get_current_user():
-    """Placeholder for FastAPI Depends - will be replaced with proper implementation."""
-    # This is a mock implementation for now
-    # In a real app, this would extract the token from the request headers
-    # and verify it
-    return User(id=uuid.uuid4(), wallet_address="0x123456789")
\ No newline at end of file
+    user = User(id=user_id, wallet_address=wallet_address)
+
+    # Never cache past the token's own expiry
+    expires_at = min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now))
+    if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+        _token_cache.pop(next(iter(_token_cache), None), None)
+    _token_cache[_token_cache_key(token)] = (expires_at, user)
+
+    return user
+
+def get_user_from_authorization(authorization: Optional[str]) -> User:
+    """Resolve a "Bearer <token>" Authorization header to a User or raise 401."""
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+
+    try:
+        # Expected format: "Bearer <token>"
+        token_type, token = authorization.split()
+        if token_type.lower() != "bearer":
+            raise HTTPException(status_code=401, detail="Invalid token type")
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid authorization header format")
+
+    user = get_current_user_from_token(token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    return user
+
+async def current_user(authorization: Optional[str] = Header(None)) -> User:
+    """FastAPI dependency for routes that require an authenticated user."""
+    return get_user_from_authorization(authorization)
\ No newline at end of file
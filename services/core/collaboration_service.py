@@ -20,9 +20,10 @@ def start_collaboration(user: User, video_id: UUID, revenue_split: float = 0.7)
     if not videos_data:
         raise ValueError("Video not found or not available")
     
-    # Check if user already has an active collaboration on this video
+    # Check if user already has an active collaboration on this video; only
+    # columns in idx_collab_video_covering are read, so it's an index-only scan
     existing_collaborations = Collaboration.sql(
-        "SELECT * FROM collaborations WHERE video_id = %(video_id)s AND artist_id = %(user_id)s AND status IN ('claimed', 'in_progress', 'submitted')",
+        "SELECT artist_id, status FROM collaborations WHERE video_id = %(video_id)s AND artist_id = %(user_id)s AND status IN ('claimed', 'in_progress', 'submitted') LIMIT 1",
         {"video_id": video_id, "user_id": user.id}
     )
     
@@ -8,6 +8,7 @@ from typing import List, Tuple, Optional
 import math
 import mediapipe as mp
 import cv2
+from loguru import logger
 import time
 from uuid import UUID
 
@@ -61,12 +62,27 @@ class PoseAnalyzer:
 
     def extract_pose_from_image(self, image: np.ndarray) -> List[float]:
         """
-        Extract pose landmarks from image using MediaPipe.
+        Extract pose landmarks from a BGR image using MediaPipe.
         Returns format: [x1, y1, z1, visibility1, x2, y2, z2, visibility2, ...]
         """
         try:
             # Convert BGR to RGB for MediaPipe
             rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        except Exception as e:
+            logger.debug("Error extracting pose: {}", e)
+            return []
+
+        return self.extract_pose_from_rgb_image(rgb_image)
+
+    def extract_pose_from_rgb_image(self, rgb_image: np.ndarray) -> List[float]:
+        """
+        Extract pose landmarks from an image already in RGB order.
+        A read-only view of the image is passed so MediaPipe can use it without
+        a copy, leaving the caller's array writeable.
+        """
+        try:
+            rgb_image = np.ascontiguousarray(rgb_image).view()
+            rgb_image.flags.writeable = False
 
             # Process the image
             results = self.pose.process(rgb_image)
@@ -85,7 +101,7 @@ class PoseAnalyzer:
             else:
                 return []
         except Exception as e:
-            print(f"Error extracting pose: {e}")
+            logger.debug("Error extracting pose: {}", e)
             return []
 
     def extract_pose_from_video(
@@ -428,3 +444,9 @@ def extract_pose_from_image(image: np.ndarray) -> List[float]:
     """Extract pose landmarks from single image using MediaPipe."""
     analyzer = get_pose_analyzer()
     return analyzer.extract_pose_from_image(image)
+
+
+def extract_pose_from_rgb_image(rgb_image: np.ndarray) -> List[float]:
+    """Extract pose landmarks from single RGB image using MediaPipe."""
+    analyzer = get_pose_analyzer()
+    return analyzer.extract_pose_from_rgb_image(rgb_image)
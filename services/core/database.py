@@ -194,12 +194,16 @@ def return_db_connection(conn):
     if pool is not None:
         pool.putconn(conn)
 
-def execute_query(query: str, params: tuple = None):
-    """Execute a query and return results as dictionaries."""
+def execute_query(query: str, params: tuple = None, prepare: Optional[bool] = None):
+    """Execute a query and return results as dictionaries.
+
+    prepare is passed to psycopg: True prepares the statement on first use,
+    None leaves it to psycopg's automatic preparation of repeated queries.
+    """
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute(query, params)
+            cur.execute(query, params, prepare=prepare)
             if cur.description:
                 # Get column names
                 columns = [desc[0] for desc in cur.description]
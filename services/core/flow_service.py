@@ -1,6 +1,7 @@
 """Flow blockchain service for MagicLens backend."""
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from uuid import UUID
+import asyncio
 import logging
 import json
 import os
@@ -23,8 +24,55 @@ class FlowService:
             "CollaborationHub": os.getenv("FLOW_COLLABORATIONHUB_ADDRESS"),
             "ForteAutomation": os.getenv("FLOW_FORTEAUTOMATION_ADDRESS"),
         }
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # Bumped on every contract address change so callers can cache derived data
+        self.contracts_version = 0
+        # Shared client, opened by startup() and reused across requests
+        self._client: Optional[httpx.AsyncClient] = None
+        # In-flight script calls, so concurrent identical lookups share one request
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
         logger.info(f"Flow service initialized for {self.network} network")
+
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        """Create the pooled HTTP/2 client used for Access Node calls."""
+        return httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=10.0,
+        )
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use if startup() hasn't run."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def startup(self):
+        """Open the shared HTTP client; called from the app startup hook."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+
+    async def _coalesce(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fetch() once for all concurrent callers using the same key.
+
+        Later callers await the first caller's task instead of issuing their own
+        Access Node request. The task is shielded so one cancelled request does
+        not cancel the lookup for everyone else.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def shutdown(self):
+        """Close the shared HTTP client; called from the app shutdown hook."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _get_default_access_node(self, network: str) -> str:
         """Get default Flow Access Node URL for network."""
@@ -93,8 +141,24 @@ class FlowService:
                 logger.warning("ARAssetNFT contract address not configured")
                 return False
             
-            # Execute script to get user's NFTs
-            script = f"""
+            # Concurrent checks for the same wallet share one ID-list fetch
+            owned_ids = await self._coalesce(
+                ("owned_nft_ids", wallet_address),
+                lambda: self._get_owned_nft_ids(wallet_address),
+            )
+
+            if owned_ids and isinstance(owned_ids, list):
+                return nft_id in owned_ids
+
+            return False
+
+        except Exception as e:
+            logger.error(f"Error verifying NFT ownership: {e}")
+            return False
+
+    async def _get_owned_nft_ids(self, wallet_address: str) -> Optional[List[int]]:
+        """Fetch the IDs of all ARAssetNFTs held by a wallet."""
+        script = f"""
                 import ARAssetNFT from {self.contract_addresses["ARAssetNFT"]}
                 import NonFungibleToken from 0x1d7e57aa55817448
                 
@@ -107,17 +171,8 @@ class FlowService:
                     return collectionRef.getIDs()
                 }}
             """
-            
-            result = await self._execute_script(script, [{"type": "Address", "value": wallet_address}])
-            
-            if result and isinstance(result, list):
-                return nft_id in result
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error verifying NFT ownership: {e}")
-            return False
+
+        return await self._execute_script(script, [{"type": "Address", "value": wallet_address}])
     
     async def get_nft_metadata(
         self,
@@ -155,16 +210,18 @@ class FlowService:
                 }}
             """
             
-            result = await self._execute_script(
-                script,
-                [
-                    {"type": "Address", "value": owner_address},
-                    {"type": "UInt64", "value": str(nft_id)}
-                ]
+            # Concurrent requests for the same NFT share one script execution
+            return await self._coalesce(
+                ("nft_metadata", nft_id, owner_address),
+                lambda: self._execute_script(
+                    script,
+                    [
+                        {"type": "Address", "value": owner_address},
+                        {"type": "UInt64", "value": str(nft_id)}
+                    ]
+                ),
             )
             
-            return result
-            
         except Exception as e:
             logger.error(f"Error fetching NFT metadata: {e}")
             return None
@@ -440,6 +497,7 @@ class FlowService:
         """
         if contract_name in self.contract_addresses:
             self.contract_addresses[contract_name] = address
+            self.contracts_version += 1
             logger.info(f"Set {contract_name} address to {address}")
         else:
             logger.warning(f"Unknown contract name: {contract_name}")
@@ -509,7 +567,7 @@ class FlowService:
     
     async def close(self):
         """Close HTTP client connections."""
-        await self.http_client.aclose()
+        await self.shutdown()
 
 
 # Singleton instance
@@ -1,7 +1,7 @@
 """Media file handling with S3-compatible storage backend."""
 import os
 import io
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
@@ -34,23 +34,27 @@ class StorageConfig:
             self.use_local_fallback = True
         else:
             self.use_local_fallback = False
+
+        self._s3_client = None
     
     def get_s3_client(self):
-        """Get configured S3 client."""
+        """Get the configured S3 client, created once and shared across threads."""
         if self.use_local_fallback:
             return None
-            
-        try:
-            return boto3.client(
-                's3',
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                region_name=self.region,
-                endpoint_url=self.endpoint_url
-            )
-        except NoCredentialsError:
-            logger.error("AWS credentials not found")
-            return None
+
+        if self._s3_client is None:
+            try:
+                self._s3_client = boto3.client(
+                    's3',
+                    aws_access_key_id=self.access_key,
+                    aws_secret_access_key=self.secret_key,
+                    region_name=self.region,
+                    endpoint_url=self.endpoint_url
+                )
+            except NoCredentialsError:
+                logger.error("AWS credentials not found")
+                return None
+        return self._s3_client
 
 
 # Global storage configuration
@@ -121,28 +125,39 @@ def generate_presigned_url(path: str, expiration: int = 3600) -> str:
     Generate presigned URL for secure media access.
     Falls back to direct URL if S3 is not configured.
     """
+    return generate_presigned_urls([path], expiration)[0]
+
+
+def generate_presigned_urls(paths: List[str], expiration: int = 3600) -> List[str]:
+    """
+    Generate presigned URLs for several media paths with one S3 client.
+    Falls back to direct URLs if S3 is not configured.
+    """
     s3_client = _storage_config.get_s3_client()
     
     if not s3_client or _storage_config.use_local_fallback:
-        # If path already starts with /media/, return as-is, otherwise add prefix
-        if path.startswith('/media/'):
-            return path
-        return f"/media/{path}"
-    
-    try:
-        # For S3, remove /media/ prefix if present since S3 keys don't include it
-        s3_key = path.lstrip('/media/')
-        return s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': _storage_config.bucket_name, 'Key': s3_key},
-            ExpiresIn=expiration
-        )
-    except ClientError as e:
-        logger.error(f"Failed to generate presigned URL: {e}")
-        # Fallback: return path as-is if it starts with /media/, otherwise add prefix
-        if path.startswith('/media/'):
-            return path
-        return f"/media/{path}"
+        return [_local_media_url(path) for path in paths]
+
+    urls = []
+    for path in paths:
+        try:
+            # For S3, remove /media/ prefix if present since S3 keys don't include it
+            urls.append(s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': _storage_config.bucket_name, 'Key': path.removeprefix('/media/')},
+                ExpiresIn=expiration
+            ))
+        except ClientError as e:
+            logger.error(f"Failed to generate presigned URL: {e}")
+            urls.append(_local_media_url(path))
+    return urls
+
+
+def _local_media_url(path: str) -> str:
+    """Direct URL for a media path: as-is if it starts with /media/, otherwise prefixed."""
+    if path.startswith('/media/'):
+        return path
+    return f"/media/{path}"
 
 
 def _save_to_local_fallback(file: MediaFile, path: str) -> str:
@@ -48,6 +48,12 @@ websocket_connections = Gauge(
     'Number of active WebSocket connections'
 )
 
+websocket_dropped_messages = Counter(
+    'ws_dropped_messages_total',
+    'WebSocket messages dropped because the client\'s send queue was full',
+    ['type']
+)
+
 ai_analysis_requests = Counter(
     'ai_analysis_requests_total',
     'Total number of AI analysis requests',
@@ -252,6 +258,11 @@ def track_websocket_connection(delta: int):
     websocket_connections.inc(delta)
 
 
+def track_websocket_drop(message_type: str):
+    """Track a WebSocket message dropped for a slow client."""
+    websocket_dropped_messages.labels(type=message_type).inc()
+
+
 def get_metrics_text() -> str:
     """Get metrics in Prometheus text format."""
     return generate_latest().decode('utf-8')
\ No newline at end of file
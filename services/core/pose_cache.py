@@ -7,11 +7,17 @@ Follows DRY, CLEAN, and MODULAR principles.
 """
 
 from core.table import Table, ColumnDetails
+from core.database import execute_update
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import uuid
 import json
 import hashlib
+import struct
+import zlib
+from itertools import chain
+
+import numpy as np
 from sqlalchemy.dialects.postgresql import JSONB
 
 
@@ -26,12 +32,14 @@ class VideoPoseAnalysis(Table):
     pose_sequences: Dict = ColumnDetails(default_factory=dict)  # Raw pose landmark sequences
     normalized_poses: Dict = ColumnDetails(default_factory=dict)  # Normalized pose sequences
     movement_analysis: Dict = ColumnDetails(default_factory=dict)  # Movement classification
+    pose_encoding: str = ColumnDetails(default="json")  # Storage format of the pose columns
     frame_count: int = ColumnDetails(default=0)
     confidence_avg: float = ColumnDetails(default=0.0)  # Average pose confidence
     processing_time_ms: int = ColumnDetails(default=0)
     file_size_bytes: int = ColumnDetails(default=0)
     created_at: datetime = ColumnDetails(default_factory=datetime.now)
     last_accessed: datetime = ColumnDetails(default_factory=datetime.now)
+    is_stale: bool = ColumnDetails(default=False)  # Marked by cleanup, cleared on access
 
 
 class PoseSequenceMatch(Table):
@@ -40,8 +48,8 @@ class PoseSequenceMatch(Table):
     __tablename__ = "pose_sequence_matches"
 
     id: uuid.UUID = ColumnDetails(default_factory=uuid.uuid4, primary_key=True)
-    sequence_a_hash: str  # Hash of first pose sequence
-    sequence_b_hash: str  # Hash of second pose sequence
+    sequence_a_hash: bytes  # SHA-256 digest of first pose sequence
+    sequence_b_hash: bytes  # SHA-256 digest of second pose sequence
     similarity_score: float  # Similarity score (0.0 to 1.0)
     match_confidence: str = ColumnDetails(default="medium")  # high, medium, low
     algorithm_version: str = ColumnDetails(default="1.0")
@@ -49,6 +57,8 @@ class PoseSequenceMatch(Table):
     created_at: datetime = ColumnDetails(default_factory=datetime.now)
     access_count: int = ColumnDetails(default=1)
     last_accessed: datetime = ColumnDetails(default_factory=datetime.now)
+    is_stale: bool = ColumnDetails(default=False)  # Marked by cleanup, cleared on access
+    stale_rank: Optional[int] = None  # Generated: epoch(last_accessed) - access_count * 3600
 
 
 class SmartOverlayCache(Table):
@@ -67,6 +77,7 @@ class SmartOverlayCache(Table):
     created_at: datetime = ColumnDetails(default_factory=datetime.now)
     access_count: int = ColumnDetails(default=0)
     last_accessed: datetime = ColumnDetails(default_factory=datetime.now)
+    is_stale: bool = ColumnDetails(default=False)  # Marked by cleanup, cleared on access
 
 
 class PoseCacheManager:
@@ -85,12 +96,74 @@ class PoseCacheManager:
     CURRENT_ALGORITHM_VERSION = "1.0"
     CURRENT_CACHE_VERSION = "1.0"
 
+    # Pose columns are stored as zlib-compressed int16 arrays; legacy rows hold JSON text
+    POSE_ENCODING = "i16z1"
+    LEGACY_POSE_ENCODING = "json"
+    RAW_POSE_SCALE = 10000  # Landmarks are in [0, 1] image space
+    NORMALIZED_POSE_SCALE = 1000  # Normalized coords are shoulder-relative and can exceed 1
+
     @staticmethod
-    def generate_sequence_hash(pose_sequence: List[List[float]]) -> str:
+    def generate_sequence_hash(pose_sequence: List[List[float]]) -> bytes:
         """Generate consistent hash for pose sequence (DRY principle)."""
-        # Convert to string representation for hashing
+        # Convert to string representation for hashing; stored as raw 32-byte BYTEA
         sequence_str = json.dumps(pose_sequence, sort_keys=True)
-        return hashlib.sha256(sequence_str.encode()).hexdigest()
+        return hashlib.sha256(sequence_str.encode()).digest()
+
+    @classmethod
+    def canonical_hash_pair(
+        cls, sequence_a: List[List[float]], sequence_b: List[List[float]]
+    ) -> Tuple[bytes, bytes]:
+        """Hash both sequences and return the pair in canonical (a <= b) order."""
+        hash_a = cls.generate_sequence_hash(sequence_a)
+        hash_b = cls.generate_sequence_hash(sequence_b)
+        return (hash_a, hash_b) if hash_a <= hash_b else (hash_b, hash_a)
+
+    @staticmethod
+    def encode_pose_frames(frames: List[List[float]], scale: int) -> bytes:
+        """Quantize pose frames to int16 and compress them for BYTEA storage.
+
+        Layout before compression: frame count (uint32), per-frame value counts
+        (uint16), then all values as int16 multiplied by ``scale``.
+        """
+        lengths = np.fromiter((len(frame) for frame in frames), dtype="<u2", count=len(frames))
+        values = np.fromiter(chain.from_iterable(frames), dtype=np.float64)
+        quantized = np.clip(np.rint(values * scale), -32768, 32767).astype("<i2")
+        payload = struct.pack("<I", len(frames)) + lengths.tobytes() + quantized.tobytes()
+        return zlib.compress(payload, 6)
+
+    @staticmethod
+    def decode_pose_frames(blob: bytes, scale: int) -> List[List[float]]:
+        """Inverse of encode_pose_frames."""
+        payload = zlib.decompress(blob)
+        (frame_count,) = struct.unpack_from("<I", payload)
+        if frame_count == 0:
+            return []
+        lengths = np.frombuffer(payload, dtype="<u2", count=frame_count, offset=4)
+        values = np.frombuffer(payload, dtype="<i2", offset=4 + 2 * frame_count) / scale
+        return [frame.tolist() for frame in np.split(values, np.cumsum(lengths)[:-1])]
+
+    @classmethod
+    def _decode_pose_row(cls, row: Dict) -> Dict:
+        """Decode the BYTEA pose columns of a video_pose_analysis row in place."""
+        if row.get("pose_encoding", cls.LEGACY_POSE_ENCODING) == cls.LEGACY_POSE_ENCODING:
+            for column in ("pose_sequences", "normalized_poses", "movement_analysis"):
+                if row.get(column) is not None:
+                    row[column] = json.loads(bytes(row[column]))
+            return row
+
+        if row.get("pose_sequences") is not None:
+            row["pose_sequences"] = {
+                "sequences": cls.decode_pose_frames(row["pose_sequences"], cls.RAW_POSE_SCALE)
+            }
+        if row.get("normalized_poses") is not None:
+            row["normalized_poses"] = {
+                "normalized": cls.decode_pose_frames(
+                    row["normalized_poses"], cls.NORMALIZED_POSE_SCALE
+                )
+            }
+        if row.get("movement_analysis") is not None:
+            row["movement_analysis"] = json.loads(zlib.decompress(row["movement_analysis"]))
+        return row
 
     @staticmethod
     def format_dimensions(width: int, height: int) -> str:
@@ -115,7 +188,7 @@ class PoseCacheManager:
             if results:
                 # Update access time
                 cls._update_access_time("video_pose_analysis", results[0]["id"])
-                return VideoPoseAnalysis(**results[0])
+                return VideoPoseAnalysis(**cls._decode_pose_row(results[0]))
             return None
 
         except Exception as e:
@@ -144,6 +217,7 @@ class PoseCacheManager:
                 pose_sequences={"sequences": pose_sequences},
                 normalized_poses={"normalized": normalized_poses},
                 movement_analysis=movement_analysis,
+                pose_encoding=cls.POSE_ENCODING,
                 frame_count=frame_count,
                 confidence_avg=confidence_avg,
                 processing_time_ms=processing_time_ms,
@@ -155,30 +229,35 @@ class PoseCacheManager:
                 """
                 INSERT INTO video_pose_analysis
                 (id, video_id, analysis_version, pose_sequences, normalized_poses,
-                 movement_analysis, frame_count, confidence_avg, processing_time_ms,
-                 file_size_bytes, created_at, last_accessed)
+                 movement_analysis, pose_encoding, frame_count, confidence_avg,
+                 processing_time_ms, file_size_bytes, created_at, last_accessed)
                 VALUES (%(id)s, %(video_id)s, %(analysis_version)s, %(pose_sequences)s,
-                        %(normalized_poses)s, %(movement_analysis)s, %(frame_count)s,
-                        %(confidence_avg)s, %(processing_time_ms)s, %(file_size_bytes)s,
-                        NOW(), NOW())
+                        %(normalized_poses)s, %(movement_analysis)s, %(pose_encoding)s,
+                        %(frame_count)s, %(confidence_avg)s, %(processing_time_ms)s,
+                        %(file_size_bytes)s, NOW(), NOW())
                 ON CONFLICT (video_id, analysis_version)
                 DO UPDATE SET
                     pose_sequences = EXCLUDED.pose_sequences,
                     normalized_poses = EXCLUDED.normalized_poses,
                     movement_analysis = EXCLUDED.movement_analysis,
+                    pose_encoding = EXCLUDED.pose_encoding,
                     frame_count = EXCLUDED.frame_count,
                     confidence_avg = EXCLUDED.confidence_avg,
                     processing_time_ms = EXCLUDED.processing_time_ms,
                     file_size_bytes = EXCLUDED.file_size_bytes,
-                    last_accessed = NOW()
+                    last_accessed = NOW(),
+                    is_stale = FALSE
                 """,
                 {
                     "id": analysis.id,
                     "video_id": video_id,
                     "analysis_version": cls.CURRENT_ANALYSIS_VERSION,
-                    "pose_sequences": json.dumps({"sequences": pose_sequences}),
-                    "normalized_poses": json.dumps({"normalized": normalized_poses}),
-                    "movement_analysis": json.dumps(movement_analysis),
+                    "pose_sequences": cls.encode_pose_frames(pose_sequences, cls.RAW_POSE_SCALE),
+                    "normalized_poses": cls.encode_pose_frames(
+                        normalized_poses, cls.NORMALIZED_POSE_SCALE
+                    ),
+                    "movement_analysis": zlib.compress(json.dumps(movement_analysis).encode()),
+                    "pose_encoding": cls.POSE_ENCODING,
                     "frame_count": frame_count,
                     "confidence_avg": confidence_avg,
                     "processing_time_ms": processing_time_ms,
@@ -198,17 +277,15 @@ class PoseCacheManager:
     ) -> Optional[float]:
         """Get cached sequence match result."""
         try:
-            hash_a = cls.generate_sequence_hash(sequence_a)
-            hash_b = cls.generate_sequence_hash(sequence_b)
+            # Pairs are stored in canonical order, so a single probe suffices
+            hash_a, hash_b = cls.canonical_hash_pair(sequence_a, sequence_b)
 
-            # Try both hash orders (A,B and B,A)
             results = PoseSequenceMatch.sql(
                 """
                 SELECT similarity_score FROM pose_sequence_matches
-                WHERE ((sequence_a_hash = %(hash_a)s AND sequence_b_hash = %(hash_b)s) OR
-                       (sequence_a_hash = %(hash_b)s AND sequence_b_hash = %(hash_a)s))
-                AND algorithm_version = %(version)s
-                ORDER BY created_at DESC
+                WHERE algorithm_version = %(version)s
+                AND sequence_a_hash = %(hash_a)s
+                AND sequence_b_hash = %(hash_b)s
                 LIMIT 1
                 """,
                 {"hash_a": hash_a, "hash_b": hash_b, "version": cls.CURRENT_ALGORITHM_VERSION},
@@ -234,8 +311,7 @@ class PoseCacheManager:
     ) -> bool:
         """Cache sequence match result."""
         try:
-            hash_a = cls.generate_sequence_hash(sequence_a)
-            hash_b = cls.generate_sequence_hash(sequence_b)
+            hash_a, hash_b = cls.canonical_hash_pair(sequence_a, sequence_b)
 
             # Determine confidence level
             confidence = (
@@ -266,7 +342,8 @@ class PoseCacheManager:
                     match_confidence = EXCLUDED.match_confidence,
                     computation_time_ms = EXCLUDED.computation_time_ms,
                     access_count = pose_sequence_matches.access_count + 1,
-                    last_accessed = NOW()
+                    last_accessed = NOW(),
+                    is_stale = FALSE
                 """,
                 {
                     "id": match_record.id,
@@ -366,7 +443,8 @@ class PoseCacheManager:
                     placement_suggestions = EXCLUDED.placement_suggestions,
                     analysis_metadata = EXCLUDED.analysis_metadata,
                     confidence_score = EXCLUDED.confidence_score,
-                    last_accessed = NOW()
+                    last_accessed = NOW(),
+                    is_stale = FALSE
                 """,
                 {
                     "id": overlay_cache.id,
@@ -388,39 +466,54 @@ class PoseCacheManager:
 
     @classmethod
     def cleanup_expired_cache(cls) -> Dict[str, int]:
-        """Clean up expired cache entries (PERFORMANT principle)."""
-        try:
-            cleanup_stats = {"pose_analysis": 0, "sequence_matches": 0, "overlay_cache": 0}
-
-            # Clean up expired pose analysis
-            pose_cutoff = datetime.now() - timedelta(days=cls.POSE_ANALYSIS_TTL_DAYS)
-            result = VideoPoseAnalysis.sql(
-                "DELETE FROM video_pose_analysis WHERE last_accessed < %(cutoff)s",
-                {"cutoff": pose_cutoff},
-            )
-            cleanup_stats["pose_analysis"] = result.get("rowcount", 0)
+        """
+        Clean up expired cache entries (PERFORMANT principle).
+
+        Eviction is two-pass: rows past their TTL are first marked stale, then
+        deleted on the next run if nothing touched them in between (any access
+        clears the flag). The delete only walks the small partial index over
+        stale rows instead of the whole table.
+        """
+        cleanup_stats = {"pose_analysis": 0, "sequence_matches": 0, "overlay_cache": 0}
+        ttl_days = {
+            "pose_analysis": cls.POSE_ANALYSIS_TTL_DAYS,
+            "sequence_matches": cls.SEQUENCE_MATCH_TTL_DAYS,
+            "overlay_cache": cls.OVERLAY_CACHE_TTL_DAYS,
+        }
+        tables = {
+            "pose_analysis": "video_pose_analysis",
+            "sequence_matches": "pose_sequence_matches",
+            "overlay_cache": "smart_overlay_cache",
+        }
+        # stale_rank <= epoch(last_accessed), so this bound lets the BRIN index prune
+        sweep_bounds = {
+            "sequence_matches": "AND stale_rank < EXTRACT(EPOCH FROM %(cutoff)s::timestamp)",
+        }
 
-            # Clean up expired sequence matches
-            match_cutoff = datetime.now() - timedelta(days=cls.SEQUENCE_MATCH_TTL_DAYS)
-            result = PoseSequenceMatch.sql(
-                "DELETE FROM pose_sequence_matches WHERE last_accessed < %(cutoff)s",
-                {"cutoff": match_cutoff},
-            )
-            cleanup_stats["sequence_matches"] = result.get("rowcount", 0)
-
-            # Clean up expired overlay cache
-            overlay_cutoff = datetime.now() - timedelta(days=cls.OVERLAY_CACHE_TTL_DAYS)
-            result = SmartOverlayCache.sql(
-                "DELETE FROM smart_overlay_cache WHERE last_accessed < %(cutoff)s",
-                {"cutoff": overlay_cutoff},
-            )
-            cleanup_stats["overlay_cache"] = result.get("rowcount", 0)
+        try:
+            for key, table_name in tables.items():
+                cutoff = datetime.now() - timedelta(days=ttl_days[key])
+
+                # Evict rows marked on a previous run and not accessed since
+                cleanup_stats[key] = execute_update(
+                    f"DELETE FROM {table_name} WHERE is_stale AND last_accessed < %(cutoff)s",
+                    {"cutoff": cutoff},
+                )
+
+                # Mark newly expired rows for the next run
+                execute_update(
+                    f"""
+                    UPDATE {table_name} SET is_stale = TRUE
+                    WHERE NOT is_stale AND last_accessed < %(cutoff)s {sweep_bounds.get(key, "")}
+                    """,
+                    {"cutoff": cutoff},
+                )
 
             return cleanup_stats
 
         except Exception as e:
             print(f"Error cleaning up cache: {e}")
-            return {"pose_analysis": 0, "sequence_matches": 0, "overlay_cache": 0}
+            return cleanup_stats
 
     @staticmethod
     def _calculate_average_confidence(pose_sequences: List[List[float]]) -> float:
@@ -447,23 +540,25 @@ class PoseCacheManager:
             from core.database import execute_query
 
             execute_query(
-                f"UPDATE {table_name} SET last_accessed = NOW() WHERE id = %s", (record_id,)
+                f"UPDATE {table_name} SET last_accessed = NOW(), is_stale = FALSE WHERE id = %s",
+                (record_id,),
             )
         except Exception as e:
             print(f"Error updating access time: {e}")
 
-    @staticmethod
-    def _update_sequence_match_access(hash_a: str, hash_b: str):
-        """Update sequence match access statistics."""
+    @classmethod
+    def _update_sequence_match_access(cls, hash_a: bytes, hash_b: bytes):
+        """Update sequence match access statistics for a canonical hash pair."""
         try:
             PoseSequenceMatch.sql(
                 """
                 UPDATE pose_sequence_matches
-                SET access_count = access_count + 1, last_accessed = NOW()
-                WHERE (sequence_a_hash = %(hash_a)s AND sequence_b_hash = %(hash_b)s) OR
-                      (sequence_a_hash = %(hash_b)s AND sequence_b_hash = %(hash_a)s)
+                SET access_count = access_count + 1, last_accessed = NOW(), is_stale = FALSE
+                WHERE algorithm_version = %(version)s
+                AND sequence_a_hash = %(hash_a)s
+                AND sequence_b_hash = %(hash_b)s
                 """,
-                {"hash_a": hash_a, "hash_b": hash_b},
+                {"hash_a": hash_a, "hash_b": hash_b, "version": cls.CURRENT_ALGORITHM_VERSION},
             )
         except Exception as e:
             print(f"Error updating sequence match access: {e}")
@@ -475,7 +570,7 @@ class PoseCacheManager:
             SmartOverlayCache.sql(
                 """
                 UPDATE smart_overlay_cache
-                SET access_count = access_count + 1, last_accessed = NOW()
+                SET access_count = access_count + 1, last_accessed = NOW(), is_stale = FALSE
                 WHERE video_id = %(video_id)s
                 AND overlay_type = %(overlay_type)s
                 AND overlay_dimensions = %(dimensions)s
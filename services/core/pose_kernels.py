@@ -0,0 +1,59 @@
+"""
+Per-frame pose arithmetic compiled with Numba when it is installed.
+
+VideoAnalyzer runs these on every analyzed frame. With numba (the "jit"
+extra) they are compiled to native code on first use and cached on disk;
+without it the same NumPy code runs as plain Python.
+"""
+
+import numpy as np
+
+# Numba import with fallback to plain NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+# classify_movement codes, indexed by the returned int
+MOVEMENT_TYPES = ("low_activity", "moderate_activity", "high_activity")
+
+# stable_regions bits
+TORSO_REGION = 1
+HEAD_REGION = 2
+
+
+@njit(cache=True)
+def pose_confidence(landmarks: np.ndarray) -> float:
+    """Mean visibility of raw landmarks laid out as (x, y, z, visibility)."""
+    return landmarks[3::4].mean()
+
+
+@njit(cache=True)
+def classify_movement(normalized_pose: np.ndarray) -> int:
+    """Index into MOVEMENT_TYPES from the spread of the arm coordinates."""
+    limb_spread = np.abs(normalized_pose[6:14]).sum()
+    if limb_spread > 3.0:
+        return 2
+    elif limb_spread > 1.5:
+        return 1
+    return 0
+
+
+@njit(cache=True)
+def stable_regions(normalized_pose: np.ndarray) -> int:
+    """Bitmask of TORSO_REGION and HEAD_REGION for a normalized pose."""
+    regions = 0
+    # Shoulder x difference
+    if abs(normalized_pose[2] - normalized_pose[4]) < 0.5:
+        regions |= TORSO_REGION
+    # Nose y position close to center
+    if abs(normalized_pose[1]) < 0.3:
+        regions |= HEAD_REGION
+    return regions
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from functools import lru_cache
 from uuid import UUID
 from datetime import datetime, timedelta
 from core.user import User
@@ -9,6 +10,18 @@ from core.collaborations import Collaboration
 from core.ai_analysis_service import get_smart_overlay_recommendations, analyze_video_for_overlays
 import json
 
+
+@lru_cache(maxsize=4096)
+def _tag_set(tags: Optional[str]) -> FrozenSet[str]:
+    """Lowercased tags of a comma-separated tag string, as tags_arr holds them.
+
+    The same assets come back across scoring calls, so each string is split once.
+    """
+    if not tags:
+        return frozenset()
+    return frozenset(filter(None, (tag.strip() for tag in tags.lower().split(','))))
+
+
 class SmartRecommendationEngine:
     """Intelligent overlay recommendation system with learning capabilities."""
     
@@ -26,11 +39,12 @@ class SmartRecommendationEngine:
         user_profile = self._build_user_profile(user)
         
         # Apply personalization scoring
+        user_tags = frozenset(user_profile.get('preferred_tags', []))
         personalized_recs = []
         for rec in ai_recommendations:
             # Calculate personalized score
             rec['personalization_score'] = self._calculate_personalization_score(
-                rec, user_profile
+                rec, user_profile, user_tags
             )
             
             # Enhance reasoning with personal context
@@ -208,12 +222,12 @@ class SmartRecommendationEngine:
             'profile_strength': min(len(collaboration_patterns) / 10, 1.0)  # 0-1 based on experience
         }
     
-    def _calculate_personalization_score(self, recommendation: Dict, user_profile: Dict) -> float:
+    def _calculate_personalization_score(self, recommendation: Dict, user_profile: Dict, user_tags: FrozenSet[str]) -> float:
         """Calculate how well a recommendation matches user preferences."""
         
         score = 0.0
         asset = recommendation.get('asset', {})
-        asset_tags = asset.get('tags', '').lower().split(',') if asset.get('tags') else []
+        asset_tags = _tag_set(asset.get('tags'))
         
         # Category matching
         asset_category = asset.get('category', '')
@@ -221,8 +235,7 @@ class SmartRecommendationEngine:
             score += 0.3
         
         # Tag matching
-        user_tags = user_profile.get('preferred_tags', [])
-        tag_overlap = len(set(asset_tags) & set(user_tags))
+        tag_overlap = len(asset_tags & user_tags)
         if user_tags:
             score += (tag_overlap / len(user_tags)) * 0.4
         
@@ -304,7 +317,7 @@ class SmartRecommendationEngine:
     def _find_style_similar_assets(self, reference_asset: ArtistAsset, analysis: Dict, limit: int) -> List[Dict]:
         """Find assets with similar style to reference asset."""
         
-        reference_tags = set(reference_asset.tags.lower().split(',')) if reference_asset.tags else set()
+        reference_tags = _tag_set(reference_asset.tags)
         reference_category = reference_asset.category
         reference_type = reference_asset.asset_type
         
@@ -334,7 +347,7 @@ class SmartRecommendationEngine:
         # Calculate similarity scores
         scored_assets = []
         for asset_data in similar_assets_data:
-            asset_tags = set(asset_data.get('tags', '').lower().split(',')) if asset_data.get('tags') else set()
+            asset_tags = _tag_set(asset_data.get('tags'))
             
             # Calculate similarity
             similarity_score = 0.0
@@ -369,7 +382,7 @@ class SmartRecommendationEngine:
         
         return scored_assets[:limit]
     
-    def _identify_matching_attributes(self, reference_asset: ArtistAsset, asset_data: Dict, ref_tags: set, asset_tags: set) -> List[str]:
+    def _identify_matching_attributes(self, reference_asset: ArtistAsset, asset_data: Dict, ref_tags: FrozenSet[str], asset_tags: FrozenSet[str]) -> List[str]:
         """Identify what makes assets similar."""
         
         attributes = []
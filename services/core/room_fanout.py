@@ -0,0 +1,150 @@
+"""
+Redis pub/sub fan-out of collaboration broadcasts across API workers.
+
+Each worker only holds its own WebSocket connections. A broadcast is
+delivered to local sockets straight away and published to Redis, and every
+other worker delivers it to the sockets it holds for that room. When
+REDIS_URL is unset or redis is not installed the fan-out is disabled and
+broadcasts stay local, which is all a single worker needs.
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Callable, Optional, Tuple
+from loguru import logger
+
+# Redis import with fallback for testing
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# One channel per room keeps each room's messages in order
+CHANNEL_PREFIX = "ws:room:"
+# Publishes waiting for Redis before new ones are dropped
+OUTBOX_SIZE = 10000
+# Publishes sent per pipeline round trip
+PUBLISH_BATCH_SIZE = 500
+RESUBSCRIBE_DELAY_SECONDS = 5
+
+# (collaboration_id, frame text, exclude_user, message type)
+Deliver = Callable[[str, str, Optional[str], str], None]
+
+
+class RoomFanout:
+    """Relays encoded room broadcasts between workers over Redis pub/sub."""
+
+    def __init__(self, deliver: Deliver):
+        self.deliver = deliver
+        self.worker_id = uuid.uuid4().hex
+        self._redis = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._publish_failing = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._outbox is not None
+
+    async def start(self):
+        """Connect to Redis and start the publisher and subscriber tasks."""
+        if not (REDIS_AVAILABLE and REDIS_URL) or self.enabled:
+            return
+
+        self._redis = aioredis.from_url(REDIS_URL)
+        self._outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self._tasks = [
+            asyncio.create_task(self._publisher()),
+            asyncio.create_task(self._subscriber()),
+        ]
+        logger.info(f"WebSocket fan-out over Redis enabled for worker {self.worker_id}")
+
+    async def stop(self):
+        """Stop relaying and close the Redis connection."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._outbox = None
+
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def publish(self, collaboration_id: str, text: str, exclude_user: Optional[str] = None,
+                message_type: str = ""):
+        """Queue an already delivered broadcast for the other workers."""
+        if self._outbox is None:
+            return
+
+        try:
+            self._outbox.put_nowait(
+                (CHANNEL_PREFIX + collaboration_id, self.encode_envelope(text, exclude_user, message_type))
+            )
+        except asyncio.QueueFull:
+            logger.warning(f"WebSocket fan-out backlog full, dropping broadcast to {collaboration_id}")
+
+    def encode_envelope(self, text: str, exclude_user: Optional[str], message_type: str = "") -> bytes:
+        """Prefix the encoded frame with the origin worker, excluded user and message type."""
+        return f"{self.worker_id}\n{exclude_user or ''}\n{message_type}\n{text}".encode()
+
+    @staticmethod
+    def decode_envelope(data: bytes) -> Tuple[str, Optional[str], str, str]:
+        """Split an envelope into (origin worker, excluded user, message type, frame text)."""
+        origin, exclude_user, message_type, text = data.decode().split("\n", 3)
+        return origin, exclude_user or None, message_type, text
+
+    def handle_message(self, channel: bytes, data: bytes):
+        """Deliver a broadcast published by another worker to local sockets."""
+        origin, exclude_user, message_type, text = self.decode_envelope(data)
+        if origin == self.worker_id:
+            return
+
+        collaboration_id = channel.decode()[len(CHANNEL_PREFIX):]
+        self.deliver(collaboration_id, text, exclude_user, message_type)
+
+    async def _publisher(self):
+        """Publish queued broadcasts, pipelining whatever has piled up."""
+        outbox = self._outbox
+        while True:
+            channel, data = await outbox.get()
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.publish(channel, data)
+            for _ in range(PUBLISH_BATCH_SIZE - 1):
+                if outbox.empty():
+                    break
+                pipe.publish(*outbox.get_nowait())
+
+            try:
+                await pipe.execute()
+                if self._publish_failing:
+                    logger.info("WebSocket fan-out publishing recovered")
+                    self._publish_failing = False
+            except Exception as e:
+                if not self._publish_failing:
+                    logger.warning(f"WebSocket fan-out publish failed: {e}")
+                    self._publish_failing = True
+
+    async def _subscriber(self):
+        """Receive other workers' broadcasts, resubscribing after errors."""
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                async for item in pubsub.listen():
+                    try:
+                        self.handle_message(item["channel"], item["data"])
+                    except Exception as e:
+                        logger.error(f"Error delivering fanned-out broadcast: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket fan-out subscription lost: {e}")
+                await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+            finally:
+                await pubsub.aclose()
@@ -21,12 +21,16 @@ class Table(BaseModel):
         arbitrary_types_allowed = True
     
     @classmethod
-    def sql(cls, query: str, params: Dict = None) -> List[Dict]:
-        """Execute a SQL query and return results."""
+    def sql(cls, query: str, params: Dict = None, prepare: Optional[bool] = None) -> List[Dict]:
+        """Execute a SQL query and return results.
+
+        prepare=True prepares the statement on first use on each connection,
+        for fixed query texts that run often.
+        """
         if params:
-            result = execute_query(query, params)
+            result = execute_query(query, params, prepare=prepare)
         else:
-            result = execute_query(query)
+            result = execute_query(query, prepare=prepare)
 
         # Results are already dictionaries from execute_query
         if result:
@@ -1,4 +1,4 @@
-from typing import Dict, List, Set, Optional
+from typing import Callable, Dict, List, Set, Optional, Tuple
 from uuid import UUID
 import json
 from datetime import datetime
@@ -13,8 +13,19 @@ class ConnectionManager:
         self.collaboration_rooms: Dict[str, Set[str]] = {}
         # user_id -> connection info
         self.user_connections: Dict[str, Dict] = {}
+        # user_id -> entry listed by get_collaboration_users
+        self.presence_entries: Dict[str, Dict] = {}
+        # collaboration_id -> cached get_collaboration_users() result, dropped
+        # whenever someone joins or leaves
+        self.room_user_lists: Dict[str, List[Dict]] = {}
         # collaboration_id -> recent activity
         self.collaboration_activity: Dict[str, List[Dict]] = {}
+        # collaboration_id -> latest pending cursor update per user, and overlay
+        # update per (user, overlay), sent as one batch per room on each flush
+        self.pending_cursors: Dict[str, Dict[str, Dict]] = {}
+        self.pending_overlays: Dict[str, Dict[Tuple[str, Optional[str]], Dict]] = {}
+        # Delivers a message to connected sockets; registered by the WebSocket routes
+        self.broadcaster: Optional[Callable[[str, Dict, Optional[str]], None]] = None
     
     def join_collaboration(self, collaboration_id: str, user_id: str, user_info: Dict):
         """Add user to collaboration room."""
@@ -23,12 +34,25 @@ class ConnectionManager:
             self.collaboration_rooms[collaboration_id] = set()
         
         self.collaboration_rooms[collaboration_id].add(user_id)
+        
+        previous = self.user_connections.get(user_id)
+        if previous:
+            self.room_user_lists.pop(previous['collaboration_id'], None)
+        
+        now = datetime.now().isoformat()
         self.user_connections[user_id] = {
             'collaboration_id': collaboration_id,
             'user_info': user_info,
-            'joined_at': datetime.now().isoformat(),
-            'last_seen': datetime.now().isoformat()
+            'joined_at': now,
+            'last_seen': now
+        }
+        self.presence_entries[user_id] = {
+            'user_id': user_id,
+            'user_info': user_info,
+            'joined_at': now,
+            'last_seen': now
         }
+        self.room_user_lists.pop(collaboration_id, None)
         
         # Notify other users in the room
         self._broadcast_to_collaboration(
@@ -45,6 +69,8 @@ class ConnectionManager:
     def leave_collaboration(self, collaboration_id: str, user_id: str):
         """Remove user from collaboration room."""
         
+        self.room_user_lists.pop(collaboration_id, None)
+        
         if collaboration_id in self.collaboration_rooms:
             self.collaboration_rooms[collaboration_id].discard(user_id)
             
@@ -53,8 +79,10 @@ class ConnectionManager:
                 del self.collaboration_rooms[collaboration_id]
         
         if user_id in self.user_connections:
-            user_info = self.user_connections[user_id]['user_info']
-            del self.user_connections[user_id]
+            connection_info = self.user_connections.pop(user_id)
+            user_info = connection_info['user_info']
+            self.presence_entries.pop(user_id, None)
+            self.room_user_lists.pop(connection_info['collaboration_id'], None)
             
             # Notify other users
             self._broadcast_to_collaboration(
@@ -92,6 +120,52 @@ class ConnectionManager:
         
         self._broadcast_to_collaboration(collaboration_id, message, exclude_user=user_id)
     
+    def queue_overlay_update(self, collaboration_id: str, user_id: str, overlay_data: Dict):
+        """Hold an overlay update for the next batch, replacing an older one for the same overlay."""
+        
+        overlay_id = overlay_data.get('id') or overlay_data.get('overlay_id')
+        self.pending_overlays.setdefault(collaboration_id, {})[(user_id, overlay_id)] = {
+            'type': 'overlay_updated',
+            'user_id': user_id,
+            'overlay_data': overlay_data,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def queue_cursor_position(self, collaboration_id: str, user_id: str, cursor_data: Dict):
+        """Hold a cursor update for the next batch, replacing the user's older one."""
+        
+        self.pending_cursors.setdefault(collaboration_id, {})[user_id] = {
+            'type': 'cursor_updated',
+            'user_id': user_id,
+            'cursor_data': cursor_data,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def flush_pending_updates(self):
+        """Broadcast held cursor and overlay updates as one batch message per room.
+        
+        Batches include the sender's own updates; clients skip entries with
+        their own user_id.
+        """
+        
+        cursors, self.pending_cursors = self.pending_cursors, {}
+        overlays, self.pending_overlays = self.pending_overlays, {}
+        
+        for collaboration_id, updates in cursors.items():
+            self._broadcast_to_collaboration(
+                collaboration_id,
+                {'type': 'cursor_batch', 'updates': list(updates.values())}
+            )
+        
+        for collaboration_id, updates in overlays.items():
+            messages = list(updates.values())
+            self._broadcast_to_collaboration(
+                collaboration_id,
+                {'type': 'overlay_batch', 'updates': messages}
+            )
+            for message in messages:
+                self._add_to_activity(collaboration_id, message)
+    
     def broadcast_chat_message(self, collaboration_id: str, user_id: str, message_text: str):
         """Broadcast chat messages to collaboration room."""
         
@@ -120,22 +194,25 @@ class ConnectionManager:
         self._broadcast_to_collaboration(collaboration_id, message)
     
     def get_collaboration_users(self, collaboration_id: str) -> List[Dict]:
-        """Get list of users currently in collaboration room."""
+        """Get list of users currently in collaboration room.
+        
+        The list is cached until the next join or leave and shared between
+        callers, so it must not be modified.
+        """
+        
+        users = self.room_user_lists.get(collaboration_id)
+        if users is not None:
+            return users
         
         if collaboration_id not in self.collaboration_rooms:
             return []
         
-        users = []
-        for user_id in self.collaboration_rooms[collaboration_id]:
-            if user_id in self.user_connections:
-                connection_info = self.user_connections[user_id]
-                users.append({
-                    'user_id': user_id,
-                    'user_info': connection_info['user_info'],
-                    'joined_at': connection_info['joined_at'],
-                    'last_seen': connection_info['last_seen']
-                })
-        
+        users = [
+            self.presence_entries[user_id]
+            for user_id in self.collaboration_rooms[collaboration_id]
+            if user_id in self.presence_entries
+        ]
+        self.room_user_lists[collaboration_id] = users
         return users
     
     def get_recent_activity(self, collaboration_id: str, limit: int = 50) -> List[Dict]:
@@ -147,12 +224,20 @@ class ConnectionManager:
     def update_user_presence(self, user_id: str):
         """Update user's last seen timestamp."""
         
-        if user_id in self.user_connections:
-            self.user_connections[user_id]['last_seen'] = datetime.now().isoformat()
+        connection_info = self.user_connections.get(user_id)
+        if connection_info:
+            now = datetime.now().isoformat()
+            connection_info['last_seen'] = now
+            # Cached user lists hold this entry, so they stay current
+            self.presence_entries[user_id]['last_seen'] = now
     
     def _broadcast_to_collaboration(self, collaboration_id: str, message: Dict, exclude_user: Optional[str] = None):
         """Internal method to broadcast message to all users in collaboration."""
         
+        if self.broadcaster:
+            self.broadcaster(collaboration_id, message, exclude_user)
+            return
+        
         if collaboration_id not in self.collaboration_rooms:
             return
         
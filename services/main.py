@@ -8,5 +8,7 @@ if __name__ == "__main__":
         port=8000,
         reload=True,
         workers=1,
+        loop="uvloop",
+        http="httptools",
         log_level="info",
     )
\ No newline at end of file
@@ -25,6 +25,10 @@ def get_server_config():
         "limit_concurrency": 1000,
         "limit_max_requests": 10000,
         "timeout_keep_alive": 5,
+        # Collaboration frames are small JSON that deflate barely shrinks, and
+        # Starlette can't send a broadcast precompressed once, so compressing
+        # per connection only costs CPU and a zlib context per socket
+        "ws_per_message_deflate": os.getenv("WS_PER_MESSAGE_DEFLATE", "false").lower() == "true",
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+"""
+Optional mypyc build of the WebSocket hot path.
+
+Package metadata lives in pyproject.toml; this file only adds C extensions
+when MYPYC_COMPILE=1. mypy must then be installed in the build environment:
+
+    pip install mypy
+    MYPYC_COMPILE=1 pip install --no-build-isolation .
+
+The compiled modules are drop-in replacements for the .py files, so runtime
+dependencies are unchanged and a plain `pip install .` still works.
+"""
+import os
+
+from setuptools import setup
+
+# Modules compiled to C extensions
+MYPYC_MODULES = [
+    "api/websocket_routes.py",
+    "core/access.py",
+]
+
+ext_modules = []
+if os.getenv("MYPYC_COMPILE") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify([
+        # api has no __init__.py, so name modules from this directory
+        "--explicit-package-bases",
+        "--ignore-missing-imports",
+        "--follow-imports=silent",
+        *MYPYC_MODULES,
+    ])
+
+setup(ext_modules=ext_modules)
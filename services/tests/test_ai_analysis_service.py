@@ -0,0 +1,791 @@
+"""
+Test suite for the pose-driven heuristics in VideoAnalyzer.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from types import SimpleNamespace
+
+import cv2
+import httpx
+import numpy as np
+import pytest
+
+from core import ai_analysis_service, analysis_cache, asset_service
+from core.ai_analysis_service import VideoAnalyzer, analyze_video_for_overlays
+from core.user import User
+from core.artist_assets import ArtistAsset
+from core.videos import Video
+
+# nose, shoulders, elbows, wrists as (x, y, z, visibility)
+POSE_LANDMARKS = [
+    0.5, 0.2, 0.0, 0.9,
+    0.3, 0.4, 0.0, 0.9,
+    0.7, 0.4, 0.0, 0.9,
+    0.2, 0.6, 0.0, 0.8,
+    0.8, 0.6, 0.0, 0.8,
+    0.1, 0.8, 0.0, 0.7,
+    0.9, 0.8, 0.0, 0.7,
+]
+
+
+class TestPoseHeuristics:
+    """Test overlay zones and bounding boxes derived from pose landmarks."""
+
+    def setup_method(self):
+        # These heuristics never touch MediaPipe, so skip loading the model
+        self.analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+    def test_safe_overlay_zones_surround_person(self):
+        """Test that the avoid area pads the landmark extent and safe areas lie outside it."""
+        zones = self.analyzer._calculate_safe_overlay_zones_from_pose(POSE_LANDMARKS, 1280, 960)
+
+        assert zones == {
+            "safe_areas": [[0, 0, 1280, 172], [1172, 0, 108, 960], [0, 788, 1280, 172]],
+            "avoid_areas": [[78, 142, 1124, 676]],
+        }
+
+    def test_short_pose_uses_default_zones(self):
+        """Test that incomplete landmarks fall back to the default zones."""
+        zones = self.analyzer._calculate_safe_overlay_zones_from_pose(POSE_LANDMARKS[:20], 640, 480)
+
+        assert zones["avoid_areas"] == [[200, 150, 240, 180]]
+
+    def test_person_bbox_from_normalized_pose(self):
+        """Test that the bbox spans the normalized x and y extents plus padding."""
+        normalized = [0.3, 0.2] + [0.5, 0.5] * 9 + [0.7, 0.6]
+
+        assert self.analyzer._estimate_person_bbox_from_pose(normalized, 100, 100) == [20, 10, 60, 60]
+
+    def test_pose_confidence_is_mean_visibility(self):
+        """Test that confidence averages the visibility of every landmark."""
+        assert self.analyzer._calculate_pose_confidence(POSE_LANDMARKS) == pytest.approx(5.7 / 7)
+        assert self.analyzer._calculate_pose_confidence(POSE_LANDMARKS[:20]) == 0.0
+
+    def test_movement_classification_thresholds(self):
+        """Test that arm spread maps onto the three activity levels."""
+        def pose_with_arm_spread(value):
+            return [0.0] * 6 + [value / 8] * 8 + [0.0] * 8
+
+        assert self.analyzer._classify_pose_movement(pose_with_arm_spread(1.0)) == "low_activity"
+        assert self.analyzer._classify_pose_movement(pose_with_arm_spread(2.0)) == "moderate_activity"
+        assert self.analyzer._classify_pose_movement(pose_with_arm_spread(-4.0)) == "high_activity"
+        assert self.analyzer._classify_pose_movement([0.0] * 10) == "unknown"
+
+    def test_stable_body_regions(self):
+        """Test torso and head stability checks on a normalized pose."""
+        pose = [0.0] * 22
+        assert self.analyzer._identify_stable_body_regions(pose) == ["torso", "head_area"]
+
+        pose[1], pose[4] = 0.5, 1.0
+        assert self.analyzer._identify_stable_body_regions(pose) == []
+
+
+class TestKeyFrameExtraction:
+    """Test evenly spaced frame extraction from a video file."""
+
+    def _write_video(self, path, num_frames):
+        """Write a video whose frame i is filled with brightness 10 * i."""
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+        if not writer.isOpened():
+            pytest.skip("OpenCV cannot write MJPG video here")
+        for i in range(num_frames):
+            writer.write(np.full((48, 64, 3), 10 * i, dtype=np.uint8))
+        writer.release()
+
+    def test_extracts_evenly_spaced_frames_in_order(self, tmp_path):
+        """Test that the first, middle and last frames come back in order."""
+        video_path = tmp_path / "clip.avi"
+        self._write_video(video_path, 20)
+
+        frames = VideoAnalyzer.__new__(VideoAnalyzer)._extract_key_frames(str(video_path), 3)
+
+        # Frames 0, 9 and 19, allowing for JPEG loss
+        assert [round(frame.mean() / 10) for frame in frames] == [0, 9, 19]
+
+    def test_short_video_repeats_frames(self, tmp_path):
+        """Test that a video shorter than num_frames still yields num_frames frames."""
+        video_path = tmp_path / "short.avi"
+        self._write_video(video_path, 2)
+
+        frames = VideoAnalyzer.__new__(VideoAnalyzer)._extract_key_frames(str(video_path), 3)
+
+        assert [round(frame.mean() / 10) for frame in frames] == [0, 0, 1]
+
+    def test_poses_line_up_with_frames(self, tmp_path):
+        """Test that pose extraction sees every decoded frame, in order."""
+        video_path = tmp_path / "clip.avi"
+        self._write_video(video_path, 20)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        analyzer._extract_pose_landmarks_from_frame = lambda frame: [round(frame.mean() / 10)]
+
+        frames, poses = analyzer._extract_key_frames_with_poses(str(video_path), 3)
+
+        assert len(frames) == 3
+        assert poses == [[0], [9], [19]]
+
+    @pytest.mark.skipif(not ai_analysis_service.FFMPEG_PATH, reason="ffmpeg is not installed")
+    def test_ffmpeg_seeks_to_the_same_frames(self, tmp_path):
+        """Test that the single ffmpeg pass yields the frames decoding forward does."""
+        video_path = tmp_path / "clip.avi"
+        self._write_video(video_path, 20)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        frames = list(analyzer._iter_key_frames_ffmpeg(str(video_path), 3, 64, 48, 20, 10.0))
+        short = list(analyzer._iter_key_frames_ffmpeg(str(video_path), 3, 64, 48, 2, 10.0))
+
+        assert [round(frame.mean() / 10) for frame in frames] == [0, 9, 19]
+        assert [round(frame.mean() / 10) for frame in short] == [0, 0, 1]
+
+    def test_probe_reports_upright_frame_size(self, monkeypatch):
+        """Test that rotated videos swap edges and a missing frame count comes from the duration."""
+        probe = {
+            "streams": [{
+                "width": 1920, "height": 1080, "avg_frame_rate": "30000/1001",
+                "side_data_list": [{"rotation": -90}],
+            }],
+            "format": {"duration": "2.002"},
+        }
+        monkeypatch.setattr(
+            ai_analysis_service.subprocess,
+            "run",
+            lambda *args, **kwargs: SimpleNamespace(stdout=json.dumps(probe).encode()),
+        )
+
+        assert VideoAnalyzer._probe_video("clip.mp4") == (1080, 1920, 60, pytest.approx(29.97, abs=0.01))
+
+    def test_unreadable_video_yields_no_frames(self, tmp_path):
+        """Test that a file OpenCV cannot open produces no frames or poses."""
+        video_path = tmp_path / "broken.avi"
+        video_path.write_bytes(b"not a video")
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        assert analyzer._extract_key_frames_with_poses(str(video_path), 3) == ([], [])
+
+
+class TestPoseLandmarkCache:
+    """Test that MediaPipe runs once per distinct frame."""
+
+    def test_repeated_frame_reuses_cached_landmarks(self, monkeypatch):
+        """Test that a frame seen before is served from the cache, including 'no pose'."""
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+        calls = []
+
+        def fake_extract(frame):
+            calls.append(frame)
+            return [0.5, 0.25, 0.0, 0.75] * 7 if frame.any() else []
+
+        monkeypatch.setattr(ai_analysis_service, "extract_pose_from_rgb_image", fake_extract)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        person = np.full((48, 64, 3), 7, dtype=np.uint8)
+        empty = np.zeros((48, 64, 3), dtype=np.uint8)
+
+        first = analyzer._extract_pose_landmarks_from_frame(person)
+        assert analyzer._extract_pose_landmarks_from_frame(person.copy()) == first
+        assert analyzer._extract_pose_landmarks_from_frame(empty) == []
+        assert analyzer._extract_pose_landmarks_from_frame(empty) == []
+        assert len(calls) == 2
+
+
+class TestProviderFrameAnalysis:
+    """Test batching frames into one vision provider request."""
+
+    def _provider(self, monkeypatch, replies):
+        """Route provider requests to canned chat replies, recording each request."""
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            reply = replies[min(len(requests), len(replies)) - 1]
+            return httpx.Response(200, json={"choices": [{"message": {"content": reply}}]})
+
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+        monkeypatch.setattr(
+            ai_analysis_service, "_http_client", httpx.Client(transport=httpx.MockTransport(handler))
+        )
+        return requests
+
+    def _frames(self, count):
+        return [np.full((48, 64, 3), 10 * i, dtype=np.uint8) for i in range(count)]
+
+    def test_frames_share_one_request(self, monkeypatch):
+        """Test that every frame goes in a single request and replies keep frame order."""
+        requests = self._provider(
+            monkeypatch, ['Here you go: [{"mood": "calm"}, {"mood": "tense"}, {"mood": "joyful"}]']
+        )
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        analyses = analyzer._analyze_frames_batched(self._frames(3), [0.0, 5.0, 10.0])
+
+        assert len(requests) == 1
+        images = [c for c in requests[0]["messages"][1]["content"] if c["type"] == "image_url"]
+        assert len(images) == 3
+        assert [(a["mood"], a["timestamp"]) for a in analyses] == [
+            ("calm", 0.0), ("tense", 5.0), ("joyful", 10.0)
+        ]
+
+    def test_unparseable_batch_falls_back_to_one_request_per_frame(self, monkeypatch):
+        """Test that a batch reply of the wrong shape is retried frame by frame."""
+        requests = self._provider(
+            monkeypatch, ['[{"mood": "calm"}]', '{"mood": "calm"}', "not json", '[{"mood": "joyful"}]']
+        )
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        analyses = analyzer._analyze_frames_batched(self._frames(3), [0.0, 5.0, 10.0], [None] * 3)
+
+        assert len(requests) == 4
+        assert analyses[0]["mood"] == "calm"
+        assert analyses[1]["scene_type"] == "general"  # heuristics for the frame that failed
+        assert analyses[2]["mood"] == "joyful"
+
+    def test_no_provider_uses_heuristics(self, monkeypatch):
+        """Test that frames are analyzed from pose data when no API key is set."""
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        monkeypatch.delenv("AI_API_KEY", raising=False)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        analysis = analyzer._analyze_single_frame(self._frames(1)[0], 2.0)
+
+        assert analysis["timestamp"] == 2.0
+        assert analysis["scene_type"] == "general"
+
+    def test_provider_client_is_shared(self, monkeypatch):
+        """Test that provider calls reuse one pooled client until it is closed."""
+        monkeypatch.setattr(ai_analysis_service, "_http_client", None)
+
+        client = ai_analysis_service._get_http_client()
+        assert ai_analysis_service._get_http_client() is client
+
+        client.close()
+        assert ai_analysis_service._get_http_client() is not client
+        ai_analysis_service._get_http_client().close()
+
+
+class TestVideoSynthesis:
+    """Test combining frame analyses into a video analysis."""
+
+    def test_dominant_values_and_ordered_unique_lists(self):
+        """Test that the most common values win and unique lists keep first-seen order."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        frames = [
+            {"scene_type": "indoor", "mood": "calm", "objects": ["lamp", "person"], "color_palette": ["red"]},
+            {"scene_type": "outdoor", "mood": "calm", "objects": ["person"], "color_palette": ["green", "red"]},
+            {"scene_type": "outdoor", "mood": "tense", "objects": ["tree"], "color_palette": ["blue"]},
+        ]
+
+        video = analyzer._synthesize_video_analysis(frames, 12.0)
+
+        assert video["scene_type"] == "outdoor"
+        assert video["mood"] == "calm"
+        assert video["objects"] == ["lamp", "person", "tree"]
+        assert video["color_palette"] == ["red", "green", "blue"]
+
+    def test_frames_reach_mediapipe_as_read_only_rgb(self):
+        """Test that decoded BGR frames are handed over in RGB order without write access."""
+        bgr = np.zeros((4, 4, 3), dtype=np.uint8)
+        bgr[..., 0] = 255  # blue
+
+        rgb = VideoAnalyzer._to_rgb(bgr)
+
+        assert rgb[0, 0].tolist() == [0, 0, 255]
+        assert not rgb.flags.writeable
+        assert bgr.flags.writeable
+
+    def test_large_frames_are_downscaled(self):
+        """Test that frames over the analysis size are shrunk to it, keeping aspect ratio."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        large = analyzer._downscale(np.zeros((1080, 1920, 3), dtype=np.uint8))
+        small = np.zeros((48, 64, 3), dtype=np.uint8)
+
+        assert large.shape == (405, 720, 3)
+        assert analyzer._downscale(small) is small
+
+    def test_each_pose_is_normalized_once_per_analysis(self, tmp_path, monkeypatch):
+        """Test that the per-frame heuristics and the summary share one normalization per pose."""
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        monkeypatch.delenv("AI_API_KEY", raising=False)
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+        normalized = []
+        real_normalize = ai_analysis_service.normalize_pose_sequence
+
+        def counting_normalize(sequence):
+            normalized.extend(sequence)
+            return real_normalize(sequence)
+
+        monkeypatch.setattr(ai_analysis_service, "normalize_pose_sequence", counting_normalize)
+        video_path = tmp_path / "clip.avi"
+        TestKeyFrameExtraction()._write_video(video_path, 20)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        analyzer._extract_pose_landmarks_from_frame = lambda frame: POSE_LANDMARKS
+
+        video = analyzer.analyze_video_content(str(video_path), 6.0)
+
+        assert len(normalized) == 3
+        assert len(video["pose_sequences"]) == 3
+        assert [f["scene_type"] for f in video["frame_analyses"]] == ["person"] * 3
+
+    def test_stored_analysis_skips_pose_extraction(self, tmp_path, monkeypatch):
+        """Test that a database hit found while frames decode is returned without pose extraction."""
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+        monkeypatch.setattr(ai_analysis_service, "get_video_pose_analysis", lambda video_id: "stored")
+        video_path = tmp_path / "clip.avi"
+        TestKeyFrameExtraction()._write_video(video_path, 20)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        analyzer._convert_cached_analysis_to_format = lambda cached, duration: {"cached": cached}
+
+        def fail_pose_extraction(frame):
+            raise AssertionError("pose extraction ran on a cache hit")
+
+        analyzer._extract_pose_landmarks_from_frame = fail_pose_extraction
+
+        video = analyzer.analyze_video_content(str(video_path), 6.0, video_id="video-1")
+
+        assert video == {"cached": "stored"}
+
+    def test_analyzed_at_is_utc_to_the_second(self):
+        """Test that analyses record a timezone-aware analysis time without microseconds."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        analyzed_at = datetime.fromisoformat(analyzer._fallback_analysis(10.0)["analyzed_at"])
+
+        assert analyzed_at.utcoffset() == timedelta(0)
+        assert analyzed_at.microsecond == 0
+        assert abs(datetime.now(timezone.utc) - analyzed_at) < timedelta(seconds=5)
+
+    def test_content_tags_expand_transitively_in_order(self):
+        """Test that tags start with scene, activity and mood, then their expansions, once each."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+
+        tags = analyzer._generate_content_tags("outdoor", "dancing", "calm")
+
+        assert tags[:3] == ["outdoor", "dancing", "calm"]
+        assert {"nature", "music", "serene", "celebration", "party"} <= set(tags)
+        assert len(tags) == len(set(tags))
+        assert analyzer._generate_content_tags("indoor", "unknown", "indoor") == [
+            "indoor", "unknown", "cozy", "intimate", "personal"
+        ]
+
+
+class TestOverlayAnalysisCache:
+    """Test content-keyed caching of overlay analyses."""
+
+    @pytest.fixture
+    def video_file(self, tmp_path, monkeypatch):
+        user_id = uuid.uuid4()
+        monkeypatch.setenv("LOCAL_MEDIA_DIR", str(tmp_path))
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+        monkeypatch.setattr(
+            Video, "sql",
+            staticmethod(lambda query, params: [{
+                "id": params["video_id"], "user_id": user_id, "title": "clip",
+                "file_path": "/media/clip.mp4", "duration": 12,
+            }]),
+        )
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(b"\x00" * 4096)
+        return path
+
+    @pytest.fixture
+    def analyses(self, monkeypatch):
+        calls = []
+
+        class CountingAnalyzer:
+            def analyze_video_content(self, video_path, duration, video_id=None, force=False):
+                calls.append(force)
+                return {"scene_type": "person", "duration": duration}
+
+        monkeypatch.setattr(ai_analysis_service, "_video_analyzer_instance", CountingAnalyzer())
+        return calls
+
+    def test_unchanged_video_is_analyzed_once(self, video_file, analyses):
+        """Test that repeat requests reuse the analysis, with the requested video id."""
+        user = User(id=uuid.uuid4(), wallet_address="0xabc")
+        first_id, second_id = uuid.uuid4(), uuid.uuid4()
+
+        first = analyze_video_for_overlays(user, first_id)
+        again = analyze_video_for_overlays(user, first_id)
+        other = analyze_video_for_overlays(user, second_id)
+
+        assert analyses == [False, False]
+        assert again == first == {"scene_type": "person", "duration": 12, "video_id": str(first_id)}
+        assert other["video_id"] == str(second_id)
+
+    def test_changed_content_or_force_reanalyzes(self, video_file, tmp_path, monkeypatch):
+        """Test that a re-uploaded file or force=True skips both cached analyses."""
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        monkeypatch.delenv("AI_API_KEY", raising=False)
+        monkeypatch.setattr(ai_analysis_service, "get_video_pose_analysis", lambda video_id: None)
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        analyzer._extract_pose_landmarks_from_frame = lambda frame: []
+        extractions = []
+        real_extract = analyzer._extract_key_frames_with_poses
+        analyzer._extract_key_frames_with_poses = lambda *args, **kwargs: (
+            extractions.append(args) or real_extract(*args, **kwargs)
+        )
+        monkeypatch.setattr(ai_analysis_service, "_video_analyzer_instance", analyzer)
+        user = User(id=uuid.uuid4(), wallet_address="0xabc")
+        video_id = uuid.uuid4()
+        for name, num_frames in (("first.avi", 20), ("second.avi", 10)):
+            TestKeyFrameExtraction()._write_video(tmp_path / name, num_frames)
+        video_file.write_bytes((tmp_path / "first.avi").read_bytes())
+
+        analyze_video_for_overlays(user, video_id)
+        analyze_video_for_overlays(user, video_id)
+        assert len(extractions) == 1
+
+        # Same path, new content; set the mtime explicitly, since a rewrite
+        # within one clock tick can keep the old one
+        stat = video_file.stat()
+        video_file.write_bytes((tmp_path / "second.avi").read_bytes())
+        os.utime(video_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        analyze_video_for_overlays(user, video_id)
+        analyze_video_for_overlays(user, video_id, force=True)
+
+        assert len(extractions) == 3
+
+    def test_bulk_analysis_reads_the_cache_once_and_analyzes_misses(self, video_file, analyses, monkeypatch):
+        """Test that the bulk entry point fetches videos in one query and only analyzes uncached ones."""
+        user = User(id=uuid.uuid4(), wallet_address="0xabc")
+        cached_id, fresh_id = uuid.uuid4(), uuid.uuid4()
+        analyze_video_for_overlays(user, cached_id)
+        queries = []
+        monkeypatch.setattr(
+            Video, "sql",
+            staticmethod(lambda query, params: queries.append(params) or [{
+                "id": video_id, "user_id": user.id, "title": "clip",
+                "file_path": "/media/clip.mp4", "duration": 12,
+            } for video_id in params["video_ids"]]),
+        )
+        reads = []
+        real_get_json_many = analysis_cache.get_json_many
+        monkeypatch.setattr(
+            analysis_cache, "get_json_many", lambda keys: reads.append(keys) or real_get_json_many(keys)
+        )
+
+        analyses_by_id = ai_analysis_service.analyze_videos_for_overlays_bulk(user, [cached_id, fresh_id])
+
+        assert len(queries) == 1 and len(reads) == 1
+        assert analyses == [False, False]
+        assert analyses_by_id[str(cached_id)]["video_id"] == str(cached_id)
+        assert analyses_by_id[str(fresh_id)]["video_id"] == str(fresh_id)
+
+    def test_content_key_samples_both_ends(self, tmp_path):
+        """Test that the key covers the start and end of large files but not the middle."""
+        sample = ai_analysis_service.CONTENT_HASH_SAMPLE_BYTES
+        path = tmp_path / "large.mp4"
+        video_id = uuid.uuid4()
+        content = bytearray(3 * sample)
+        path.write_bytes(content)
+        key = ai_analysis_service._video_content_key(video_id, str(path), 30.0)
+
+        content[sample + 10] = 1
+        path.write_bytes(content)
+        assert ai_analysis_service._video_content_key(video_id, str(path), 30.0) == key
+
+        content[-1] = 1
+        path.write_bytes(content)
+        assert ai_analysis_service._video_content_key(video_id, str(path), 30.0) != key
+        assert ai_analysis_service._video_content_key(video_id, str(tmp_path / "missing.mp4"), 30.0) is None
+
+    def test_content_key_is_reused_while_the_file_is_unchanged(self, tmp_path, monkeypatch):
+        """Test that repeat lookups only stat the file, and a rewrite hashes it again."""
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(b"\x00" * 4096)
+        video_id = uuid.uuid4()
+        opened = []
+        real_open = open
+        monkeypatch.setattr(
+            "builtins.open", lambda file, *args: opened.append(file) or real_open(file, *args)
+        )
+
+        key = ai_analysis_service._video_content_key(video_id, str(path), 30.0)
+        assert ai_analysis_service._video_content_key(video_id, str(path), 30.0) == key
+        assert len(opened) == 1
+
+        os.utime(path, ns=(0, 0))
+        assert ai_analysis_service._video_content_key(video_id, str(path), 30.0) == key
+        assert len(opened) == 2
+
+
+class TestSmartOverlayRecommendations:
+    """Test that recommendations are scored from the columns the query computes."""
+
+    @pytest.fixture(autouse=True)
+    def local_cache(self, monkeypatch):
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+
+    def test_scores_and_reasons_come_from_query_columns(self, monkeypatch):
+        """Test confidence and reasoning use the precomputed match columns, and tags are bound parameters."""
+        analysis = {
+            "tags": ["outdoor", "dancing", "it's"],
+            "mood": "Energetic",
+            "scene_type": "outdoor",
+            "primary_activity": "dancing",
+            "duration": 10,
+        }
+        monkeypatch.setattr(ai_analysis_service, "analyze_video_for_overlays", lambda user, video_id: analysis)
+        queries = []
+
+        def fake_sql(query, params, prepare=None):
+            queries.append((query, params, prepare))
+            return [{
+                "id": uuid.uuid4(), "name": "sparkles", "file_path": "/media/a.gif",
+                "asset_type": "gif", "category": "effects", "artist_id": uuid.uuid4(),
+                "file_size": 10, "artist_name": "Ada", "tags": "Energetic,outdoor",
+                "tag_overlap": 1, "mood_match": True, "activity_match": False, "scene_match": True,
+            }]
+
+        monkeypatch.setattr(ArtistAsset, "sql", staticmethod(fake_sql))
+
+        [recommendation] = ai_analysis_service.get_smart_overlay_recommendations(
+            User(id=uuid.uuid4(), wallet_address="0xabc"), uuid.uuid4()
+        )
+
+        query, params, prepare = queries[0]
+        assert query == ai_analysis_service._RECOMMENDATIONS_QUERY and prepare is True
+        assert "it's" not in query
+        assert "LIKE" not in query
+        assert params["top_tags"] == ["outdoor", "dancing", "it's"]
+        assert params["mood"] == "energetic"
+        assert recommendation["confidence_score"] == pytest.approx(0.6)
+        assert recommendation["asset"]["name"] == "sparkles"
+        assert recommendation["asset"]["tags"] == "Energetic,outdoor"
+        assert set(recommendation["asset"]) == set(ai_analysis_service.RECOMMENDED_ASSET_FIELDS)
+        assert recommendation["reasoning"] == (
+            "Great fit because it matches Energetic mood and works with outdoor setting."
+        )
+
+    def test_null_analysis_fields_fall_back_to_defaults(self, monkeypatch):
+        """Test that null mood, scene type and activity from a provider use the defaults."""
+        analysis = {"tags": ["outdoor"], "mood": None, "scene_type": None, "primary_activity": None}
+        monkeypatch.setattr(ai_analysis_service, "analyze_video_for_overlays", lambda user, video_id: analysis)
+        queries = []
+        monkeypatch.setattr(
+            ArtistAsset, "sql", staticmethod(lambda query, params, prepare=None: queries.append(params) or [])
+        )
+
+        ai_analysis_service.get_smart_overlay_recommendations(
+            User(id=uuid.uuid4(), wallet_address="0xabc"), uuid.uuid4()
+        )
+
+        [params] = queries
+        assert (params["mood"], params["scene_type"], params["activity"]) == ("neutral", "general", "unknown")
+
+    def test_recommendation_lists_are_cached_until_assets_change(self, monkeypatch):
+        """Test that repeat requests reuse the list and an asset change recomputes it."""
+        analyses = []
+
+        def fake_analyze(user, video_id):
+            analyses.append(video_id)
+            return {"tags": ["outdoor"], "mood": "calm", "duration": 10}
+
+        monkeypatch.setattr(ai_analysis_service, "analyze_video_for_overlays", fake_analyze)
+        monkeypatch.setattr(ArtistAsset, "sql", staticmethod(lambda query, params, prepare=None: []))
+        user, video_id = User(id=uuid.uuid4(), wallet_address="0xabc"), uuid.uuid4()
+
+        ai_analysis_service.get_smart_overlay_recommendations(user, video_id)
+        ai_analysis_service.get_smart_overlay_recommendations(user, video_id)
+        assert len(analyses) == 1
+
+        ai_analysis_service.get_smart_overlay_recommendations(user, video_id, limit=3)
+        asset_service.invalidate_asset_catalog()
+        ai_analysis_service.get_smart_overlay_recommendations(user, video_id)
+        assert len(analyses) == 3
+
+    def test_recommendations_for_videos_share_one_asset_query(self, monkeypatch):
+        """Test that every video's assets come from one query and are grouped by video."""
+        first_id, second_id = str(uuid.uuid4()), str(uuid.uuid4())
+        analyses = {
+            first_id: {"tags": ["outdoor", "nature"], "mood": "calm"},
+            second_id: {"tags": ["indoor"], "mood": None, "primary_activity": None},
+        }
+        monkeypatch.setattr(
+            ai_analysis_service, "analyze_videos_for_overlays_bulk", lambda user, video_ids: analyses
+        )
+        queries = []
+
+        def fake_sql(query, params, prepare=None):
+            queries.append((query, params))
+            return [{
+                "recommended_for": first_id, "id": uuid.uuid4(), "name": "leaves",
+                "file_path": "/media/a.gif", "asset_type": "gif", "category": "effects",
+                "artist_id": uuid.uuid4(), "file_size": 10, "artist_name": "Ada",
+                "tag_overlap": 2, "mood_match": False, "activity_match": False, "scene_match": False,
+            }]
+
+        monkeypatch.setattr(ArtistAsset, "sql", staticmethod(fake_sql))
+
+        recommendations = ai_analysis_service.get_recommendations_for_videos(
+            User(id=uuid.uuid4(), wallet_address="0xabc"), [first_id, second_id]
+        )
+
+        [(query, params)] = queries
+        # Videos without usable tags match any asset, as in the single-video query
+        assert "cardinality(v.top_tags) = 0 OR" in query
+        videos = json.loads(params["videos"])
+        assert [video["top_tags"] for video in videos] == [["outdoor", "nature"], ["indoor"]]
+        assert (videos[1]["mood"], videos[1]["activity"]) == ("neutral", "unknown")
+        assert recommendations[second_id] == []
+        [recommendation] = recommendations[first_id]
+        assert recommendation["confidence_score"] == pytest.approx(0.7)
+        assert recommendation["placement"]["layerOrder"] == 1
+
+    def test_bulk_analysis_rejects_oversized_batches(self, monkeypatch):
+        """Test that a batch over the cap is refused before any video is fetched."""
+        queries = []
+        monkeypatch.setattr(Video, "sql", staticmethod(lambda query, params: queries.append(query) or []))
+        video_ids = [uuid.uuid4() for _ in range(ai_analysis_service.MAX_BULK_ANALYSIS_VIDEOS + 1)]
+
+        with pytest.raises(ValueError):
+            ai_analysis_service.analyze_videos_for_overlays_bulk(
+                User(id=uuid.uuid4(), wallet_address="0xabc"), video_ids
+            )
+
+        assert queries == []
+
+    def test_placement_positions_cycle_per_style(self):
+        """Test that each placement style cycles through its canvas positions."""
+
+        def positions(style, count):
+            suggestions = {"placement_style": style, "scale_range": (0.5, 1.0)}
+            placements = ai_analysis_service._generate_smart_placements({"duration": 10}, suggestions)
+            return [
+                (placement["position"]["x"], placement["position"]["y"])
+                for placement in islice(placements, count)
+            ]
+
+        assert positions("center_burst", 2) == [(400, 225), (400, 225)]
+        assert positions("static_corner", 5) == [(50, 50), (650, 50), (50, 350), (650, 350), (50, 50)]
+        assert positions("unknown", 6) == [(100, 100), (600, 150), (150, 300), (550, 80), (200, 200), (100, 100)]
+
+    def test_video_tags_are_distinct_and_normalized(self):
+        """Test that overlap is counted over each distinct, tags_arr-normalized video tag once, in order."""
+        analysis = {"tags": ["Outdoor", "dancing", " outdoor ", "calm", "", None, 3]}
+
+        assert ai_analysis_service._video_tags(analysis) == ["outdoor", "dancing", "calm"]
+        assert ai_analysis_service._video_tags({}) == []
+
+    def test_reasoning_is_shared_across_assets(self):
+        """Test that assets with the same matches reuse one reasoning string."""
+        analysis = ("calm", "cooking", "indoor")
+        row = {"mood_match": True, "activity_match": False, "scene_match": True}
+
+        reasoning = ai_analysis_service._generate_recommendation_reasoning(row, *analysis)
+
+        assert reasoning == "Great fit because it matches calm mood and works with indoor setting."
+        assert ai_analysis_service._generate_recommendation_reasoning(dict(row), *analysis) is reasoning
+        assert ai_analysis_service._generate_recommendation_reasoning(
+            {"mood_match": False, "activity_match": False, "scene_match": False}, *analysis
+        ) == "Great fit because it popular choice for similar videos."
+
+    def test_placement_timing_and_scale_cycle_per_asset(self):
+        """Test that placements cycle through the timing intervals and step the scale."""
+        suggestions = {
+            "timing_pattern": {"intervals": [1.04, 8.96], "duration_per_overlay": 2.0},
+            "scale_range": [0.5, 0.8],
+        }
+
+        placements = list(islice(
+            ai_analysis_service._generate_smart_placements({"duration": 10}, suggestions), 4
+        ))
+
+        assert [(p["timing"]["startTime"], p["timing"]["endTime"]) for p in placements] == [
+            (1.0, 3.0), (9.0, 10), (1.0, 3.0), (9.0, 10)
+        ]
+        assert [p["position"]["scaleX"] for p in placements] == pytest.approx([0.5, 0.6, 0.7, 0.5])
+        assert [p["layerOrder"] for p in placements] == [1, 2, 3, 4]
+
+
+class TestCachedAnalysisConversion:
+    """Test converting stored pose analyses to the analysis format."""
+
+    def test_conversion_is_reused_per_stored_analysis(self, monkeypatch):
+        """Test that a stored analysis is converted once, with duration fields filled per call."""
+        monkeypatch.setattr(analysis_cache, "get_cache_client", lambda: None)
+        monkeypatch.setattr(analysis_cache, "_local_cache", {})
+        stored = SimpleNamespace(
+            id=uuid.uuid4(),
+            video_id=uuid.uuid4(),
+            pose_sequences={"sequences": [POSE_LANDMARKS, POSE_LANDMARKS]},
+            normalized_poses={"normalized": [[0.0] * 14]},
+            movement_analysis={"movement_type": "dancing"},
+            confidence_avg=0.9,
+            frame_count=2,
+            processing_time_ms=40,
+            created_at=datetime(2025, 1, 9, 12, 0, tzinfo=timezone.utc),
+        )
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        conversions = []
+        real_convert = analyzer._convert_cached_analysis
+        analyzer._convert_cached_analysis = lambda cached: conversions.append(cached) or real_convert(cached)
+
+        short = analyzer._convert_cached_analysis_to_format(stored, 10.0)
+        long = analyzer._convert_cached_analysis_to_format(stored, 40.0)
+
+        assert len(conversions) == 1
+        assert short["primary_activity"] == long["primary_activity"] == "dancing"
+        assert len(long["frame_analyses"]) == 2 and long["cached"] is True
+        assert (short["duration"], long["duration"]) == (10.0, 40.0)
+        assert long["overlay_recommendations"] == analyzer._generate_overlay_suggestions(
+            "person", "movement", "neutral", 40.0
+        )
+
+        # Re-processing upserts the row under the same id with fresh pose data
+        stored.pose_sequences = {"sequences": [POSE_LANDMARKS]}
+        stored.frame_count, stored.processing_time_ms = 1, 35
+        reprocessed = analyzer._convert_cached_analysis_to_format(stored, 10.0)
+
+        assert len(conversions) == 2
+        assert len(reprocessed["frame_analyses"]) == 1
+
+    def test_frame_confidences_match_per_frame_calculation(self):
+        """Test that batched confidences and the derived frame fields match the per-frame heuristics."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        low = [value if i % 4 != 3 else 0.3 for i, value in enumerate(POSE_LANDMARKS)]
+        uniform = [POSE_LANDMARKS, low, POSE_LANDMARKS]
+        ragged = [POSE_LANDMARKS, [], POSE_LANDMARKS[:8]]
+
+        for sequences in (uniform, ragged):
+            confidences = analyzer._calculate_pose_confidences(sequences)
+            assert confidences.tolist() == pytest.approx(
+                [analyzer._calculate_pose_confidence(pose) for pose in sequences]
+            )
+
+        frames = analyzer._generate_frame_analyses_from_cache(uniform + [POSE_LANDMARKS])
+
+        assert len(frames) == 3
+        assert [f["motion_level"] for f in frames] == ["high", "low", "high"]
+        assert [f["scene_type"] for f in frames] == ["person", "general", "person"]
+        assert frames[1]["people_count"] == 0 and frames[1]["objects"] == []
+        assert isinstance(frames[0]["pose_confidence"], float)
+
+    def test_motion_level_thresholds(self):
+        """Test that scalar and batched motion levels agree, with thresholds exclusive."""
+        analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+        confidences = [0.0, 0.5, 0.505, 0.8, 0.81, 1.0]
+        expected = ["low", "low", "medium", "medium", "high", "high"]
+
+        assert [analyzer._determine_motion_level_from_confidence(c) for c in confidences] == expected
+        assert np.take(
+            ai_analysis_service.MOTION_LEVELS,
+            np.searchsorted(ai_analysis_service.MOTION_CONFIDENCE_THRESHOLDS, confidences),
+        ).tolist() == expected
+
+    def test_match_confidence_is_rounded_and_clamped(self):
+        """Test that confidence weights each signal, rounds to 3 places and never exceeds 1."""
+        row = {"tag_overlap": 1, "mood_match": False, "activity_match": True, "scene_match": False}
+        full = {"tag_overlap": 3, "mood_match": True, "activity_match": True, "scene_match": True}
+
+        assert ai_analysis_service._calculate_match_confidence(row, 3) == 0.5
+        assert ai_analysis_service._calculate_match_confidence(row, 7) == 0.386
+        assert ai_analysis_service._calculate_match_confidence(row, 0) == 0.3
+        assert ai_analysis_service._calculate_match_confidence(full, 3) == 1.0
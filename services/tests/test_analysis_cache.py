@@ -0,0 +1,151 @@
+"""
+Test suite for the shared video analysis cache.
+"""
+
+import pytest
+
+from core import analysis_cache
+from core.ai_analysis_service import VideoAnalyzer
+
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key, (None, None))[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.store[key] = (value, ttl)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.store[key] = (str(value).encode(), None)
+        return value
+
+
+class DownRedis:
+    """Redis client whose server is unreachable."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    def mget(self, keys):
+        raise ConnectionError("connection refused")
+
+    def setex(self, key, ttl, value):
+        raise ConnectionError("connection refused")
+
+    def incr(self, key):
+        raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    monkeypatch.setattr(analysis_cache, "_local_cache", {})
+    monkeypatch.setattr(analysis_cache, "_local_counters", {})
+    monkeypatch.setattr(analysis_cache, "_redis_failing", False)
+    monkeypatch.setattr(analysis_cache, "_redis_retry_at", 0.0)
+    return analysis_cache._local_cache
+
+
+class TestAnalysisCache:
+    """Test Redis storage with the local fallback."""
+
+    def test_values_round_trip_through_redis_with_ttl(self, monkeypatch, local_cache):
+        """Test that JSON values are stored in Redis with their TTL."""
+        client = FakeRedis()
+        monkeypatch.setattr(analysis_cache, "_client", client)
+
+        analysis_cache.set_json("va:1", {"scene_type": "person", "scale_range": (0.5, 1.0)}, 60)
+
+        assert client.store["va:1"][1] == 60
+        assert analysis_cache.get_json("va:1") == {"scene_type": "person", "scale_range": [0.5, 1.0]}
+        assert local_cache == {}
+
+    def test_unreachable_redis_falls_back_to_local_cache(self, monkeypatch, local_cache):
+        """Test that caching keeps working in-process while Redis is down."""
+        monkeypatch.setattr(analysis_cache, "_client", DownRedis())
+
+        assert analysis_cache.get_json("va:2") is None
+        analysis_cache.set_json("va:2", {"mood": "calm"}, 60)
+
+        assert analysis_cache.get_json("va:2") == {"mood": "calm"}
+
+    def test_many_values_are_read_in_one_call_leaving_out_misses(self, monkeypatch, local_cache):
+        """Test that get_json_many returns only the keys that were cached, with or without Redis."""
+        monkeypatch.setattr(analysis_cache, "_client", FakeRedis())
+        analysis_cache.set_json("va:a", {"mood": "calm"}, 60)
+
+        assert analysis_cache.get_json_many(["va:a", "va:b"]) == {"va:a": {"mood": "calm"}}
+
+        monkeypatch.setattr(analysis_cache, "_client", DownRedis())
+        analysis_cache.set_json("va:b", {"mood": "joyful"}, 60)
+
+        assert analysis_cache.get_json_many(["va:a", "va:b"]) == {"va:b": {"mood": "joyful"}}
+
+    def test_counters_increment_with_or_without_redis(self, monkeypatch, local_cache):
+        """Test that incr counts up in Redis and in the local fallback, readable as JSON."""
+        monkeypatch.setattr(analysis_cache, "_client", FakeRedis())
+        assert [analysis_cache.incr("n") for _ in range(2)] == [1, 2]
+        assert analysis_cache.get_json("n") == 2
+
+        monkeypatch.setattr(analysis_cache, "_client", DownRedis())
+        assert [analysis_cache.incr("n") for _ in range(2)] == [1, 2]
+        assert analysis_cache.get_json("n") == 2
+
+    def test_redis_is_skipped_while_backing_off(self, monkeypatch, local_cache):
+        """Test that one Redis error sends calls to the local cache until the retry time."""
+        client = DownRedis()
+        monkeypatch.setattr(analysis_cache, "_client", client)
+
+        for _ in range(3):
+            analysis_cache.get_bytes("va:1")
+        assert client.calls == 1
+
+        monkeypatch.setattr(analysis_cache, "_redis_retry_at", 0.0)
+        analysis_cache.get_bytes("va:1")
+        assert client.calls == 2
+
+    def test_local_entries_expire_but_counters_are_never_evicted(self, monkeypatch, local_cache):
+        """Test that local entries honor their TTL and filling the cache leaves counters alone."""
+        monkeypatch.setattr(analysis_cache, "_client", DownRedis())
+        monkeypatch.setattr(analysis_cache, "LOCAL_CACHE_SIZE", 2)
+
+        analysis_cache.incr("version")
+        analysis_cache.set_bytes("expired", b"v", 0)
+        for i in range(3):
+            analysis_cache.set_bytes(f"k{i}", b"v", 60)
+
+        assert analysis_cache.get_bytes("expired") is None
+        assert analysis_cache.get_bytes("k2") == b"v"
+        assert analysis_cache.get_json("version") == 1
+
+    def test_local_cache_is_bounded(self, monkeypatch, local_cache):
+        """Test that the fallback evicts its oldest entry when full."""
+        monkeypatch.setattr(analysis_cache, "_client", DownRedis())
+        monkeypatch.setattr(analysis_cache, "LOCAL_CACHE_SIZE", 2)
+
+        for i in range(3):
+            analysis_cache.set_bytes(f"k{i}", b"v", 60)
+
+        assert list(local_cache) == ["k1", "k2"]
+
+    def test_analysis_key_is_stable(self):
+        """Test that the key depends only on the path and duration."""
+        key = VideoAnalyzer._analysis_cache_key("/tmp/video.mp4", 30.0)
+
+        assert key == VideoAnalyzer._analysis_cache_key("/tmp/video.mp4", 30.0)
+        assert key != VideoAnalyzer._analysis_cache_key("/tmp/video.mp4", 31.0)
+        assert key == VideoAnalyzer._analysis_cache_key("/tmp/video.mp4", 30)
+        assert VideoAnalyzer._analysis_cache_key("/a", 10.0) != VideoAnalyzer._analysis_cache_key("/a1", 0.0)
+        assert key.startswith("va:")
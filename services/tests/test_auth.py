@@ -4,9 +4,11 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 import pytest
 import jwt
+from fastapi import HTTPException
 from core.auth import (
     create_access_token, verify_access_token, 
-    get_current_user_from_token, JWT_SECRET, JWT_ALGORITHM
+    get_current_user_from_token, get_user_from_authorization, get_cached_user,
+    JWT_SECRET, JWT_ALGORITHM
 )
 from core.user import User
 
@@ -115,6 +117,45 @@ class TestUserFromToken:
         
         assert user is None
 
+    def test_get_current_user_from_token_cached(self):
+        """Test that a verified token is served from cache without re-decoding."""
+        token = create_access_token("0xcached")
+        first = get_current_user_from_token(token)
+
+        with patch("core.auth.verify_access_token") as mock_verify:
+            second = get_current_user_from_token(token)
+
+        mock_verify.assert_not_called()
+        assert second == first
+
+    def test_get_cached_user_only_returns_verified_tokens(self):
+        """Test that the cache lookup never verifies a token itself."""
+        token = create_access_token("0xcachelookup")
+        assert get_cached_user(token) is None
+
+        user = get_current_user_from_token(token)
+        assert get_cached_user(token) == user
+
+
+class TestAuthorizationHeader:
+    """Test Authorization header resolution used by the current_user dependency."""
+
+    def test_bearer_token_resolves_user(self):
+        """Test that a valid bearer token yields the user."""
+        token = create_access_token("0xheader")
+
+        user = get_user_from_authorization(f"Bearer {token}")
+
+        assert user.wallet_address == "0xheader"
+
+    @pytest.mark.parametrize("header", [None, "", "Token abc", "Bearer", "Bearer invalid.token.here"])
+    def test_bad_headers_raise_401(self, header):
+        """Test that missing or malformed headers are rejected."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_user_from_authorization(header)
+
+        assert exc_info.value.status_code == 401
+
 
 class TestJWTConfiguration:
     """Test JWT configuration."""
@@ -330,6 +330,23 @@ class TestPoseAnalysis:
         except Exception as e:
             pytest.skip(f"MediaPipe error handling test skipped: {e}")
 
+    def test_rgb_image_reaches_mediapipe_read_only_without_locking_caller(self):
+        """Test that MediaPipe gets a read-only image while the caller's array stays writeable."""
+        import numpy as np
+        from types import SimpleNamespace
+
+        seen = []
+        analyzer = PoseAnalyzer.__new__(PoseAnalyzer)
+        analyzer.pose = SimpleNamespace(
+            process=lambda image: seen.append(image) or SimpleNamespace(pose_landmarks=None)
+        )
+        rgb_image = np.zeros((4, 4, 3), dtype=np.uint8)
+
+        assert analyzer.extract_pose_from_rgb_image(rgb_image) == []
+        assert not seen[0].flags.writeable
+        assert np.shares_memory(seen[0], rgb_image)
+        assert rgb_image.flags.writeable
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
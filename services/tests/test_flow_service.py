@@ -0,0 +1,54 @@
+"""
+Test suite for FlowService request coalescing.
+"""
+
+import asyncio
+
+from core.flow_service import FlowService
+
+
+class TestFlowServiceCoalescing:
+    """Test that concurrent identical lookups share one Access Node call."""
+
+    def test_concurrent_ownership_checks_share_one_fetch(self):
+        """Test that ownership checks for one wallet issue a single script call."""
+        service = FlowService()
+        service.contract_addresses["ARAssetNFT"] = "0x01"
+        calls = []
+
+        async def fake_execute_script(script, arguments=None):
+            calls.append(arguments)
+            await asyncio.sleep(0.01)
+            return [1, 2, 3]
+
+        service._execute_script = fake_execute_script
+
+        async def run():
+            return await asyncio.gather(
+                service.verify_nft_ownership("0xabc", 1),
+                service.verify_nft_ownership("0xabc", 3),
+                service.verify_nft_ownership("0xabc", 9),
+            )
+
+        assert asyncio.run(run()) == [True, True, False]
+        assert len(calls) == 1
+        assert service._inflight == {}
+
+    def test_sequential_lookups_are_not_cached(self):
+        """Test that a finished lookup is not reused by later requests."""
+        service = FlowService()
+        service.contract_addresses["ARAssetNFT"] = "0x01"
+        calls = []
+
+        async def fake_execute_script(script, arguments=None):
+            calls.append(arguments)
+            return {"name": "Asset"}
+
+        service._execute_script = fake_execute_script
+
+        async def run():
+            await service.get_nft_metadata(7, "0xabc")
+            await service.get_nft_metadata(7, "0xabc")
+
+        asyncio.run(run())
+        assert len(calls) == 2
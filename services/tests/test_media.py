@@ -3,7 +3,7 @@ import os
 import tempfile
 from unittest.mock import Mock, patch, MagicMock
 import pytest
-from core.media import StorageConfig, save_to_bucket, get_from_bucket, generate_presigned_url, MediaFile
+from core.media import StorageConfig, save_to_bucket, get_from_bucket, generate_presigned_url, generate_presigned_urls, MediaFile
 
 
 class TestStorageConfig:
@@ -42,6 +42,17 @@ class TestStorageConfig:
             mock_boto3_client.assert_called_once()
             assert client is not None
     
+    @patch('core.media.boto3.client')
+    def test_get_s3_client_is_reused(self, mock_boto3_client):
+        """Test that the S3 client is created once per configuration."""
+        with patch.dict(os.environ, {
+            'MEDIA_ACCESS_KEY': 'test-key',
+            'MEDIA_SECRET_KEY': 'test-secret'
+        }):
+            config = StorageConfig()
+            assert config.get_s3_client() is config.get_s3_client()
+            mock_boto3_client.assert_called_once()
+    
     def test_get_s3_client_fallback(self):
         """Test S3 client returns None for local fallback."""
         with patch.dict(os.environ, {}, clear=True):
@@ -168,6 +179,27 @@ class TestMediaOperations:
         assert result == '/media/test/path.jpg'
 
 
+    @patch('core.media._storage_config')
+    def test_generate_presigned_urls_signs_each_path_with_one_client(self, mock_config, mock_s3_client):
+        """Test batched presigning strips /media/ from keys and falls back per failed path."""
+        from botocore.exceptions import ClientError
+        mock_config.use_local_fallback = False
+        mock_config.bucket_name = 'test-bucket'
+        mock_config.get_s3_client.return_value = mock_s3_client
+        
+        def sign(operation, Params, ExpiresIn):
+            if Params['Key'] == 'broken.png':
+                raise ClientError({'Error': {'Code': '500'}}, 'GetObject')
+            return f"https://signed/{Params['Key']}"
+        
+        mock_s3_client.generate_presigned_url.side_effect = sign
+        
+        result = generate_presigned_urls(['/media/assets/a.gif', 'assets/b.png', 'broken.png'])
+        
+        mock_config.get_s3_client.assert_called_once()
+        assert result == ['https://signed/assets/a.gif', 'https://signed/assets/b.png', '/media/broken.png']
+
+
 class TestMediaFile:
     """Test MediaFile model."""
     
@@ -0,0 +1,85 @@
+"""
+Test suite for pose analysis cache helpers.
+Covers the pure helpers that don't need a database connection.
+"""
+
+from unittest.mock import patch
+
+from core.pose_cache import PoseCacheManager
+
+
+class TestSequenceHashing:
+    """Test sequence hashing and canonical pair ordering."""
+
+    def test_generate_sequence_hash_is_stable(self):
+        """Test that equal sequences hash identically."""
+        sequence = [[0.1, 0.2, 0.0, 0.9], [0.3, 0.4, 0.0, 0.8]]
+        assert PoseCacheManager.generate_sequence_hash(
+            sequence
+        ) == PoseCacheManager.generate_sequence_hash([list(frame) for frame in sequence])
+
+    def test_canonical_hash_pair_is_order_independent(self):
+        """Test that (A, B) and (B, A) map to the same stored pair."""
+        sequence_a = [[0.1, 0.2, 0.0, 0.9]]
+        sequence_b = [[0.5, 0.6, 0.0, 0.7]]
+
+        pair_ab = PoseCacheManager.canonical_hash_pair(sequence_a, sequence_b)
+        pair_ba = PoseCacheManager.canonical_hash_pair(sequence_b, sequence_a)
+
+        assert pair_ab == pair_ba
+        assert pair_ab[0] <= pair_ab[1]
+
+
+class TestPoseEncoding:
+    """Test the compressed int16 pose storage format."""
+
+    def test_pose_frames_round_trip_within_quantization_step(self):
+        """Test that encoded frames decode to the original values within 1/scale."""
+        frames = [[0.5, 0.2, -0.1, 0.9], [0.31, 0.42, 0.0, 0.85, 0.7, 0.4]]
+        scale = PoseCacheManager.RAW_POSE_SCALE
+
+        blob = PoseCacheManager.encode_pose_frames(frames, scale)
+        decoded = PoseCacheManager.decode_pose_frames(blob, scale)
+
+        assert [len(frame) for frame in decoded] == [4, 6]
+        for original, restored in zip(frames, decoded, strict=True):
+            for a, b in zip(original, restored, strict=True):
+                assert abs(a - b) <= 1 / scale
+
+    def test_empty_sequence_round_trip(self):
+        """Test that an empty sequence survives encoding."""
+        blob = PoseCacheManager.encode_pose_frames([], PoseCacheManager.RAW_POSE_SCALE)
+        assert PoseCacheManager.decode_pose_frames(blob, PoseCacheManager.RAW_POSE_SCALE) == []
+
+    def test_decode_legacy_json_row(self):
+        """Test that rows migrated from JSONB are decoded from JSON text."""
+        row = {
+            "pose_encoding": "json",
+            "pose_sequences": b'{"sequences": [[0.1, 0.2]]}',
+            "normalized_poses": b'{"normalized": []}',
+            "movement_analysis": b'{"movement_type": "static"}',
+        }
+
+        decoded = PoseCacheManager._decode_pose_row(row)
+
+        assert decoded["pose_sequences"] == {"sequences": [[0.1, 0.2]]}
+        assert decoded["movement_analysis"]["movement_type"] == "static"
+
+
+class TestCacheCleanup:
+    """Test two-pass stale eviction."""
+
+    @patch("core.pose_cache.execute_update")
+    def test_cleanup_deletes_marked_rows_then_marks_expired(self, mock_update):
+        """Test that each table gets a delete of stale rows followed by a mark pass."""
+        mock_update.return_value = 2
+
+        stats = PoseCacheManager.cleanup_expired_cache()
+
+        assert stats == {"pose_analysis": 2, "sequence_matches": 2, "overlay_cache": 2}
+        queries = [call.args[0] for call in mock_update.call_args_list]
+        assert len(queries) == 6
+        for delete_query, mark_query in zip(queries[::2], queries[1::2], strict=True):
+            assert delete_query.startswith("DELETE") and "is_stale" in delete_query
+            assert "SET is_stale = TRUE" in mark_query
+        assert "stale_rank" in queries[3]
@@ -0,0 +1,306 @@
+"""
+Test suite for WebSocketManager send queues.
+"""
+
+import asyncio
+import json
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+import api.websocket_routes
+
+from api.websocket_routes import WebSocketManager, SEND_QUEUE_SIZE, websocket_endpoint
+from core.auth import create_access_token
+from core.metrics import websocket_dropped_messages
+from core.room_fanout import RoomFanout
+from core.websocket_service import ConnectionManager, connection_manager
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket."""
+
+    def __init__(self, block: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.block = block
+
+    async def accept(self):
+        pass
+
+    async def send(self, message):
+        if self.block:
+            await asyncio.Event().wait()
+        self.sent.append(message["text"])
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class TestWebSocketManager:
+    """Test broadcast fan-out through per-connection queues."""
+
+    def test_broadcast_reaches_everyone_but_sender(self):
+        """Test that a broadcast is delivered once to every other user."""
+        manager = WebSocketManager()
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+
+        async def run():
+            await manager.connect(alice, "alice", "collab-ws-1", {"user_id": "alice"})
+            await manager.connect(bob, "bob", "collab-ws-1", {"user_id": "bob"})
+            manager.broadcast_to_collaboration("collab-ws-1", {"type": "cursor_updated"}, exclude_user="alice")
+            await asyncio.sleep(0)
+            await manager.disconnect(alice, "collab-ws-1")
+            await manager.disconnect(bob, "collab-ws-1")
+
+        asyncio.run(run())
+        assert [json.loads(m)["type"] for m in bob.sent] == ["cursor_updated"]
+        assert alice.sent == []
+        assert manager.user_room == {}
+        assert manager.rooms == {}
+        assert connection_manager.get_collaboration_users("collab-ws-1") == []
+
+    def test_leaving_keeps_room_lists_aligned(self):
+        """Test that removing a member from the middle of a room keeps the lists in step."""
+        manager = WebSocketManager()
+        sockets = {name: FakeWebSocket() for name in ("a", "b", "c")}
+
+        async def run():
+            for name, ws in sockets.items():
+                await manager.connect(ws, name, "collab-ws-4", {"user_id": name})
+            await manager.disconnect(sockets["a"], "collab-ws-4")
+            manager.broadcast_to_collaboration("collab-ws-4", {"type": "chat_message"}, exclude_user="b")
+            await asyncio.sleep(0.01)
+            await manager.disconnect(sockets["b"], "collab-ws-4")
+            await manager.disconnect(sockets["c"], "collab-ws-4")
+
+        asyncio.run(run())
+        assert manager.rooms == {}
+        assert manager.user_index == {}
+        assert [json.loads(m)["type"] for m in sockets["c"].sent] == ["chat_message"]
+        assert sockets["a"].sent == sockets["b"].sent == []
+
+    def test_reconnect_replaces_previous_socket(self):
+        """Test that a stale socket's disconnect leaves the user's new socket in place."""
+        manager = WebSocketManager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+
+        async def run():
+            await manager.connect(old, "carol", "collab-ws-5", {"user_id": "carol"})
+            await manager.connect(new, "carol", "collab-ws-5", {"user_id": "carol"})
+            await manager.disconnect(old, "collab-ws-5")
+            await manager.send_to_user("carol", {"type": "pong"})
+            await asyncio.sleep(0.01)
+            remaining = list(manager.rooms["collab-ws-5"]["user_ids"])
+            await manager.disconnect(new, "collab-ws-5")
+            return remaining
+
+        assert asyncio.run(run()) == ["carol"]
+        assert old.sent == []
+        assert [json.loads(m)["type"] for m in new.sent] == ["pong"]
+        assert manager.rooms == {}
+
+    def test_broadcast_from_worker_thread(self):
+        """Test that a broadcast from a worker thread is delivered on the loop."""
+        manager = WebSocketManager()
+        ws = FakeWebSocket()
+
+        async def run():
+            await manager.connect(ws, "dave", "collab-ws-6", {"user_id": "dave"})
+            await asyncio.to_thread(
+                manager.broadcast_threadsafe, "collab-ws-6", {"type": "render_progress"}
+            )
+            await asyncio.sleep(0.01)
+            await manager.disconnect(ws, "collab-ws-6")
+
+        asyncio.run(run())
+        assert [json.loads(m)["type"] for m in ws.sent] == ["render_progress"]
+
+    def test_fanout_delivers_other_workers_broadcasts(self):
+        """Test that broadcasts from another worker reach local sockets, and our own are skipped."""
+        manager = WebSocketManager()
+        ws = FakeWebSocket()
+        other_worker = RoomFanout(lambda *args: None)
+
+        async def run():
+            await manager.connect(ws, "erin", "collab-ws-7", {"user_id": "erin"})
+            channel = b"ws:room:collab-ws-7"
+            manager.fanout.handle_message(channel, other_worker.encode_envelope('{"type":"remote"}', None))
+            manager.fanout.handle_message(channel, other_worker.encode_envelope('{"type":"skipped"}', "erin"))
+            manager.fanout.handle_message(channel, manager.fanout.encode_envelope('{"type":"echo"}', None))
+            await asyncio.sleep(0.01)
+            await manager.disconnect(ws, "collab-ws-7")
+
+        asyncio.run(run())
+        assert [json.loads(m)["type"] for m in ws.sent] == ["remote"]
+
+    def test_broadcast_is_published_once_encoded(self):
+        """Test that a broadcast is queued for Redis with its encoded frame."""
+        manager = WebSocketManager()
+
+        async def run():
+            manager.fanout._outbox = asyncio.Queue()
+            manager.broadcast_to_collaboration("collab-ws-8", {"type": "chat_message"}, exclude_user="frank")
+            return manager.fanout._outbox.get_nowait()
+
+        channel, data = asyncio.run(run())
+        assert channel == "ws:room:collab-ws-8"
+        origin, exclude_user, message_type, text = RoomFanout.decode_envelope(data)
+        assert origin == manager.fanout.worker_id
+        assert exclude_user == "frank"
+        assert message_type == "chat_message"
+        assert json.loads(text) == {"type": "chat_message"}
+
+    def test_slow_client_is_dropped_without_blocking_others(self):
+        """Test that a client whose queue fills up is closed while others still receive."""
+        manager = WebSocketManager()
+        fast, slow = FakeWebSocket(), FakeWebSocket(block=True)
+
+        async def run():
+            await manager.connect(fast, "fast", "collab-ws-2", {"user_id": "fast"})
+            await manager.connect(slow, "slow", "collab-ws-2", {"user_id": "slow"})
+            for i in range(SEND_QUEUE_SIZE + 2):
+                manager.broadcast_to_collaboration("collab-ws-2", {"type": "overlay_updated", "i": i})
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            await manager.disconnect(fast, "collab-ws-2")
+            await manager.disconnect(slow, "collab-ws-2")
+
+        asyncio.run(run())
+        assert len(fast.sent) == SEND_QUEUE_SIZE + 2
+        assert slow.closed_with == 1013
+        assert len(manager.slow_clients) == 0
+
+    def test_stalled_send_times_out(self, monkeypatch):
+        """Test that a socket stuck on one send is dropped after the send timeout."""
+        monkeypatch.setattr(api.websocket_routes, "SEND_TIMEOUT_SECONDS", 0.01)
+        manager = WebSocketManager()
+        stuck = FakeWebSocket(block=True)
+
+        async def run():
+            await manager.connect(stuck, "stuck", "collab-ws-3", {"user_id": "stuck"})
+            await manager.send_to_user("stuck", {"type": "pong"})
+            await asyncio.sleep(0.05)
+            await manager.disconnect(stuck, "collab-ws-3")
+
+        asyncio.run(run())
+        assert stuck.closed_with == 1013
+
+    def test_full_queue_skips_cursor_frames_but_drops_on_others(self):
+        """Test that lossy cursor frames are dropped for a full queue, and other types disconnect."""
+        manager = WebSocketManager()
+        slow = FakeWebSocket(block=True)
+
+        async def run():
+            await manager.connect(slow, "slow", "collab-ws-9", {"user_id": "slow"})
+            for i in range(SEND_QUEUE_SIZE + 5):
+                manager.broadcast_to_collaboration("collab-ws-9", {"type": "cursor_batch", "i": i})
+            kept_after_cursors = slow not in manager.slow_clients
+            manager.broadcast_to_collaboration("collab-ws-9", {"type": "chat_message"})
+            await asyncio.sleep(0.01)
+            await manager.disconnect(slow, "collab-ws-9")
+            return kept_after_cursors
+
+        cursor_drops = websocket_dropped_messages.labels(type="cursor_batch")
+        before = cursor_drops._value.get()
+        assert asyncio.run(run())
+        assert slow.closed_with == 1013
+        assert cursor_drops._value.get() - before >= 4
+
+
+class TestUpdateCoalescing:
+    """Test that high-frequency cursor and overlay updates are batched per room."""
+
+    def _manager(self):
+        manager = ConnectionManager()
+        sent = []
+        manager.broadcaster = lambda collaboration_id, message, exclude_user=None: sent.append(
+            (collaboration_id, message)
+        )
+        return manager, sent
+
+    def test_latest_cursor_per_user_wins(self):
+        """Test that only each user's newest cursor position is broadcast."""
+        manager, sent = self._manager()
+        for x in range(5):
+            manager.queue_cursor_position("collab-c", "alice", {"x": x})
+        manager.queue_cursor_position("collab-c", "bob", {"x": 100})
+        manager.flush_pending_updates()
+        manager.flush_pending_updates()
+
+        assert len(sent) == 1
+        collaboration_id, message = sent[0]
+        assert collaboration_id == "collab-c"
+        assert message["type"] == "cursor_batch"
+        assert {u["user_id"]: u["cursor_data"]["x"] for u in message["updates"]} == {"alice": 4, "bob": 100}
+
+    def test_overlay_updates_coalesce_per_overlay(self):
+        """Test that updates to different overlays are kept and logged as activity."""
+        manager, sent = self._manager()
+        manager.queue_overlay_update("collab-o", "alice", {"id": "o1", "x": 1})
+        manager.queue_overlay_update("collab-o", "alice", {"id": "o1", "x": 2})
+        manager.queue_overlay_update("collab-o", "alice", {"id": "o2", "x": 3})
+        manager.flush_pending_updates()
+
+        message = sent[0][1]
+        assert message["type"] == "overlay_batch"
+        assert [u["overlay_data"] for u in message["updates"]] == [{"id": "o1", "x": 2}, {"id": "o2", "x": 3}]
+        assert len(manager.get_recent_activity("collab-o")) == 2
+
+
+class TestCollaborationUsers:
+    """Test the cached per-room user list."""
+
+    def test_user_list_is_cached_until_membership_changes(self):
+        """Test that repeated lookups share one list that is rebuilt on join and leave."""
+        manager = ConnectionManager()
+        manager.join_collaboration("collab-u", "alice", {"user_id": "alice"})
+        first = manager.get_collaboration_users("collab-u")
+        assert manager.get_collaboration_users("collab-u") is first
+
+        manager.join_collaboration("collab-u", "bob", {"user_id": "bob"})
+        users = manager.get_collaboration_users("collab-u")
+        assert users is not first
+        assert sorted(u["user_id"] for u in users) == ["alice", "bob"]
+
+        manager.leave_collaboration("collab-u", "alice")
+        assert [u["user_id"] for u in manager.get_collaboration_users("collab-u")] == ["bob"]
+
+    def test_presence_updates_show_in_cached_list(self):
+        """Test that last_seen stays current without rebuilding the list."""
+        manager = ConnectionManager()
+        manager.join_collaboration("collab-p", "alice", {"user_id": "alice"})
+        users = manager.get_collaboration_users("collab-p")
+        manager.user_connections["alice"]["last_seen"] = "stale"
+        manager.update_user_presence("alice")
+
+        assert manager.get_collaboration_users("collab-p") is users
+        assert users[0]["last_seen"] == manager.user_connections["alice"]["last_seen"] != "stale"
+
+
+class TestWebSocketEndpoint:
+    """Test the collaboration endpoint over a real ASGI WebSocket."""
+
+    def _client(self):
+        app = FastAPI()
+
+        @app.websocket("/ws/{collaboration_id}")
+        async def ws(websocket: WebSocket, collaboration_id: str, token: str):
+            await websocket_endpoint(websocket, collaboration_id, token)
+
+        return TestClient(app)
+
+    def test_text_and_binary_frames(self):
+        """Test that JSON arrives the same whether sent as text or binary frames."""
+        token = create_access_token("0xframes")
+
+        with self._client().websocket_connect(f"/ws/collab-ws-e2e?token={token}") as ws:
+            assert ws.receive_json()["type"] == "connected"
+            ws.send_text('{"type": "ping"}')
+            assert ws.receive_json() == {"type": "pong"}
+            ws.send_bytes(b'{"type": "ping"}')
+            assert ws.receive_json() == {"type": "pong"}
+            ws.send_bytes(b"\xff{")
+            assert ws.receive_json() == {"type": "error", "message": "Invalid JSON"}
+            ws.send_text('{"type": "wave"}')
+            assert ws.receive_json() == {"type": "error", "message": "Unknown message type: wave"}